@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from docx import Document
+from binning import bin_codes, bin_labels
+from cohorts import match_cohorts
+from docx_tables import add_rows_table, add_dataframe_table
+from excel_writer import StreamingWorkbook
+from figure_jobs import figure_job, render_figures
+from ipd_cube import build_cube, rollup, los_histogram
+from ipd_data import _read_cache, _write_cache, decode_ip_dates, combine_admission_datetime, parse_age_sex, parse_export_times
+from ipd_visualizations import (apply_style, draw_age_groups, draw_gender_distribution, draw_department_distribution,
+                                draw_monthly_admissions, draw_top_diagnoses, draw_los_distribution)
+from synthetic_ipd import generate_ipd
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000, 10_000_000]
+EXCEL_MAX_ROWS = 1_048_575  # one sheet, less the header row
+
+
+def _bench_load(df, workdir):
+    # Parquet round trip through the same cache helpers load_ipd_data uses
+    cache_base = os.path.join(workdir, 'cache', 'ipd_bench')
+    _write_cache(df, cache_base)
+    return _read_cache(cache_base)
+
+
+def _bench_date_parse(df):
+    df['admission_date'] = decode_ip_dates(df['ip_number'])
+    df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
+    df['discharge_time'] = parse_export_times(df['discharge_time'])
+    df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
+
+
+def _bench_aggregation(df, cohort_masks):
+    demographics = parse_age_sex(df['a/s'])
+    df['age'] = demographics['age_years']
+    df['gender'] = demographics['gender']
+    df = df.join(bin_codes(df))
+    df['age_group'] = bin_labels(df, 'age_paediatric')
+    df['admission_month'] = df['admission_datetime'].dt.to_period('M')
+    cube = build_cube(df, cohort_masks)
+    tables = {by: rollup(cube, by) for by in ['department', 'age_group', 'gender', 'admission_month']}
+    tables['los_categories'] = los_histogram(cube)
+    return tables
+
+
+def _bench_figures(df, tables, workdir):
+    valid_los = df.loc[(df['length_of_stay'] >= 0) & (df['length_of_stay'] <= 365), 'length_of_stay']
+    jobs = [
+        figure_job(os.path.join(workdir, 'age_groups.png'), draw_age_groups, tables['age_group']['admissions']),
+        figure_job(os.path.join(workdir, 'gender.png'), draw_gender_distribution, df['gender'].value_counts(), figsize=(8, 8)),
+        figure_job(os.path.join(workdir, 'departments.png'), draw_department_distribution,
+                   tables['department']['admissions'].sort_values(ascending=False), figsize=(12, 6)),
+        figure_job(os.path.join(workdir, 'monthly.png'), draw_monthly_admissions,
+                   tables['admission_month']['admissions'], figsize=(12, 6)),
+        figure_job(os.path.join(workdir, 'top_diagnoses.png'), draw_top_diagnoses,
+                   df['diagnosis'].value_counts().head(10), figsize=(12, 8)),
+        figure_job(os.path.join(workdir, 'los.png'), draw_los_distribution, valid_los),
+    ]
+    results = render_figures(jobs, setup=apply_style, report=False)
+    errors = [r['error'] for r in results if r['error']]
+    if errors:
+        raise RuntimeError('; '.join(errors))
+
+
+def _bench_xlsx(df, tables, workdir):
+    wb = StreamingWorkbook()
+    ws = wb.create_sheet("Summary")
+    ws['A1'] = "Synthetic IPD benchmark"
+    for i, (dept, count) in enumerate(tables['department']['admissions'].items(), 3):
+        ws[f'A{i}'] = dept
+        ws[f'B{i}'] = int(count)
+    columns = ['ip_number', 'a/s', 'department', 'diagnosis', 'length_of_stay']
+    wb.add_dataframe_sheet("Raw Data", df[columns].head(EXCEL_MAX_ROWS))
+    wb.save(os.path.join(workdir, 'benchmark.xlsx'))
+
+
+def _bench_docx(df, tables, workdir):
+    doc = Document()
+    doc.add_heading('Synthetic IPD benchmark', 0)
+    summary = tables['department']
+    rows = [[str(dept), str(int(row['admissions'])), f"{row['mean']:.1f}"] for dept, row in summary.iterrows()]
+    add_rows_table(doc, ['Department', 'Admissions', 'Mean LOS (days)'], rows)
+    # Full diagnosis frequency appendix, the largest table the manuscripts would carry
+    doc.add_heading('Appendix: diagnosis frequencies', 1)
+    add_dataframe_table(doc, df['diagnosis'].value_counts().rename_axis('Diagnosis').reset_index(name='Admissions'))
+    doc.save(os.path.join(workdir, 'benchmark.docx'))
+
+
+def benchmark_size(n_rows, seed=0):
+    """Time each pipeline step on n_rows synthetic admissions; returns {step: seconds or error}"""
+    workdir = tempfile.mkdtemp(prefix='ipd_bench_')
+    timings = {}
+
+    def timed(name, func, *args):
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+            timings[name] = {'seconds': round(time.perf_counter() - start, 4)}
+            return result
+        except Exception as e:
+            timings[name] = {'seconds': round(time.perf_counter() - start, 4), 'error': f"{type(e).__name__}: {e}"}
+            print(f"  {name} failed: {e}")
+            return None
+
+    try:
+        df = timed('generate', generate_ipd, n_rows, seed)
+        loaded = timed('load', _bench_load, df, workdir)
+        df = loaded if loaded is not None else df
+        timed('date_parse', _bench_date_parse, df)
+        cohort_masks = timed('cohort_match', match_cohorts, df['diagnosis'], None, df['icd_code'])
+        tables = timed('aggregation', _bench_aggregation, df, cohort_masks)
+        if tables is not None:
+            timed('figures', _bench_figures, df, tables, workdir)
+            timed('xlsx', _bench_xlsx, df, tables, workdir)
+            timed('docx', _bench_docx, df, tables, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return timings
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=0, output='benchmark_results.json'):
+    """Benchmark every size in turn, rewriting the JSON results after each one"""
+    report = {
+        'meta': {
+            'started': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+        },
+        'results': [],
+    }
+    for n_rows in sizes:
+        print(f"Benchmarking {n_rows:,} rows...")
+        timings = benchmark_size(n_rows, seed)
+        for name, timing in timings.items():
+            status = f"  FAILED: {timing['error']}" if 'error' in timing else ''
+            print(f"  {name:<14} {timing['seconds']:>9.2f}s{status}")
+        report['results'].append({'rows': n_rows, 'steps': timings})
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the IPD pipeline on synthetic data of increasing size")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="row counts to benchmark")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the synthetic data generator")
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file for the results")
+    args = parser.parse_args()
+    run_benchmarks(args.sizes, args.seed, args.output)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+from ipd_cube import LOS_BINS, LOS_LABELS
+
+# Scheme name -> {'column', 'bins', 'labels'}; bins are closed on the left, like pd.cut(right=False)
+BIN_REGISTRY = {}
+
+
+def register_bins(name, column, bins, labels):
+    """Register a binning scheme for a numeric column"""
+    if len(labels) != len(bins) - 1:
+        raise ValueError(f"Scheme {name!r} needs {len(bins) - 1} labels, got {len(labels)}")
+    if np.any(np.diff(bins) <= 0):
+        raise ValueError(f"Scheme {name!r} bins must be strictly increasing")
+    BIN_REGISTRY[name] = {'column': column, 'bins': list(bins), 'labels': list(labels)}
+
+
+def code_column(name):
+    """Name of the int8 column holding a scheme's bin codes"""
+    return f'{name}_code'
+
+
+def _scheme_lookup(edges, bins):
+    # Map each merged-edge interval (offset by one so -1 becomes 0) to the scheme's bin code
+    lookup = np.full(len(edges) + 1, -1, dtype=np.int8)
+    inside = (edges >= bins[0]) & (edges < bins[-1])
+    lookup[1:][inside] = np.searchsorted(bins, edges[inside], side='right') - 1
+    return lookup
+
+
+def bin_codes(df, registry=None):
+    """Compute int8 bin codes for every registered scheme whose column is in df
+
+    All schemes on the same column share one np.searchsorted over the union of
+    their edges; each scheme's codes are then a small table lookup. Values
+    outside a scheme's range (or missing) get -1. Returns a DataFrame with one
+    code_column(name) per scheme, on df's index, ready to join onto df so cohort
+    slices carry the codes with them.
+    """
+    registry = BIN_REGISTRY if registry is None else registry
+    by_column = {}
+    for name, scheme in registry.items():
+        if scheme['column'] in df.columns:
+            by_column.setdefault(scheme['column'], []).append(name)
+
+    codes = {}
+    for column, names in by_column.items():
+        edges = np.unique(np.concatenate([registry[name]['bins'] for name in names]).astype(float))
+        values = df[column].to_numpy(dtype=float)
+        interval = np.searchsorted(edges, values, side='right')  # 0 .. len(edges); NaN sorts last
+        interval[np.isnan(values)] = 0
+        for name in names:
+            bins = np.asarray(registry[name]['bins'], dtype=float)
+            codes[code_column(name)] = _scheme_lookup(edges, bins)[interval]
+    return pd.DataFrame(codes, index=df.index)
+
+
+def bin_labels(df, name, registry=None):
+    """Return a scheme's bins as an ordered categorical (as pd.cut would) from its stored codes"""
+    registry = BIN_REGISTRY if registry is None else registry
+    labels = registry[name]['labels']
+    categories = pd.Categorical.from_codes(df[code_column(name)].to_numpy(), categories=labels, ordered=True)
+    return pd.Series(categories, index=df.index)
+
+
+# Publication tables and overall analyses
+register_bins('age_broad', 'age', [0, 18, 35, 50, 65, 100], ['0-18', '19-35', '36-50', '51-65', '65+'])
+# Dashboards and GI/ARI analyses (separates under-fives)
+register_bins('age_paediatric', 'age', [0, 5, 18, 35, 50, 65, 100], ['0-4', '5-17', '18-34', '35-49', '50-64', '65+'])
+# Cardiovascular analysis
+register_bins('age_cv', 'age', [0, 40, 50, 60, 70, 100], ['<40', '40-49', '50-59', '60-69', '70+'])
+# IDSP weekly P-form (under-fives vs. five and over)
+register_bins('age_idsp', 'age', [0, 5, 100], ['<5', '5+'])
+register_bins('los', 'length_of_stay', LOS_BINS, LOS_LABELS)
@@ -0,0 +1,219 @@
+from collections import deque
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Keyword lists used to find each cohort by substring match on the lower-cased diagnosis
+ADD_KEYWORDS = ['gastroenteritis', 'gastro', 'diarrhea', 'diarrhoea', 'diarrh', 'dysentery', 'cholera', 'food poisoning', 'add', 'acute ge', 'age', 'diarrhrea', 'loose', 'motion', 'stool', 'bowel', 'enteric', 'dehydration']
+ARI_KEYWORDS = ['ari', 'arti', 'urti', 'lrti', 'respiratory', 'viral fever', 'fever', 'bronchiolitis', 'pneumonia', 'cough', 'breath', 'lung', 'resp', 'acute febrile', 'febrile illness', 'bronchitis', 'pharyngitis', 'sinusitis', 'otitis', 'tonsillitis']
+CV_KEYWORDS = ['cardiac', 'heart', 'myocardial', 'infarction', 'angina', 'hypertension', 'stroke', 'cva', 'cerebrovascular', 'coronary', 'cardiomyopathy', 'arrhythmia', 'valvular', 'pericard', 'carditis', 'hf', 'heart failure', 'chf', 'congestive', 'ischemic', 'hypertensive', 'cardiogenic', 'atherosclerosis', 'embolism', 'thrombosis']
+
+# Exact diagnosis strings used by respiratory_analysis.py for its respiratory infection cohort
+RESPIRATORY_DIAGNOSES = [
+    'Viral Fever', 'Acute Febrile Illness', 'LRTI', 'Bronchiolitis',
+    'Lower Respiratory Tract Infection', 'Upper Respiratory Tract Infection',
+    'Acute Febrile Illness Under Evaluation', 'Fever with Thrombocytopenia',
+    'Viral Fever with Thrombocytopenia', 'Viral Fever with URTI'
+]
+
+COHORT_KEYWORDS = {
+    'ADD': ADD_KEYWORDS,
+    'ARI': ARI_KEYWORDS,
+    'CV': CV_KEYWORDS,
+}
+
+# Declarative cohort definitions: name -> include/exclude keywords, exact diagnoses, ICD prefixes.
+# Every registered cohort is evaluated together in the same scan of the data.
+COHORT_REGISTRY = {}
+
+
+def register_cohort(name, include=(), exclude=(), exact=(), icd_prefixes=()):
+    """Add or replace a cohort definition in COHORT_REGISTRY
+
+    A diagnosis belongs to the cohort when it contains an include keyword, equals
+    one of the exact strings or carries an ICD code starting with one of the
+    prefixes, and does not contain any exclude keyword.
+    """
+    COHORT_REGISTRY[name] = {
+        'include': list(include),
+        'exclude': list(exclude),
+        'exact': list(exact),
+        'icd_prefixes': list(icd_prefixes),
+    }
+    _default_engine.cache_clear()
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton matching every cohort's keywords in one scan of a string
+
+    Each state carries a bitmask of the cohorts whose keywords end there, so
+    match() returns the set of matching cohorts as a single int.
+    """
+
+    def __init__(self, cohort_keywords):
+        # Keys may be any hashable label; bit i belongs to the i-th key
+        self.cohorts = list(cohort_keywords)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [0]
+        for bit, name in enumerate(self.cohorts):
+            for keyword in cohort_keywords[name]:
+                self._add(keyword.lower(), 1 << bit)
+        self._all = (1 << len(self.cohorts)) - 1
+        self._build_failure_links()
+
+    def _add(self, keyword, bit):
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(0)
+            state = nxt
+        self._out[state] |= bit
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def match(self, text):
+        """Return the bitmask of cohorts with at least one keyword in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        found = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+                if found == self._all:
+                    break
+        return found
+
+
+def encode_diagnoses(diagnoses):
+    """Dictionary-encode a diagnosis column into (integer codes, unique values)
+
+    Missing diagnoses get their own code so per-value classifiers still see them.
+    """
+    codes, uniques = pd.factorize(diagnoses, use_na_sentinel=False)
+    return codes, uniques
+
+
+def classify_unique(diagnoses, classifier):
+    """Apply a per-diagnosis classifier to each distinct value once and broadcast the result"""
+    codes, uniques = encode_diagnoses(diagnoses)
+    labels = np.array([classifier(value) for value in uniques], dtype=object)
+    return pd.Series(labels[codes], index=diagnoses.index, name=diagnoses.name)
+
+
+class CohortEngine:
+    """Evaluate every cohort in a registry in one pass over the distinct diagnoses and ICD codes
+
+    Include and exclude keywords share a single automaton (include bits first,
+    exclude bits shifted by the number of cohorts), exact strings and ICD
+    prefixes are dict lookups, so the cost of a scan does not grow with the
+    number of registered cohorts.
+    """
+
+    def __init__(self, registry):
+        self.cohorts = list(registry)
+        n = len(self.cohorts)
+        if n > 64:
+            raise ValueError("CohortEngine supports at most 64 cohorts")
+        self.dtype = next(dt for dt in (np.uint8, np.uint16, np.uint32, np.uint64) if n <= np.iinfo(dt).bits)
+
+        keywords = {name: registry[name]['include'] for name in self.cohorts}
+        keywords.update({('exclude', name): registry[name]['exclude'] for name in self.cohorts})
+        self._keywords = KeywordAutomaton(keywords)
+        self._n = n
+        self._mask = (1 << n) - 1
+
+        self._exact = {}
+        self._icd = {}
+        for bit, name in enumerate(self.cohorts):
+            for text in registry[name]['exact']:
+                self._exact[text] = self._exact.get(text, 0) | (1 << bit)
+            for prefix in registry[name]['icd_prefixes']:
+                prefix = prefix.strip().upper()
+                self._icd[prefix] = self._icd.get(prefix, 0) | (1 << bit)
+        self._icd_lengths = sorted({len(prefix) for prefix in self._icd})
+
+    def _diagnosis_bits(self, diagnosis):
+        # Returns (include bits, exclude bits) for one distinct diagnosis value
+        found = self._keywords.match(str(diagnosis).lower())
+        include = (found & self._mask) | self._exact.get(diagnosis, 0)
+        return include, found >> self._n
+
+    def _icd_bits(self, icd_codes):
+        if not self._icd or pd.isna(icd_codes):
+            return 0
+        found = 0
+        for code in str(icd_codes).upper().split(','):
+            code = code.strip()
+            for length in self._icd_lengths:
+                found |= self._icd.get(code[:length], 0)
+        return found
+
+    def evaluate(self, diagnoses, icd_codes=None):
+        """Return one membership bitmask per admission (bit i set = member of cohorts[i])"""
+        codes, uniques = encode_diagnoses(diagnoses)
+        pairs = [self._diagnosis_bits(value) for value in uniques]
+        include = np.array([p[0] for p in pairs], dtype=np.uint64)[codes]
+        exclude = np.array([p[1] for p in pairs], dtype=np.uint64)[codes]
+        if icd_codes is not None and self._icd:
+            icd_index, icd_uniques = pd.factorize(icd_codes, use_na_sentinel=False)
+            include |= np.array([self._icd_bits(value) for value in icd_uniques], dtype=np.uint64)[icd_index]
+        return pd.Series((include & ~exclude).astype(self.dtype), index=diagnoses.index, name='cohort_bits')
+
+    def membership(self, bits):
+        """Expand a bitmask Series from evaluate() into boolean columns, one per cohort"""
+        values = bits.to_numpy()
+        return pd.DataFrame({name: (values & self.dtype(1 << i)) != 0 for i, name in enumerate(self.cohorts)},
+                            index=bits.index)
+
+
+@lru_cache(maxsize=None)
+def _default_engine():
+    return CohortEngine(COHORT_REGISTRY)
+
+
+register_cohort('ADD', include=ADD_KEYWORDS)
+register_cohort('ARI', include=ARI_KEYWORDS)
+register_cohort('CV', include=CV_KEYWORDS)
+register_cohort('RESP', exact=RESPIRATORY_DIAGNOSES)
+register_cohort('DENGUE', include=['dengue'], exclude=['? dengue', 'dengue like'], icd_prefixes=['A90', 'A91', 'A97'])
+register_cohort('UTI', include=['urinary tract infection', 'pyelonephritis', 'cystitis'],
+                exclude=['? urinary tract infection'], icd_prefixes=['N39.0', 'N30', 'N10'])
+
+
+def cohort_bits(diagnoses, icd_codes=None, registry=None):
+    """Return the compact cohort-membership bitmask for every admission"""
+    engine = _default_engine() if registry is None else CohortEngine(registry)
+    return engine.evaluate(diagnoses, icd_codes)
+
+
+def match_cohorts(diagnoses, cohort_keywords=None, icd_codes=None):
+    """Return boolean masks (one column per registered cohort) from a single scan
+
+    Passing cohort_keywords evaluates an ad-hoc keyword-only registry instead of COHORT_REGISTRY.
+    """
+    if cohort_keywords is None:
+        engine = _default_engine()
+    else:
+        engine = CohortEngine({name: {'include': kws, 'exclude': [], 'exact': [], 'icd_prefixes': []}
+                               for name, kws in cohort_keywords.items()})
+    return engine.membership(engine.evaluate(diagnoses, icd_codes))
@@ -3,66 +3,15 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
-from datetime import datetime
+from cohorts import match_cohorts
+from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex
+from binning import bin_codes, bin_labels
+from figure_jobs import figure_job, render_figures
 import warnings
 warnings.filterwarnings('ignore')
 
-# Load and prepare data
-df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-
-# Extract correct admission date from IP Number
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
-
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
-df['admission_time_only'] = pd.to_datetime(df['admission_time'], errors='coerce').dt.time
-df['admission_datetime'] = pd.to_datetime(df.apply(
-    lambda row: f"{row['admission_date'].strftime('%Y-%m-%d')} {row['admission_time_only']}" if pd.notna(row['admission_date']) and pd.notna(row['admission_time_only']) else None, axis=1
-), errors='coerce')
-df['discharge_time'] = pd.to_datetime(df['discharge_time'], errors='coerce')
-
-# Parse demographics
-df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-df['gender'] = df['a/s'].str.extract(r'/([MF])')
-
-# Calculate LOS
-df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
-
-# Comprehensive search for cardiovascular cases
-cv_keywords = ['cardiac', 'heart', 'myocardial', 'infarction', 'angina', 'hypertension', 'stroke', 'cva', 'cerebrovascular', 'coronary', 'cardiomyopathy', 'arrhythmia', 'valvular', 'pericard', 'carditis', 'hf', 'heart failure', 'chf', 'congestive', 'ischemic', 'hypertensive', 'cardiogenic', 'atherosclerosis', 'embolism', 'thrombosis']
-cv_cases = []
-for idx, row in df.iterrows():
-    diagnosis = str(row['diagnosis']).lower()
-    if any(keyword in diagnosis for keyword in cv_keywords):
-        cv_cases.append(idx)
-
-cv_df = df.loc[cv_cases].copy() if cv_cases else pd.DataFrame()
-
-print(f"Cardiovascular cases found: {len(cv_df)}")
-print(f"Percentage of total admissions: {len(cv_df)/len(df)*100:.1f}%")
-
-# Create age groups
-if len(cv_df) > 0:
-    age_bins = [0, 40, 50, 60, 70, 100]
-    age_labels = ['<40', '40-49', '50-59', '60-69', '70+']
-    cv_df['age_group'] = pd.cut(cv_df['age'], bins=age_bins, labels=age_labels, right=False)
-
-# Set up plotting style
-plt.style.use('default')
-sns.set_palette("husl")
-plt.rcParams.update({
+# Plotting style, applied in every rendering process
+PLOT_STYLE = {
     'font.size': 12,
     'font.family': 'serif',
     'figure.figsize': (12, 8),
@@ -74,50 +23,43 @@ plt.rcParams.update({
     'legend.fontsize': 12,
     'axes.grid': True,
     'grid.alpha': 0.3
-})
+}
 
-# Create output directories
-os.makedirs('cv_figures', exist_ok=True)
-os.makedirs('cv_tables', exist_ok=True)
 
-# Analyze cardiovascular cases if found
-if len(cv_df) > 0:
-    print(f"\nAnalyzing {len(cv_df)} cardiovascular cases...")
+def apply_style():
+    warnings.filterwarnings('ignore')
+    plt.style.use('default')
+    sns.set_palette("husl")
+    plt.rcParams.update(PLOT_STYLE)
+
+
+# Chart renderers: each draws one figure from pre-aggregated data
 
-    # 1. CV Cases by Diagnosis
-    plt.figure(figsize=(16, 10))
-    cv_diagnoses = cv_df['diagnosis'].value_counts().head(15)
+def draw_diagnoses(data):
+    cv_diagnoses, total = data
     bars = plt.bar(range(len(cv_diagnoses)), cv_diagnoses.values, color='red', edgecolor='black', alpha=0.8)
     plt.xticks(range(len(cv_diagnoses)), cv_diagnoses.index, rotation=45, ha='right')
     plt.xlabel('Diagnosis')
     plt.ylabel('Number of Cases')
-    plt.title(f'Cardiovascular Cases by Diagnosis at SIMSRH IPD (Aug-Nov 2025) - Total: {len(cv_df)}')
+    plt.title(f'Cardiovascular Cases by Diagnosis at SIMSRH IPD (Aug-Nov 2025) - Total: {total}')
 
     for bar, count in zip(bars, cv_diagnoses.values):
         plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 1,
                  f'{int(count)}', ha='center', va='bottom', fontweight='bold')
 
-    plt.tight_layout()
-    plt.savefig('cv_figures/cv_diagnosis_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
 
-    # 2. Age Distribution of CV Cases
-    plt.figure(figsize=(10, 6))
-    plt.hist(cv_df['age'].dropna(), bins=12, edgecolor='black', alpha=0.7, color='darkred')
+def draw_age_distribution(ages):
+    plt.hist(ages, bins=12, edgecolor='black', alpha=0.7, color='darkred')
     plt.xlabel('Age (years)')
     plt.ylabel('Number of CV Cases')
     plt.title('Age Distribution of Cardiovascular Cases at SIMSRH')
     plt.grid(True, alpha=0.3)
-    plt.axvline(cv_df['age'].mean(), color='blue', linestyle='--', linewidth=2,
-               label=f'Mean: {cv_df["age"].mean():.1f} years')
+    plt.axvline(ages.mean(), color='blue', linestyle='--', linewidth=2,
+               label=f'Mean: {ages.mean():.1f} years')
     plt.legend()
-    plt.tight_layout()
-    plt.savefig('cv_figures/cv_age_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
 
-    # 3. Gender Distribution in CV Cases
-    plt.figure(figsize=(8, 8))
-    gender_counts = cv_df['gender'].value_counts()
+
+def draw_gender_distribution(gender_counts):
     colors = ['lightblue', 'lightcoral']
     explode = (0.05, 0)
 
@@ -125,13 +67,9 @@ if len(cv_df) > 0:
             colors=colors, explode=explode, shadow=True, startangle=90)
     plt.title('Gender Distribution in Cardiovascular Cases at SIMSRH', fontsize=16, fontweight='bold')
     plt.axis('equal')
-    plt.tight_layout()
-    plt.savefig('cv_figures/cv_gender_distribution.png', dpi=300, bbox_inches='tight')
-    plt.close()
 
-    # 4. CV Cases by Age Group
-    plt.figure(figsize=(10, 6))
-    age_group_counts = cv_df['age_group'].value_counts().sort_index()
+
+def draw_age_groups(age_group_counts):
     bars = plt.bar(age_group_counts.index, age_group_counts.values, color='maroon', edgecolor='black', alpha=0.8)
     plt.xlabel('Age Group')
     plt.ylabel('Number of CV Cases')
@@ -142,9 +80,54 @@ if len(cv_df) > 0:
                  f'{int(count)}', ha='center', va='bottom', fontweight='bold')
 
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('cv_figures/cv_age_groups.png', dpi=300, bbox_inches='tight')
-    plt.close()
+
+
+# Load and prepare data
+df = load_ipd_data()
+
+# Extract correct admission date from IP Number
+df['admission_date'] = decode_ip_dates(df['ip_number'])
+df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
+df['discharge_time'] = parse_export_times(df['discharge_time'])
+
+# Parse demographics
+demographics = parse_age_sex(df['a/s'])
+df['age'] = demographics['age_years']
+df['gender'] = demographics['gender']
+
+# Calculate LOS
+df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
+
+# Bin codes for every registered age/LOS scheme, one searchsorted pass per column
+df = df.join(bin_codes(df))
+
+# Comprehensive search for cardiovascular cases
+cohort_masks = match_cohorts(df['diagnosis'])
+cv_df = df[cohort_masks['CV']].copy()
+
+print(f"Cardiovascular cases found: {len(cv_df)}")
+print(f"Percentage of total admissions: {len(cv_df)/len(df)*100:.1f}%")
+
+# Create age groups
+if len(cv_df) > 0:
+    cv_df['age_group'] = bin_labels(cv_df, 'age_cv')
+
+# Create output directories
+os.makedirs('cv_figures', exist_ok=True)
+os.makedirs('cv_tables', exist_ok=True)
+
+# Analyze cardiovascular cases if found
+if len(cv_df) > 0:
+    print(f"\nAnalyzing {len(cv_df)} cardiovascular cases...")
+
+    render_figures([
+        figure_job('cv_figures/cv_diagnosis_distribution.png', draw_diagnoses,
+                   (cv_df['diagnosis'].value_counts().head(15), len(cv_df)), figsize=(16, 10)),
+        figure_job('cv_figures/cv_age_distribution.png', draw_age_distribution, cv_df['age'].dropna()),
+        figure_job('cv_figures/cv_gender_distribution.png', draw_gender_distribution,
+                   cv_df['gender'].value_counts(), figsize=(8, 8)),
+        figure_job('cv_figures/cv_age_groups.png', draw_age_groups, cv_df['age_group'].value_counts().sort_index()),
+    ], setup=apply_style)
 
     # Generate CV Tables
     cv_summary = pd.DataFrame({
@@ -2,73 +2,81 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
-from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.chart import BarChart, LineChart, PieChart, Reference
 from openpyxl.drawing.image import Image
 from openpyxl.utils.dataframe import dataframe_to_rows
 import os
-from datetime import datetime
+from cohorts import match_cohorts
+from excel_writer import StreamingWorkbook
+from figure_jobs import figure_job, render_figures
+from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex
+from binning import bin_codes, bin_labels
 import warnings
 warnings.filterwarnings('ignore')
 
+
+def apply_style():
+    warnings.filterwarnings('ignore')
+    plt.style.use('default')
+    sns.set_palette("husl")
+
+
+# Chart renderers: each draws one figure from pre-aggregated data
+
+def draw_age_distribution(ages):
+    plt.hist(ages, bins=15, edgecolor='black', alpha=0.7, color='skyblue')
+    plt.xlabel('Age (years)')
+    plt.ylabel('Number of ADD Cases')
+    plt.title('Age Distribution of Acute Diarrheal Disease Cases at SIMSRH')
+    plt.grid(True, alpha=0.3)
+    plt.axvline(ages.mean(), color='red', linestyle='--', linewidth=2,
+               label=f'Mean: {ages.mean():.1f} years')
+    plt.legend()
+
+
+def draw_gender_distribution(gender_counts):
+    colors = ['lightblue', 'lightcoral']
+    explode = (0.05, 0)
+
+    plt.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
+            colors=colors, explode=explode, shadow=True, startangle=90)
+    plt.title('Gender Distribution in Acute Diarrheal Disease Cases at SIMSRH', fontsize=14, fontweight='bold')
+    plt.axis('equal')
+
+
 # Load and prepare data
 print("Loading data and creating ADD dashboard...")
-df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+df = load_ipd_data()
 
 # Extract correct admission date from IP Number
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
-
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
-df['admission_time_only'] = pd.to_datetime(df['admission_time'], errors='coerce').dt.time
-df['admission_datetime'] = pd.to_datetime(df.apply(
-    lambda row: f"{row['admission_date'].strftime('%Y-%m-%d')} {row['admission_time_only']}" if pd.notna(row['admission_date']) and pd.notna(row['admission_time_only']) else None, axis=1
-), errors='coerce')
-df['discharge_time'] = pd.to_datetime(df['discharge_time'], errors='coerce')
+df['admission_date'] = decode_ip_dates(df['ip_number'])
+df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
+df['discharge_time'] = parse_export_times(df['discharge_time'])
 
 # Parse demographics
-df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-df['gender'] = df['a/s'].str.extract(r'/([MF])')
+demographics = parse_age_sex(df['a/s'])
+df['age'] = demographics['age_years']
+df['gender'] = demographics['gender']
 
 # Calculate LOS
 df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
 
-# Comprehensive search for gastroenteritis cases (ADD)
-gi_keywords = ['gastroenteritis', 'gastro', 'diarrhea', 'diarrhoea', 'diarrh', 'dysentery', 'cholera', 'food poisoning', 'add', 'acute ge', 'age', 'diarrhrea', 'loose', 'motion', 'stool', 'bowel', 'enteric', 'dehydration']
-gi_cases = []
-for idx, row in df.iterrows():
-    diagnosis = str(row['diagnosis']).lower()
-    if any(keyword in diagnosis for keyword in gi_keywords):
-        gi_cases.append(idx)
+# Bin codes for every registered age/LOS scheme, one searchsorted pass per column
+df = df.join(bin_codes(df))
 
-gi_df = df.loc[gi_cases].copy() if gi_cases else pd.DataFrame()
+# Comprehensive search for gastroenteritis cases (ADD)
+cohort_masks = match_cohorts(df['diagnosis'])
+gi_df = df[cohort_masks['ADD']].copy()
 
 # Create age groups
 if len(gi_df) > 0:
-    age_bins = [0, 5, 18, 35, 50, 65, 100]
-    age_labels = ['0-4', '5-17', '18-34', '35-49', '50-64', '65+']
-    gi_df['age_group'] = pd.cut(gi_df['age'], bins=age_bins, labels=age_labels, right=False)
+    gi_df['age_group'] = bin_labels(gi_df, 'age_paediatric')
 
 print(f"Found {len(gi_df)} ADD cases for dashboard creation")
 
 # Create Excel workbook
-wb = Workbook()
-
-# Remove default sheet
-wb.remove(wb.active)
+wb = StreamingWorkbook()  # Data sheets are streamed at save time
 
 # Sheet 1: Dashboard Summary
 ws_dashboard = wb.create_sheet("Dashboard Summary")
@@ -129,12 +137,9 @@ for col in ws_dashboard.columns:
     ws_dashboard.column_dimensions[column].width = adjusted_width
 
 # Sheet 2: Raw Data
-ws_raw = wb.create_sheet("Raw Data")
 
 # Write GI dataframe to Excel
-for r, row in enumerate(dataframe_to_rows(gi_df[['ip_number', 'diagnosis', 'department', 'age', 'gender', 'length_of_stay', 'admission_datetime']], index=False), 1):
-    for c, value in enumerate(row, 1):
-        ws_raw.cell(row=r, column=c, value=value)
+wb.add_dataframe_sheet("Raw Data", gi_df[['ip_number', 'diagnosis', 'department', 'age', 'gender', 'length_of_stay', 'admission_datetime']])
 
 # Sheet 3: Summary Statistics
 ws_stats = wb.create_sheet("Summary Statistics")
@@ -282,36 +287,10 @@ wb.save('ADD_Analysis_Dashboard.xlsx')
 print("ADD dashboard Excel file created successfully: ADD_Analysis_Dashboard.xlsx")
 
 # Create additional charts as images for embedding
-plt.style.use('default')
-sns.set_palette("husl")
-
-# Age distribution histogram
-plt.figure(figsize=(10, 6))
-plt.hist(gi_df['age'].dropna(), bins=15, edgecolor='black', alpha=0.7, color='skyblue')
-plt.xlabel('Age (years)')
-plt.ylabel('Number of ADD Cases')
-plt.title('Age Distribution of Acute Diarrheal Disease Cases at SIMSRH')
-plt.grid(True, alpha=0.3)
-plt.axvline(gi_df['age'].mean(), color='red', linestyle='--', linewidth=2,
-           label=f'Mean: {gi_df["age"].mean():.1f} years')
-plt.legend()
-plt.tight_layout()
-plt.savefig('add_age_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# Gender pie chart
-plt.figure(figsize=(8, 8))
-gender_counts = gi_df['gender'].value_counts()
-colors = ['lightblue', 'lightcoral']
-explode = (0.05, 0)
-
-plt.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
-        colors=colors, explode=explode, shadow=True, startangle=90)
-plt.title('Gender Distribution in Acute Diarrheal Disease Cases at SIMSRH', fontsize=14, fontweight='bold')
-plt.axis('equal')
-plt.tight_layout()
-plt.savefig('add_gender_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
+render_figures([
+    figure_job('add_age_distribution.png', draw_age_distribution, gi_df['age'].dropna()),
+    figure_job('add_gender_distribution.png', draw_gender_distribution, gi_df['gender'].value_counts(), figsize=(8, 8)),
+], setup=apply_style)
 
 print("ADD dashboard creation completed!")
 print("Files created:")
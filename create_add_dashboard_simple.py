@@ -1,60 +1,92 @@
 import pandas as pd
+from functools import partial
 import matplotlib.pyplot as plt
 import seaborn as sns
-from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill
 from openpyxl.utils.dataframe import dataframe_to_rows
-from datetime import datetime
+from cohorts import match_cohorts
+from excel_writer import StreamingWorkbook
+from figure_jobs import figure_job, render_figures
+from ipd_data import load_ipd_data, decode_ip_dates, parse_age_sex
+from binning import bin_codes, bin_labels
+from surveillance import daily_counts, detect_outbreaks, alert_table, draw_alert_overlay
 import warnings
 warnings.filterwarnings('ignore')
 
+
+def apply_style():
+    warnings.filterwarnings('ignore')
+    plt.style.use('default')
+    sns.set_palette("husl")
+
+
+# Chart renderers: each draws one figure from pre-aggregated data
+
+def draw_age_distribution(ages):
+    plt.hist(ages, bins=15, edgecolor='black', alpha=0.7, color='skyblue')
+    plt.xlabel('Age (years)')
+    plt.ylabel('Number of ADD Cases')
+    plt.title('Age Distribution of Acute Diarrheal Disease Cases')
+    plt.grid(True, alpha=0.3)
+    plt.axvline(ages.mean(), color='red', linestyle='--', linewidth=2,
+               label=f'Mean: {ages.mean():.1f} years')
+    plt.legend()
+
+
+def draw_gender_pie(gender_counts):
+    colors = ['lightblue', 'lightcoral']
+    explode = (0.05, 0)
+
+    plt.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
+            colors=colors, explode=explode, shadow=True, startangle=90)
+    plt.title('Gender Distribution in ADD Cases', fontsize=14, fontweight='bold')
+    plt.axis('equal')
+
+
+def draw_age_groups(age_group_counts):
+    bars = plt.bar(range(len(age_group_counts)), age_group_counts.values, color='orange', edgecolor='black', alpha=0.8)
+    plt.xticks(range(len(age_group_counts)), age_group_counts.index, rotation=45)
+    plt.xlabel('Age Group')
+    plt.ylabel('Number of Cases')
+    plt.title('ADD Cases by Age Group')
+    plt.grid(True, alpha=0.3)
+
+    for bar, count in zip(bars, age_group_counts.values):
+        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.5,
+                 f'{int(count)}', ha='center', va='bottom', fontweight='bold')
+
+
 print("Creating simplified ADD dashboard...")
 
 # Load and prepare data
-df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+df = load_ipd_data()
 
 # Extract admission date
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
-
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
+df['admission_date'] = decode_ip_dates(df['ip_number'])
 
 # Parse demographics
-df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-df['gender'] = df['a/s'].str.extract(r'/([MF])')
+demographics = parse_age_sex(df['a/s'])
+df['age'] = demographics['age_years']
+df['gender'] = demographics['gender']
+
+# Bin codes for every registered age/LOS scheme, one searchsorted pass per column
+df = df.join(bin_codes(df))
 
 # Find ADD cases
-add_keywords = ['gastroenteritis', 'gastro', 'diarrhea', 'diarrhoea', 'diarrh', 'dysentery', 'cholera', 'food poisoning', 'add', 'acute ge', 'age', 'diarrhrea', 'loose', 'motion', 'stool', 'bowel', 'enteric', 'dehydration']
-add_cases = []
-for idx, row in df.iterrows():
-    diagnosis = str(row['diagnosis']).lower()
-    if any(keyword in diagnosis for keyword in add_keywords):
-        add_cases.append(idx)
-
-add_df = df.loc[add_cases].copy() if add_cases else pd.DataFrame()
+cohort_masks = match_cohorts(df['diagnosis'])
+add_df = df[cohort_masks['ADD']].copy()
 print(f"Found {len(add_df)} ADD cases")
 
+# Daily counts for every cohort x department, screened for outbreaks in one pass
+outbreaks = detect_outbreaks(daily_counts(df, cohort_masks))
+add_outbreaks = outbreaks[outbreaks['cohort'] == 'ADD']
+
 # Create age groups
 if len(add_df) > 0:
-    age_bins = [0, 5, 18, 35, 50, 65, 100]
-    age_labels = ['0-4', '5-17', '18-34', '35-49', '50-64', '65+']
-    add_df['age_group'] = pd.cut(add_df['age'], bins=age_bins, labels=age_labels, right=False)
+    add_df['age_group'] = bin_labels(add_df, 'age_paediatric')
 
 # Create Excel workbook
-wb = Workbook()
-wb.remove(wb.active)  # Remove default sheet
+wb = StreamingWorkbook()  # Data sheets are streamed at save time
 
 # Sheet 1: Dashboard Summary
 ws_summary = wb.create_sheet("Summary")
@@ -83,11 +115,8 @@ for i, (metric, value) in enumerate(metrics, 5):
     ws_summary[f'A{i}'].font = Font(bold=True)
 
 # Sheet 2: Raw Data
-ws_data = wb.create_sheet("Raw Data")
 data_cols = ['ip_number', 'diagnosis', 'department', 'age', 'gender', 'admission_date']
-for r, row in enumerate(dataframe_to_rows(add_df[data_cols], index=False), 1):
-    for c, value in enumerate(row, 1):
-        ws_data.cell(row=r, column=c, value=value)
+wb.add_dataframe_sheet("Raw Data", add_df[data_cols])
 
 # Sheet 3: Statistics
 ws_stats = wb.create_sheet("Statistics")
@@ -175,60 +204,36 @@ for r, row in enumerate(dataframe_to_rows(dept_data, index=False), 11):
     for c, value in enumerate(row, 1):
         ws_charts.cell(row=r, column=c, value=value)
 
+# Sheet 5: Outbreak Alerts (EARS C1/C2/C3 and CUSUM on daily ADD admissions per department)
+ws_alerts = wb.create_sheet("Outbreak Alerts")
+ws_alerts['A1'] = "ADD Outbreak Alerts (EARS C1/C2/C3, CUSUM)"
+ws_alerts['A1'].font = Font(size=14, bold=True)
+alerts = alert_table(add_outbreaks).drop(columns='cohort')
+alerts['date'] = alerts['date'].dt.strftime('%Y-%m-%d')
+alerts = alerts.astype(object).where(alerts.notna(), None)
+if len(alerts) > 0:
+    for r, row in enumerate(dataframe_to_rows(alerts, index=False), 2):
+        for c, value in enumerate(row, 1):
+            ws_alerts.cell(row=r, column=c, value=value)
+else:
+    ws_alerts['A2'] = "No alerts in the study period"
+
 # Save workbook
 wb.save('ADD_Dashboard.xlsx')
 print("ADD Dashboard Excel file created successfully!")
 
 # Create charts
-plt.style.use('default')
-sns.set_palette("husl")
-
-# Age distribution
-plt.figure(figsize=(10, 6))
-plt.hist(add_df['age'].dropna(), bins=15, edgecolor='black', alpha=0.7, color='skyblue')
-plt.xlabel('Age (years)')
-plt.ylabel('Number of ADD Cases')
-plt.title('Age Distribution of Acute Diarrheal Disease Cases')
-plt.grid(True, alpha=0.3)
-plt.axvline(add_df['age'].mean(), color='red', linestyle='--', linewidth=2,
-           label=f'Mean: {add_df["age"].mean():.1f} years')
-plt.legend()
-plt.tight_layout()
-plt.savefig('add_age_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# Gender pie chart
-plt.figure(figsize=(8, 8))
-gender_counts = add_df['gender'].value_counts()
-colors = ['lightblue', 'lightcoral']
-explode = (0.05, 0)
-
-plt.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
-        colors=colors, explode=explode, shadow=True, startangle=90)
-plt.title('Gender Distribution in ADD Cases', fontsize=14, fontweight='bold')
-plt.axis('equal')
-plt.tight_layout()
-plt.savefig('add_gender_pie.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# Age group bar chart
+jobs = [
+    figure_job('add_age_distribution.png', draw_age_distribution, add_df['age'].dropna()),
+    figure_job('add_gender_pie.png', draw_gender_pie, add_df['gender'].value_counts(), figsize=(8, 8)),
+]
 if len(add_df) > 0:
-    plt.figure(figsize=(10, 6))
-    age_group_counts = add_df['age_group'].value_counts().sort_index()
-    bars = plt.bar(range(len(age_group_counts)), age_group_counts.values, color='orange', edgecolor='black', alpha=0.8)
-    plt.xticks(range(len(age_group_counts)), age_group_counts.index, rotation=45)
-    plt.xlabel('Age Group')
-    plt.ylabel('Number of Cases')
-    plt.title('ADD Cases by Age Group')
-    plt.grid(True, alpha=0.3)
-
-    for bar, count in zip(bars, age_group_counts.values):
-        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.5,
-                 f'{int(count)}', ha='center', va='bottom', fontweight='bold')
-
-    plt.tight_layout()
-    plt.savefig('add_age_groups.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    jobs.append(figure_job('add_age_groups.png', draw_age_groups, add_df['age_group'].value_counts().sort_index()))
+# Daily ADD admissions per department with outbreak alerts
+jobs.append(figure_job('add_daily_alerts.png',
+                       partial(draw_alert_overlay, title='Daily ADD Admissions by Department with Outbreak Alerts'),
+                       add_outbreaks, figsize=(12, 6)))
+render_figures(jobs, setup=apply_style)
 
 print("ADD dashboard and charts created successfully!")
 print("Files created:")
@@ -236,3 +241,4 @@ print("- ADD_Dashboard.xlsx")
 print("- add_age_distribution.png")
 print("- add_gender_pie.png")
 print("- add_age_groups.png")
+print("- add_daily_alerts.png")
@@ -1,82 +1,139 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from openpyxl import Workbook
 from openpyxl.styles import Font
 from openpyxl.utils.dataframe import dataframe_to_rows
-from datetime import datetime
+from cohorts import match_cohorts
+from excel_writer import StreamingWorkbook
+from figure_jobs import figure_job, render_figures
+from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex
+from ipd_cube import build_cube, rollup, los_histogram, los_table
+from instrumentation import StageTrace
+from binning import bin_codes, bin_labels
+from patient_index import EPISODE_COLUMNS, patient_episodes, readmission_table
 import warnings
 warnings.filterwarnings('ignore')
 
+
+def apply_style():
+    warnings.filterwarnings('ignore')
+    plt.style.use('default')
+    sns.set_palette("husl")
+
+
+# Chart renderers: each draws one figure from pre-aggregated data
+
+def draw_los_distribution(los):
+    plt.hist(los, bins=20, edgecolor='black', alpha=0.7, color='orange')
+    plt.xlabel('Length of Stay (days)')
+    plt.ylabel('Number of ADD Patients')
+    plt.title('Distribution of Length of Stay - Acute Diarrheal Disease Cases', fontsize=14, fontweight='bold')
+    plt.grid(True, alpha=0.3)
+    plt.axvline(los.mean(), color='red', linestyle='--', linewidth=2,
+               label=f'Mean: {los.mean():.1f} days')
+    plt.axvline(los.median(), color='green', linestyle='--', linewidth=2,
+               label=f'Median: {los.median():.1f} days')
+    plt.legend()
+
+
+def draw_los_by_age_group(age_los_means):
+    bars = plt.bar(range(len(age_los_means)), age_los_means.values, color='lightcoral', edgecolor='black', alpha=0.8)
+    plt.xticks(range(len(age_los_means)), age_los_means.index, rotation=45)
+    plt.xlabel('Age Group')
+    plt.ylabel('Average Length of Stay (days)')
+    plt.title('Average LOS by Age Group - ADD Cases')
+    plt.grid(True, alpha=0.3)
+
+    for bar, value in zip(bars, age_los_means.values):
+        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.1,
+                 f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
+
+
+def draw_los_by_gender(gender_los_means):
+    bars = plt.bar(gender_los_means.index, gender_los_means.values, color=['lightblue', 'lightpink'], edgecolor='black', alpha=0.8)
+    plt.xlabel('Gender')
+    plt.ylabel('Average Length of Stay (days)')
+    plt.title('Average LOS by Gender - ADD Cases')
+    plt.grid(True, alpha=0.3)
+
+    for bar, value in zip(bars, gender_los_means.values):
+        plt.text(bar.get_x(), bar.get_height() + 0.1,
+                 f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
+
+
+def draw_los_categories(los_cat_counts):
+    colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99','#c2c2f0','#ffb3e6']
+    explode = [0.05] * len(los_cat_counts)
+
+    plt.pie(los_cat_counts.values, labels=los_cat_counts.index, autopct='%1.1f%%',
+            colors=colors[:len(los_cat_counts)], explode=explode, shadow=True, startangle=90)
+    plt.title('ADD Cases - Length of Stay Distribution by Category', fontsize=14, fontweight='bold')
+    plt.axis('equal')
+
+trace = StageTrace('create_add_los_dashboard')
+
 print("Creating ADD-specific Length of Stay (LOS) dashboard...")
 
+trace.begin('load')
 # Load and prepare data
-df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+df = load_ipd_data()
 
+trace.end(rows=len(df))
+trace.begin('derive', rows=len(df))
 # Extract admission date from IP Number
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
-
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
-df['admission_time_only'] = pd.to_datetime(df['admission_time'], errors='coerce').dt.time
+df['admission_date'] = decode_ip_dates(df['ip_number'])
 
 # Create admission datetime
-df['admission_datetime'] = pd.to_datetime(df.apply(
-    lambda row: f"{row['admission_date'].strftime('%Y-%m-%d')} {row['admission_time_only']}" if pd.notna(row['admission_date']) and pd.notna(row['admission_time_only']) else None, axis=1
-), errors='coerce')
+df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
 
-df['discharge_time'] = pd.to_datetime(df['discharge_time'], errors='coerce')
+df['discharge_time'] = parse_export_times(df['discharge_time'])
 
 # Calculate LOS (Length of Stay) in days
 df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
 
 # Parse demographics
-df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-df['gender'] = df['a/s'].str.extract(r'/([MF])')
+demographics = parse_age_sex(df['a/s'])
+df['age'] = demographics['age_years']
+df['gender'] = demographics['gender']
 
-# Find ADD cases (Acute Diarrheal Disease)
-add_keywords = ['gastroenteritis', 'gastro', 'diarrhea', 'diarrhoea', 'diarrh', 'dysentery', 'cholera', 'food poisoning', 'add', 'acute ge', 'age', 'diarrhrea', 'loose', 'motion', 'stool', 'bowel', 'enteric', 'dehydration']
-add_cases = []
-for idx, row in df.iterrows():
-    diagnosis = str(row['diagnosis']).lower()
-    if any(keyword in diagnosis for keyword in add_keywords):
-        add_cases.append(idx)
+# Bin codes for every registered age/LOS scheme, one searchsorted pass per column
+df = df.join(bin_codes(df))
 
-add_df = df.loc[add_cases].copy() if add_cases else pd.DataFrame()
+# Create age groups
+df['age_group'] = bin_labels(df, 'age_paediatric')
+
+# Create LOS categories
+df['los_category'] = bin_labels(df, 'los')
+df['admission_month'] = df['admission_datetime'].dt.to_period('M')
+
+trace.begin('link', rows=len(df))
+# Link each patient's admissions by PR Number (episode, days since last discharge, 30-day readmission, bed-days)
+df = df.join(patient_episodes(df))
+unlinked = int(df['episode'].isna().sum())
+if unlinked:
+    print(f"Warning: {unlinked} admissions without a PR Number or admission date are not linked to a patient")
 
+trace.begin('cohort', rows=len(df))
+# Find ADD cases (Acute Diarrheal Disease)
+cohort_masks = match_cohorts(df['diagnosis'])
+add_df = df[cohort_masks['ADD']].copy()
+
+trace.begin('aggregate', rows=len(df))
 # Filter out invalid LOS values (negative or extremely high)
 valid_add_los_df = add_df[(add_df['length_of_stay'] >= 0) & (add_df['length_of_stay'] <= 365)].copy()
 
+# Pre-aggregate counts and LOS moments once; the tables below are roll-ups of the ADD slice
+cube = build_cube(df, cohort_masks[['ADD']], los_range=(0, 365))
+add_los_summary = rollup(cube, cohort='ADD').iloc[0]
+
 print(f"ADD cases found: {len(add_df)}")
-print(f"ADD cases with valid LOS: {len(valid_add_los_df)}")
-print(f"ADD Mean LOS: {valid_add_los_df['length_of_stay'].mean():.1f} days")
+print(f"ADD cases with valid LOS: {int(add_los_summary['count'])}")
+print(f"ADD Mean LOS: {add_los_summary['mean']:.1f} days")
 print(f"ADD Median LOS: {valid_add_los_df['length_of_stay'].median():.1f} days")
 
-# Create age groups
-age_bins = [0, 5, 18, 35, 50, 65, 100]
-age_labels = ['0-4', '5-17', '18-34', '35-49', '50-64', '65+']
-valid_add_los_df['age_group'] = pd.cut(valid_add_los_df['age'], bins=age_bins, labels=age_labels, right=False)
-
-# Create LOS categories
-los_bins = [0, 1, 3, 7, 14, 30, 1000]
-los_labels = ['1 day', '2-3 days', '4-7 days', '8-14 days', '15-30 days', '30+ days']
-valid_add_los_df['los_category'] = pd.cut(valid_add_los_df['length_of_stay'], bins=los_bins, labels=los_labels, right=False)
-
+trace.begin('write')
 # Create Excel workbook
-wb = Workbook()
-wb.remove(wb.active)  # Remove default sheet
+wb = StreamingWorkbook()  # Data sheets are streamed at save time
 
 # Sheet 1: Dashboard Summary
 ws_summary = wb.create_sheet("Summary")
@@ -91,11 +148,11 @@ ws_summary['A3'].font = Font(size=14, bold=True)
 
 metrics = [
     ["Total ADD Cases", len(add_df)],
-    ["ADD Cases with Valid LOS", len(valid_add_los_df)],
-    ["Mean Length of Stay", f"{valid_add_los_df['length_of_stay'].mean():.1f} days"],
+    ["ADD Cases with Valid LOS", int(add_los_summary['count'])],
+    ["Mean Length of Stay", f"{add_los_summary['mean']:.1f} days"],
     ["Median Length of Stay", f"{valid_add_los_df['length_of_stay'].median():.1f} days"],
-    ["Min LOS", f"{valid_add_los_df['length_of_stay'].min():.1f} days"],
-    ["Max LOS", f"{valid_add_los_df['length_of_stay'].max():.1f} days"],
+    ["Min LOS", f"{add_los_summary['min']:.1f} days"],
+    ["Max LOS", f"{add_los_summary['max']:.1f} days"],
     ["Date Range", "Aug 1 - Nov 12, 2025"],
 ]
 
@@ -108,18 +165,15 @@ for i, (metric, value) in enumerate(metrics, 5):
 ws_summary['A15'] = "LOS Distribution by Category"
 ws_summary['A15'].font = Font(size=14, bold=True)
 
-los_dist = valid_add_los_df['los_category'].value_counts().sort_index()
+los_dist = los_histogram(cube, 'ADD')
 for i, (category, count) in enumerate(los_dist.items(), 16):
     ws_summary[f'A{i}'] = str(category)
     ws_summary[f'B{i}'] = count
-    ws_summary[f'C{i}'] = f"{count/len(valid_add_los_df)*100:.1f}%"
+    ws_summary[f'C{i}'] = f"{count/add_los_summary['count']*100:.1f}%"
 
 # Sheet 2: Raw Data with LOS
-ws_data = wb.create_sheet("Raw Data")
-data_cols = ['ip_number', 'diagnosis', 'department', 'age', 'gender', 'admission_datetime', 'discharge_time', 'length_of_stay', 'los_category']
-for r, row in enumerate(dataframe_to_rows(valid_add_los_df[data_cols], index=False), 1):
-    for c, value in enumerate(row, 1):
-        ws_data.cell(row=r, column=c, value=value)
+data_cols = ['ip_number', 'diagnosis', 'department', 'age', 'gender', 'admission_datetime', 'discharge_time', 'length_of_stay', 'los_category'] + EPISODE_COLUMNS
+wb.add_dataframe_sheet("Raw Data", valid_add_los_df[data_cols])
 
 # Sheet 3: LOS Statistics
 ws_stats = wb.create_sheet("LOS Statistics")
@@ -129,14 +183,14 @@ ws_stats['A1'] = "ADD Cases - Length of Stay Statistics"
 ws_stats['A1'].font = Font(size=14, bold=True)
 
 los_stats = [
-    ["Mean LOS", valid_add_los_df['length_of_stay'].mean()],
+    ["Mean LOS", add_los_summary['mean']],
     ["Median LOS", valid_add_los_df['length_of_stay'].median()],
-    ["Std Deviation", valid_add_los_df['length_of_stay'].std()],
-    ["Min LOS", valid_add_los_df['length_of_stay'].min()],
+    ["Std Deviation", add_los_summary['std']],
+    ["Min LOS", add_los_summary['min']],
     ["25th Percentile", valid_add_los_df['length_of_stay'].quantile(0.25)],
     ["75th Percentile", valid_add_los_df['length_of_stay'].quantile(0.75)],
-    ["Max LOS", valid_add_los_df['length_of_stay'].max()],
-    ["Count", len(valid_add_los_df['length_of_stay'].dropna())],
+    ["Max LOS", add_los_summary['max']],
+    ["Count", int(add_los_summary['count'])],
 ]
 
 for i, (stat, value) in enumerate(los_stats, 2):
@@ -147,7 +201,7 @@ for i, (stat, value) in enumerate(los_stats, 2):
 ws_stats['D1'] = "LOS by Age Group"
 ws_stats['D1'].font = Font(size=14, bold=True)
 
-age_los = valid_add_los_df.groupby('age_group')['length_of_stay'].agg(['mean', 'median', 'count']).round(1)
+age_los = los_table(cube, valid_add_los_df, 'age_group', 'ADD')
 for i, (age_group, stats) in enumerate(age_los.iterrows(), 2):
     ws_stats[f'D{i}'] = str(age_group)
     ws_stats[f'E{i}'] = stats['mean']
@@ -158,7 +212,7 @@ for i, (age_group, stats) in enumerate(age_los.iterrows(), 2):
 ws_stats['I1'] = "LOS by Gender"
 ws_stats['I1'].font = Font(size=14, bold=True)
 
-gender_los = valid_add_los_df.groupby('gender')['length_of_stay'].agg(['mean', 'median', 'count']).round(1)
+gender_los = los_table(cube, valid_add_los_df, 'gender', 'ADD')
 for i, (gender, stats) in enumerate(gender_los.iterrows(), 2):
     ws_stats[f'I{i}'] = gender
     ws_stats[f'J{i}'] = stats['mean']
@@ -169,7 +223,7 @@ for i, (gender, stats) in enumerate(gender_los.iterrows(), 2):
 ws_stats['A15'] = "LOS by Department"
 ws_stats['A15'].font = Font(size=14, bold=True)
 
-dept_los = valid_add_los_df.groupby('department')['length_of_stay'].agg(['mean', 'median', 'count']).round(1).sort_values('mean', ascending=False)
+dept_los = los_table(cube, valid_add_los_df, 'department', 'ADD').sort_values('mean', ascending=False)
 for i, (dept, stats) in enumerate(dept_los.iterrows(), 16):
     ws_stats[f'A{i}'] = dept[:30] + "..." if len(str(dept)) > 30 else str(dept)
     ws_stats[f'B{i}'] = stats['mean']
@@ -181,7 +235,7 @@ ws_charts = wb.create_sheet("Charts Data")
 
 # LOS distribution data
 ws_charts['A1'] = "LOS Distribution by Category"
-los_cat_data = valid_add_los_df['los_category'].value_counts().sort_index().reset_index()
+los_cat_data = los_histogram(cube, 'ADD').reset_index()
 los_cat_data.columns = ['LOS Category', 'Count']
 for r, row in enumerate(dataframe_to_rows(los_cat_data, index=False), 2):
     for c, value in enumerate(row, 1):
@@ -189,7 +243,7 @@ for r, row in enumerate(dataframe_to_rows(los_cat_data, index=False), 2):
 
 # Age group LOS data
 ws_charts['A15'] = "LOS by Age Group"
-age_los_data = valid_add_los_df.groupby('age_group')['length_of_stay'].mean().reset_index()
+age_los_data = rollup(cube, 'age_group', 'ADD')['mean'].reset_index()
 age_los_data.columns = ['Age Group', 'Mean LOS']
 for r, row in enumerate(dataframe_to_rows(age_los_data, index=False), 16):
     for c, value in enumerate(row, 1):
@@ -197,84 +251,35 @@ for r, row in enumerate(dataframe_to_rows(age_los_data, index=False), 16):
 
 # Department LOS data (top 10)
 ws_charts['A25'] = "LOS by Department (Top 10)"
-dept_los_data = valid_add_los_df.groupby('department')['length_of_stay'].mean().sort_values(ascending=False).head(10).reset_index()
+dept_los_data = rollup(cube, 'department', 'ADD')['mean'].sort_values(ascending=False).head(10).reset_index()
 dept_los_data.columns = ['Department', 'Mean LOS']
 for r, row in enumerate(dataframe_to_rows(dept_los_data, index=False), 26):
     for c, value in enumerate(row, 1):
         ws_charts.cell(row=r, column=c, value=value)
 
+# Sheet 5: Readmissions (episodes linked by PR Number)
+ws_readmit = wb.create_sheet("Readmissions")
+ws_readmit['A1'] = "30-Day Readmissions among ADD Admissions"
+ws_readmit['A1'].font = Font(size=14, bold=True)
+readmissions = readmission_table(add_df).rename_axis('Department').reset_index()
+readmissions = readmissions.astype(object).where(readmissions.notna(), None)
+for r, row in enumerate(dataframe_to_rows(readmissions, index=False), 2):
+    for c, value in enumerate(row, 1):
+        ws_readmit.cell(row=r, column=c, value=value)
+
 # Save workbook
 wb.save('ADD_LOS_Analysis_Dashboard.xlsx')
 print("ADD LOS Dashboard Excel file created successfully!")
 
+trace.begin('render')
 # Create charts
-plt.style.use('default')
-sns.set_palette("husl")
-
-# ADD LOS distribution histogram
-plt.figure(figsize=(12, 8))
-plt.hist(valid_add_los_df['length_of_stay'], bins=20, edgecolor='black', alpha=0.7, color='orange')
-plt.xlabel('Length of Stay (days)')
-plt.ylabel('Number of ADD Patients')
-plt.title('Distribution of Length of Stay - Acute Diarrheal Disease Cases', fontsize=14, fontweight='bold')
-plt.grid(True, alpha=0.3)
-plt.axvline(valid_add_los_df['length_of_stay'].mean(), color='red', linestyle='--', linewidth=2,
-           label=f'Mean: {valid_add_los_df["length_of_stay"].mean():.1f} days')
-plt.axvline(valid_add_los_df['length_of_stay'].median(), color='green', linestyle='--', linewidth=2,
-           label=f'Median: {valid_add_los_df["length_of_stay"].median():.1f} days')
-plt.legend()
-plt.tight_layout()
-plt.savefig('add_los_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ADD LOS by age group
-plt.figure(figsize=(10, 6))
-age_los_means = valid_add_los_df.groupby('age_group')['length_of_stay'].mean().sort_index()
-bars = plt.bar(range(len(age_los_means)), age_los_means.values, color='lightcoral', edgecolor='black', alpha=0.8)
-plt.xticks(range(len(age_los_means)), age_los_means.index, rotation=45)
-plt.xlabel('Age Group')
-plt.ylabel('Average Length of Stay (days)')
-plt.title('Average LOS by Age Group - ADD Cases')
-plt.grid(True, alpha=0.3)
-
-for bar, value in zip(bars, age_los_means.values):
-    plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.1,
-             f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('add_los_by_age_group.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ADD LOS by gender
-plt.figure(figsize=(8, 6))
-gender_los_means = valid_add_los_df.groupby('gender')['length_of_stay'].mean()
-bars = plt.bar(gender_los_means.index, gender_los_means.values, color=['lightblue', 'lightpink'], edgecolor='black', alpha=0.8)
-plt.xlabel('Gender')
-plt.ylabel('Average Length of Stay (days)')
-plt.title('Average LOS by Gender - ADD Cases')
-plt.grid(True, alpha=0.3)
-
-for bar, value in zip(bars, gender_los_means.values):
-    plt.text(bar.get_x(), bar.get_height() + 0.1,
-             f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('add_los_by_gender.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# ADD LOS categories pie chart
-plt.figure(figsize=(10, 8))
-los_cat_counts = valid_add_los_df['los_category'].value_counts()
-colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99','#c2c2f0','#ffb3e6']
-explode = [0.05] * len(los_cat_counts)
-
-plt.pie(los_cat_counts.values, labels=los_cat_counts.index, autopct='%1.1f%%',
-        colors=colors[:len(los_cat_counts)], explode=explode, shadow=True, startangle=90)
-plt.title('ADD Cases - Length of Stay Distribution by Category', fontsize=14, fontweight='bold')
-plt.axis('equal')
-plt.tight_layout()
-plt.savefig('add_los_categories_pie.png', dpi=300, bbox_inches='tight')
-plt.close()
+render_figures([
+    figure_job('add_los_distribution.png', draw_los_distribution, valid_add_los_df['length_of_stay'], figsize=(12, 8)),
+    figure_job('add_los_by_age_group.png', draw_los_by_age_group, rollup(cube, 'age_group', 'ADD')['mean']),
+    figure_job('add_los_by_gender.png', draw_los_by_gender, rollup(cube, 'gender', 'ADD')['mean'], figsize=(8, 6)),
+    figure_job('add_los_categories_pie.png', draw_los_categories,
+               los_histogram(cube, 'ADD').sort_values(ascending=False, kind='stable'), figsize=(10, 8)),
+], setup=apply_style)
 
 print("ADD LOS dashboard and charts created successfully!")
 print("Files created:")
@@ -293,10 +298,12 @@ print(".1f")
 print(".1f")
 print(".1f")
 print("- Age group with longest LOS: ", end="")
-max_age_group = valid_add_los_df.groupby('age_group')['length_of_stay'].mean().idxmax()
-max_age_los = valid_add_los_df.groupby('age_group')['length_of_stay'].mean().max()
+max_age_group = rollup(cube, 'age_group', 'ADD')['mean'].idxmax()
+max_age_los = rollup(cube, 'age_group', 'ADD')['mean'].max()
 print(f"{max_age_group} ({max_age_los:.1f} days)")
 print("- Gender with longer LOS: ", end="")
-max_gender = valid_add_los_df.groupby('gender')['length_of_stay'].mean().idxmax()
-max_gender_los = valid_add_los_df.groupby('gender')['length_of_stay'].mean().max()
+max_gender = rollup(cube, 'gender', 'ADD')['mean'].idxmax()
+max_gender_los = rollup(cube, 'gender', 'ADD')['mean'].max()
 print(f"{max_gender} ({max_gender_los:.1f} days)")
+
+trace.finish()
@@ -1,68 +1,126 @@
 import pandas as pd
+from functools import partial
 import matplotlib.pyplot as plt
 import seaborn as sns
-from openpyxl import Workbook
 from openpyxl.styles import Font
 from openpyxl.utils.dataframe import dataframe_to_rows
-from datetime import datetime
+from cohorts import match_cohorts
+from excel_writer import StreamingWorkbook
+from figure_jobs import figure_job, render_figures
+from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex
+from ipd_cube import build_cube, rollup
+from instrumentation import StageTrace
+from binning import bin_codes, bin_labels
+from surveillance import daily_counts, detect_outbreaks, alert_table, draw_alert_overlay
 import warnings
 warnings.filterwarnings('ignore')
 
+
+def apply_style():
+    warnings.filterwarnings('ignore')
+    plt.style.use('default')
+    sns.set_palette("husl")
+
+
+# Chart renderers: each draws one figure from pre-aggregated data
+
+def draw_age_distribution(ages):
+    plt.hist(ages, bins=15, edgecolor='black', alpha=0.7, color='lightcoral')
+    plt.xlabel('Age (years)')
+    plt.ylabel('Number of ARI Cases')
+    plt.title('Age Distribution of Acute Respiratory Infection Cases')
+    plt.grid(True, alpha=0.3)
+    plt.axvline(ages.mean(), color='red', linestyle='--', linewidth=2,
+               label=f'Mean: {ages.mean():.1f} years')
+    plt.legend()
+
+
+def draw_gender_pie(gender_counts):
+    colors = ['lightblue', 'lightpink']
+    explode = (0.05, 0)
+
+    plt.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
+            colors=colors, explode=explode, shadow=True, startangle=90)
+    plt.title('Gender Distribution in ARI Cases', fontsize=14, fontweight='bold')
+    plt.axis('equal')
+
+
+def draw_age_groups(age_group_counts):
+    bars = plt.bar(range(len(age_group_counts)), age_group_counts.values, color='teal', edgecolor='black', alpha=0.8)
+    plt.xticks(range(len(age_group_counts)), age_group_counts.index, rotation=45)
+    plt.xlabel('Age Group')
+    plt.ylabel('Number of Cases')
+    plt.title('ARI Cases by Age Group')
+    plt.grid(True, alpha=0.3)
+
+    for bar, count in zip(bars, age_group_counts.values):
+        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 2,
+                 f'{int(count)}', ha='center', va='bottom', fontweight='bold')
+
+
+def draw_monthly_trends(monthly_counts):
+    plt.plot(range(len(monthly_counts)), monthly_counts.values, marker='o', linewidth=3,
+             markersize=10, color='darkred', markerfacecolor='red', markeredgecolor='darkred')
+    plt.xticks(range(len(monthly_counts)), [str(x) for x in monthly_counts.index], rotation=45)
+    plt.xlabel('Month')
+    plt.ylabel('Number of ARI Cases')
+    plt.title('Monthly Trends of ARI Cases')
+    plt.grid(True, alpha=0.3)
+
+    for i, v in enumerate(monthly_counts.values):
+        plt.text(i, v + 1, str(v), ha='center', va='bottom', fontweight='bold', fontsize=12)
+
+
+trace = StageTrace('create_ari_dashboard')
+
 print("Creating ARI dashboard...")
 
+trace.begin('load')
 # Load and prepare data
-df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+df = load_ipd_data()
 
+trace.end(rows=len(df))
+trace.begin('derive', rows=len(df))
 # Extract admission date
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
-
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
+df['admission_date'] = decode_ip_dates(df['ip_number'])
 
 # Parse demographics
-df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-df['gender'] = df['a/s'].str.extract(r'/([MF])')
+demographics = parse_age_sex(df['a/s'])
+df['age'] = demographics['age_years']
+df['gender'] = demographics['gender']
 
 # Calculate LOS
-df['admission_time_only'] = pd.to_datetime(df['admission_time'], errors='coerce').dt.time
-df['admission_datetime'] = pd.to_datetime(df.apply(
-    lambda row: f"{row['admission_date'].strftime('%Y-%m-%d')} {row['admission_time_only']}" if pd.notna(row['admission_date']) and pd.notna(row['admission_time_only']) else None, axis=1
-), errors='coerce')
-df['discharge_time'] = pd.to_datetime(df['discharge_time'], errors='coerce')
+df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
+df['discharge_time'] = parse_export_times(df['discharge_time'])
 df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
 
+# Bin codes for every registered age/LOS scheme, one searchsorted pass per column
+df = df.join(bin_codes(df))
+
+# Create age groups
+df['age_group'] = bin_labels(df, 'age_paediatric')
+df['admission_month'] = df['admission_datetime'].dt.to_period('M')
+
+trace.begin('cohort', rows=len(df))
 # Find ARI cases (comprehensive search)
-ari_keywords = ['ari', 'arti', 'urti', 'lrti', 'respiratory', 'viral fever', 'fever', 'bronchiolitis', 'pneumonia', 'cough', 'breath', 'lung', 'resp', 'acute febrile', 'febrile illness', 'bronchitis', 'pharyngitis', 'sinusitis', 'otitis', 'tonsillitis', 'viral fever', 'acute febrile illness', 'lower respiratory tract infection', 'upper respiratory tract infection']
-ari_cases = []
-for idx, row in df.iterrows():
-    diagnosis = str(row['diagnosis']).lower()
-    if any(keyword in diagnosis for keyword in ari_keywords):
-        ari_cases.append(idx)
-
-ari_df = df.loc[ari_cases].copy() if ari_cases else pd.DataFrame()
+cohort_masks = match_cohorts(df['diagnosis'])
+ari_df = df[cohort_masks['ARI']].copy()
 print(f"Found {len(ari_df)} ARI cases")
 
-# Create age groups
-if len(ari_df) > 0:
-    age_bins = [0, 5, 18, 35, 50, 65, 100]
-    age_labels = ['0-4', '5-17', '18-34', '35-49', '50-64', '65+']
-    ari_df['age_group'] = pd.cut(ari_df['age'], bins=age_bins, labels=age_labels, right=False)
+trace.begin('aggregate', rows=len(df))
+# Pre-aggregate the ARI slice once; counts and LOS tables below are roll-ups of the cube
+cube = build_cube(df, cohort_masks[['ARI']], los_range=None)
+gender_counts = rollup(cube, 'gender', 'ARI')['admissions']
+male_cases = int(gender_counts.get('M', 0))
+female_cases = int(gender_counts.get('F', 0))
 
+# Daily counts for every cohort x department, screened for outbreaks in one pass
+outbreaks = detect_outbreaks(daily_counts(df, cohort_masks))
+ari_outbreaks = outbreaks[outbreaks['cohort'] == 'ARI']
+
+trace.begin('write')
 # Create Excel workbook
-wb = Workbook()
-wb.remove(wb.active)  # Remove default sheet
+wb = StreamingWorkbook()  # Data sheets are streamed at save time
 
 # Sheet 1: Dashboard Summary
 ws_summary = wb.create_sheet("Summary")
@@ -81,9 +139,9 @@ metrics = [
     ["Date Range", "Aug 1 - Nov 12, 2025"],
     ["Mean Age", f"{ari_df['age'].mean():.1f}"],
     ["Median Age", f"{ari_df['age'].median():.1f}"],
-    ["Male Cases", (ari_df['gender'] == 'M').sum()],
-    ["Female Cases", (ari_df['gender'] == 'F').sum()],
-    ["Average LOS", f"{ari_df['length_of_stay'].mean():.1f}"],
+    ["Male Cases", male_cases],
+    ["Female Cases", female_cases],
+    ["Average LOS", f"{rollup(cube, cohort='ARI')['mean'].iloc[0]:.1f}"],
 ]
 
 for i, (metric, value) in enumerate(metrics, 5):
@@ -92,11 +150,8 @@ for i, (metric, value) in enumerate(metrics, 5):
     ws_summary[f'A{i}'].font = Font(bold=True)
 
 # Sheet 2: Raw Data
-ws_data = wb.create_sheet("Raw Data")
 data_cols = ['ip_number', 'diagnosis', 'department', 'age', 'gender', 'admission_date', 'length_of_stay']
-for r, row in enumerate(dataframe_to_rows(ari_df[data_cols], index=False), 1):
-    for c, value in enumerate(row, 1):
-        ws_data.cell(row=r, column=c, value=value)
+wb.add_dataframe_sheet("Raw Data", ari_df[data_cols])
 
 # Sheet 3: Statistics
 ws_stats = wb.create_sheet("Statistics")
@@ -123,8 +178,8 @@ ws_stats['D1'] = "Gender Distribution"
 ws_stats['D1'].font = Font(size=14, bold=True)
 
 gender_stats = [
-    ["Male", (ari_df['gender'] == 'M').sum(), f"{(ari_df['gender'] == 'M').sum()/len(ari_df)*100:.1f}%"],
-    ["Female", (ari_df['gender'] == 'F').sum(), f"{(ari_df['gender'] == 'F').sum()/len(ari_df)*100:.1f}%"],
+    ["Male", male_cases, f"{male_cases/len(ari_df)*100:.1f}%"],
+    ["Female", female_cases, f"{female_cases/len(ari_df)*100:.1f}%"],
     ["Total", len(ari_df), "100.0%"],
 ]
 
@@ -138,7 +193,7 @@ ws_stats['H1'] = "Age Group Distribution"
 ws_stats['H1'].font = Font(size=14, bold=True)
 
 if len(ari_df) > 0:
-    age_group_stats = ari_df['age_group'].value_counts().sort_index()
+    age_group_stats = rollup(cube, 'age_group', 'ARI')['admissions']
     for i, (group, count) in enumerate(age_group_stats.items(), 2):
         ws_stats[f'H{i}'] = str(group)
         ws_stats[f'I{i}'] = count
@@ -148,7 +203,7 @@ if len(ari_df) > 0:
 ws_stats['A15'] = "Department Distribution"
 ws_stats['A15'].font = Font(size=14, bold=True)
 
-dept_stats = ari_df['department'].value_counts()
+dept_stats = rollup(cube, 'department', 'ARI')['admissions'].sort_values(ascending=False, kind='stable')
 for i, (dept, count) in enumerate(dept_stats.items(), 16):
     ws_stats[f'A{i}'] = dept
     ws_stats[f'B{i}'] = count
@@ -166,8 +221,7 @@ for i, (dx, count) in enumerate(top_dx.items(), 16):
 
 # Monthly trends
 if len(ari_df) > 0:
-    ari_df['admission_month'] = ari_df['admission_datetime'].dt.to_period('M')
-    monthly_stats = ari_df.groupby('admission_month').size()
+    monthly_stats = rollup(cube, 'admission_month', 'ARI')['admissions']
 
     ws_stats['A25'] = "Monthly Trends"
     ws_stats['A25'].font = Font(size=14, bold=True)
@@ -182,7 +236,7 @@ ws_charts = wb.create_sheet("Charts Data")
 # Age group data
 ws_charts['A1'] = "Age Group Distribution"
 if len(ari_df) > 0:
-    age_group_data = ari_df['age_group'].value_counts().sort_index().reset_index()
+    age_group_data = rollup(cube, 'age_group', 'ARI')['admissions'].reset_index()
     age_group_data.columns = ['Age Group', 'Count']
     for r, row in enumerate(dataframe_to_rows(age_group_data, index=False), 2):
         for c, value in enumerate(row, 1):
@@ -190,7 +244,7 @@ if len(ari_df) > 0:
 
 # Department data
 ws_charts['A10'] = "Department Distribution"
-dept_data = ari_df['department'].value_counts().reset_index()
+dept_data = dept_stats.reset_index()
 dept_data.columns = ['Department', 'Count']
 for r, row in enumerate(dataframe_to_rows(dept_data, index=False), 11):
     for c, value in enumerate(row, 1):
@@ -199,86 +253,47 @@ for r, row in enumerate(dataframe_to_rows(dept_data, index=False), 11):
 # Monthly data
 if len(ari_df) > 0:
     ws_charts['A20'] = "Monthly Distribution"
-    monthly_data = ari_df.groupby('admission_month').size().reset_index()
+    monthly_data = monthly_stats.reset_index()
     monthly_data.columns = ['Month', 'Cases']
     monthly_data['Month'] = monthly_data['Month'].astype(str)
     for r, row in enumerate(dataframe_to_rows(monthly_data, index=False), 21):
         for c, value in enumerate(row, 1):
             ws_charts.cell(row=r, column=c, value=value)
 
+# Sheet 5: Outbreak Alerts (EARS C1/C2/C3 and CUSUM on daily ARI admissions per department)
+ws_alerts = wb.create_sheet("Outbreak Alerts")
+ws_alerts['A1'] = "ARI Outbreak Alerts (EARS C1/C2/C3, CUSUM)"
+ws_alerts['A1'].font = Font(size=14, bold=True)
+alerts = alert_table(ari_outbreaks).drop(columns='cohort')
+alerts['date'] = alerts['date'].dt.strftime('%Y-%m-%d')
+alerts = alerts.astype(object).where(alerts.notna(), None)
+if len(alerts) > 0:
+    for r, row in enumerate(dataframe_to_rows(alerts, index=False), 2):
+        for c, value in enumerate(row, 1):
+            ws_alerts.cell(row=r, column=c, value=value)
+else:
+    ws_alerts['A2'] = "No alerts in the study period"
+
 # Save workbook
 wb.save('ARI_Dashboard.xlsx')
 print("ARI Dashboard Excel file created successfully!")
 
+trace.begin('render')
 # Create charts
-plt.style.use('default')
-sns.set_palette("husl")
-
-# Age distribution
-plt.figure(figsize=(10, 6))
-plt.hist(ari_df['age'].dropna(), bins=15, edgecolor='black', alpha=0.7, color='lightcoral')
-plt.xlabel('Age (years)')
-plt.ylabel('Number of ARI Cases')
-plt.title('Age Distribution of Acute Respiratory Infection Cases')
-plt.grid(True, alpha=0.3)
-plt.axvline(ari_df['age'].mean(), color='red', linestyle='--', linewidth=2,
-           label=f'Mean: {ari_df["age"].mean():.1f} years')
-plt.legend()
-plt.tight_layout()
-plt.savefig('ari_age_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# Gender pie chart
-plt.figure(figsize=(8, 8))
-gender_counts = ari_df['gender'].value_counts()
-colors = ['lightblue', 'lightpink']
-explode = (0.05, 0)
-
-plt.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
-        colors=colors, explode=explode, shadow=True, startangle=90)
-plt.title('Gender Distribution in ARI Cases', fontsize=14, fontweight='bold')
-plt.axis('equal')
-plt.tight_layout()
-plt.savefig('ari_gender_pie.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# Age group bar chart
-if len(ari_df) > 0:
-    plt.figure(figsize=(10, 6))
-    age_group_counts = ari_df['age_group'].value_counts().sort_index()
-    bars = plt.bar(range(len(age_group_counts)), age_group_counts.values, color='teal', edgecolor='black', alpha=0.8)
-    plt.xticks(range(len(age_group_counts)), age_group_counts.index, rotation=45)
-    plt.xlabel('Age Group')
-    plt.ylabel('Number of Cases')
-    plt.title('ARI Cases by Age Group')
-    plt.grid(True, alpha=0.3)
-
-    for bar, count in zip(bars, age_group_counts.values):
-        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 2,
-                 f'{int(count)}', ha='center', va='bottom', fontweight='bold')
-
-    plt.tight_layout()
-    plt.savefig('ari_age_groups.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-# Monthly trends
+jobs = [
+    figure_job('ari_age_distribution.png', draw_age_distribution, ari_df['age'].dropna()),
+    figure_job('ari_gender_pie.png', draw_gender_pie, gender_counts.sort_values(ascending=False, kind='stable'), figsize=(8, 8)),
+]
 if len(ari_df) > 0:
-    plt.figure(figsize=(12, 6))
-    monthly_counts = ari_df.groupby('admission_month').size()
-    plt.plot(range(len(monthly_counts)), monthly_counts.values, marker='o', linewidth=3,
-             markersize=10, color='darkred', markerfacecolor='red', markeredgecolor='darkred')
-    plt.xticks(range(len(monthly_counts)), [str(x) for x in monthly_counts.index], rotation=45)
-    plt.xlabel('Month')
-    plt.ylabel('Number of ARI Cases')
-    plt.title('Monthly Trends of ARI Cases')
-    plt.grid(True, alpha=0.3)
-
-    for i, v in enumerate(monthly_counts.values):
-        plt.text(i, v + 1, str(v), ha='center', va='bottom', fontweight='bold', fontsize=12)
-
-    plt.tight_layout()
-    plt.savefig('ari_monthly_trends.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    jobs += [
+        figure_job('ari_age_groups.png', draw_age_groups, age_group_stats),
+        figure_job('ari_monthly_trends.png', draw_monthly_trends, monthly_stats, figsize=(12, 6)),
+    ]
+# Daily ARI admissions per department with outbreak alerts
+jobs.append(figure_job('ari_daily_alerts.png',
+                       partial(draw_alert_overlay, title='Daily ARI Admissions by Department with Outbreak Alerts'),
+                       ari_outbreaks, figsize=(12, 6)))
+render_figures(jobs, setup=apply_style)
 
 print("ARI dashboard and charts created successfully!")
 print("Files created:")
@@ -287,3 +302,6 @@ print("- ari_age_distribution.png")
 print("- ari_gender_pie.png")
 print("- ari_age_groups.png")
 print("- ari_monthly_trends.png")
+print("- ari_daily_alerts.png")
+
+trace.finish()
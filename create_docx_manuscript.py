@@ -4,6 +4,7 @@ from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
 import pandas as pd
 import os
+from docx_tables import add_dataframe_table
 
 # Create a new Word document
 doc = Document()
@@ -61,17 +62,7 @@ doc.add_heading('Table 1: Demographic Characteristics of IPD Patients', 2)
 # Read the CSV and create table
 if os.path.exists('tables/table1_demographics.csv'):
     df_table1 = pd.read_csv('tables/table1_demographics.csv')
-    table = doc.add_table(rows=len(df_table1)+1, cols=len(df_table1.columns))
-    table.style = 'Table Grid'
-
-    # Add headers
-    for i, col in enumerate(df_table1.columns):
-        table.cell(0, i).text = col
-
-    # Add data
-    for i, row in df_table1.iterrows():
-        for j, value in enumerate(row):
-            table.cell(i+1, j).text = str(value)
+    add_dataframe_table(doc, df_table1, bold_header=False)
 
 # Add figure placeholder
 doc.add_paragraph('Figure 1: Age Distribution Histogram - Age distribution histogram showing bimodal pattern with peaks in pediatric and elderly groups')
@@ -82,29 +73,13 @@ doc.add_paragraph('Figure 1: Age Distribution Histogram - Age distribution histo
 doc.add_heading('Table 2: Department-wise Distribution of Admissions', 2)
 if os.path.exists('tables/table2_departments.csv'):
     df_table2 = pd.read_csv('tables/table2_departments.csv')
-    table = doc.add_table(rows=len(df_table2)+1, cols=len(df_table2.columns))
-    table.style = 'Table Grid'
-
-    for i, col in enumerate(df_table2.columns):
-        table.cell(0, i).text = col
-
-    for i, row in df_table2.iterrows():
-        for j, value in enumerate(row):
-            table.cell(i+1, j).text = str(value)
+    add_dataframe_table(doc, df_table2, bold_header=False)
 
 # Table 3: Diagnoses
 doc.add_heading('Table 3: Top 10 Diagnoses in IPD Patients', 2)
 if os.path.exists('tables/table3_diagnoses.csv'):
     df_table3 = pd.read_csv('tables/table3_diagnoses.csv')
-    table = doc.add_table(rows=len(df_table3)+1, cols=len(df_table3.columns))
-    table.style = 'Table Grid'
-
-    for i, col in enumerate(df_table3.columns):
-        table.cell(0, i).text = col
-
-    for i, row in df_table3.iterrows():
-        for j, value in enumerate(row):
-            table.cell(i+1, j).text = str(value)
+    add_dataframe_table(doc, df_table3, bold_header=False)
 
 # Add more tables and content as needed...
 
@@ -1,72 +1,152 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from openpyxl import Workbook
 from openpyxl.styles import Font
 from openpyxl.utils.dataframe import dataframe_to_rows
-from datetime import datetime
+from excel_writer import StreamingWorkbook
+from figure_jobs import figure_job, render_figures
+from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex, parse_ward_bed
+from ipd_cube import build_cube, rollup, los_histogram, los_table
+from instrumentation import StageTrace
+from binning import bin_codes, bin_labels
+from patient_index import EPISODE_COLUMNS, patient_episodes, readmission_table
+from census import census, occupancy_summary, stay_status_counts
 import warnings
 warnings.filterwarnings('ignore')
 
+
+def apply_style():
+    warnings.filterwarnings('ignore')
+    plt.style.use('default')
+    sns.set_palette("husl")
+
+
+# Chart renderers: each draws one figure from pre-aggregated data
+
+def draw_los_distribution(los):
+    plt.hist(los, bins=30, edgecolor='black', alpha=0.7, color='steelblue')
+    plt.xlabel('Length of Stay (days)')
+    plt.ylabel('Number of Patients')
+    plt.title('Distribution of Length of Stay at SIMSRH IPD', fontsize=14, fontweight='bold')
+    plt.grid(True, alpha=0.3)
+    plt.axvline(los.mean(), color='red', linestyle='--', linewidth=2,
+               label=f'Mean: {los.mean():.1f} days')
+    plt.axvline(los.median(), color='green', linestyle='--', linewidth=2,
+               label=f'Median: {los.median():.1f} days')
+    plt.legend()
+
+
+def draw_los_by_age_group(age_los_means):
+    bars = plt.bar(range(len(age_los_means)), age_los_means.values, color='lightcoral', edgecolor='black', alpha=0.8)
+    plt.xticks(range(len(age_los_means)), age_los_means.index, rotation=45)
+    plt.xlabel('Age Group')
+    plt.ylabel('Average Length of Stay (days)')
+    plt.title('Average Length of Stay by Age Group')
+    plt.grid(True, alpha=0.3)
+
+    for bar, value in zip(bars, age_los_means.values):
+        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.1,
+                 f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
+
+
+def draw_los_by_gender(gender_los_means):
+    bars = plt.bar(gender_los_means.index, gender_los_means.values, color=['lightblue', 'lightpink'], edgecolor='black', alpha=0.8)
+    plt.xlabel('Gender')
+    plt.ylabel('Average Length of Stay (days)')
+    plt.title('Average Length of Stay by Gender')
+    plt.grid(True, alpha=0.3)
+
+    for bar, value in zip(bars, gender_los_means.values):
+        plt.text(bar.get_x(), bar.get_height() + 0.1,
+                 f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
+
+
+def draw_los_categories(los_cat_counts):
+    colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99','#c2c2f0','#ffb3e6']
+    explode = [0.05] * len(los_cat_counts)
+
+    plt.pie(los_cat_counts.values, labels=los_cat_counts.index, autopct='%1.1f%%',
+            colors=colors[:len(los_cat_counts)], explode=explode, shadow=True, startangle=90)
+    plt.title('Length of Stay Distribution by Category', fontsize=14, fontweight='bold')
+    plt.axis('equal')
+
+
+def draw_monthly_los_trends(monthly_los_trend):
+    plt.plot(range(len(monthly_los_trend)), monthly_los_trend.values, marker='o', linewidth=3,
+             markersize=10, color='darkgreen', markerfacecolor='green', markeredgecolor='darkgreen')
+    plt.xticks(range(len(monthly_los_trend)), [str(x) for x in monthly_los_trend.index], rotation=45)
+    plt.xlabel('Month')
+    plt.ylabel('Average Length of Stay (days)')
+    plt.title('Monthly Trends in Average Length of Stay')
+    plt.grid(True, alpha=0.3)
+
+    for i, v in enumerate(monthly_los_trend.values):
+        plt.text(i, v + 0.1, f'{v:.1f}', ha='center', va='bottom', fontweight='bold', fontsize=10)
+
+trace = StageTrace('create_los_dashboard')
+
 print("Creating comprehensive Length of Stay (LOS) dashboard...")
 
+trace.begin('load')
 # Load and prepare data
-df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+df = load_ipd_data()
 
+trace.end(rows=len(df))
+trace.begin('derive', rows=len(df))
 # Extract admission date from IP Number
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
-
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
-df['admission_time_only'] = pd.to_datetime(df['admission_time'], errors='coerce').dt.time
+df['admission_date'] = decode_ip_dates(df['ip_number'])
 
 # Create admission datetime
-df['admission_datetime'] = pd.to_datetime(df.apply(
-    lambda row: f"{row['admission_date'].strftime('%Y-%m-%d')} {row['admission_time_only']}" if pd.notna(row['admission_date']) and pd.notna(row['admission_time_only']) else None, axis=1
-), errors='coerce')
+df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
 
-df['discharge_time'] = pd.to_datetime(df['discharge_time'], errors='coerce')
+# An empty Discharge Time means still admitted; one that does not parse is excluded from the census
+df['discharge_missing'] = df['discharge_time'].isna()
+df['discharge_time'] = parse_export_times(df['discharge_time'])
 
 # Calculate LOS (Length of Stay) in days
 df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
 
 # Parse demographics
-df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-df['gender'] = df['a/s'].str.extract(r'/([MF])')
+demographics = parse_age_sex(df['a/s'])
+df['age'] = demographics['age_years']
+df['gender'] = demographics['gender']
+
+# Ward from Ward/Bed for the occupancy census
+df['ward'] = parse_ward_bed(df['ward/bed'])['ward']
+
+# Bin codes for every registered age/LOS scheme, one searchsorted pass per column
+df = df.join(bin_codes(df))
 
 # Create age groups
-age_bins = [0, 5, 18, 35, 50, 65, 100]
-age_labels = ['0-4', '5-17', '18-34', '35-49', '50-64', '65+']
-df['age_group'] = pd.cut(df['age'], bins=age_bins, labels=age_labels, right=False)
+df['age_group'] = bin_labels(df, 'age_paediatric')
 
 # Create LOS categories
-los_bins = [0, 1, 3, 7, 14, 30, 1000]
-los_labels = ['1 day', '2-3 days', '4-7 days', '8-14 days', '15-30 days', '30+ days']
-df['los_category'] = pd.cut(df['length_of_stay'], bins=los_bins, labels=los_labels, right=False)
+df['los_category'] = bin_labels(df, 'los')
+df['admission_month'] = df['admission_datetime'].dt.to_period('M')
 
+trace.begin('link', rows=len(df))
+# Link each patient's admissions by PR Number (episode, days since last discharge, 30-day readmission, bed-days)
+df = df.join(patient_episodes(df))
+unlinked = int(df['episode'].isna().sum())
+if unlinked:
+    print(f"Warning: {unlinked} admissions without a PR Number or admission date are not linked to a patient")
+
+trace.begin('aggregate', rows=len(df))
 # Filter out invalid LOS values (negative or extremely high)
 valid_los_df = df[(df['length_of_stay'] >= 0) & (df['length_of_stay'] <= 365)].copy()
 
+# Pre-aggregate counts and LOS moments once; the tables below are roll-ups of this cube
+cube = build_cube(df, los_range=(0, 365))
+los_summary = rollup(cube).iloc[0]
+
 print(f"Total patients: {len(df)}")
-print(f"Patients with valid LOS: {len(valid_los_df)}")
-print(f"Mean LOS: {valid_los_df['length_of_stay'].mean():.1f} days")
+print(f"Patients with valid LOS: {int(los_summary['count'])}")
+print(f"Mean LOS: {los_summary['mean']:.1f} days")
 print(f"Median LOS: {valid_los_df['length_of_stay'].median():.1f} days")
 
+trace.begin('write')
 # Create Excel workbook
-wb = Workbook()
-wb.remove(wb.active)  # Remove default sheet
+wb = StreamingWorkbook()  # Data sheets are streamed at save time
 
 # Sheet 1: Dashboard Summary
 ws_summary = wb.create_sheet("Summary")
@@ -81,11 +161,11 @@ ws_summary['A3'].font = Font(size=14, bold=True)
 
 metrics = [
     ["Total Patients", len(df)],
-    ["Patients with Valid LOS", len(valid_los_df)],
-    ["Mean Length of Stay", f"{valid_los_df['length_of_stay'].mean():.1f} days"],
+    ["Patients with Valid LOS", int(los_summary['count'])],
+    ["Mean Length of Stay", f"{los_summary['mean']:.1f} days"],
     ["Median Length of Stay", f"{valid_los_df['length_of_stay'].median():.1f} days"],
-    ["Min LOS", f"{valid_los_df['length_of_stay'].min():.1f} days"],
-    ["Max LOS", f"{valid_los_df['length_of_stay'].max():.1f} days"],
+    ["Min LOS", f"{los_summary['min']:.1f} days"],
+    ["Max LOS", f"{los_summary['max']:.1f} days"],
     ["Date Range", "Aug 1 - Nov 12, 2025"],
 ]
 
@@ -98,18 +178,15 @@ for i, (metric, value) in enumerate(metrics, 5):
 ws_summary['A15'] = "LOS Distribution by Category"
 ws_summary['A15'].font = Font(size=14, bold=True)
 
-los_dist = valid_los_df['los_category'].value_counts().sort_index()
+los_dist = los_histogram(cube)
 for i, (category, count) in enumerate(los_dist.items(), 16):
     ws_summary[f'A{i}'] = str(category)
     ws_summary[f'B{i}'] = count
-    ws_summary[f'C{i}'] = f"{count/len(valid_los_df)*100:.1f}%"
+    ws_summary[f'C{i}'] = f"{count/los_summary['count']*100:.1f}%"
 
 # Sheet 2: Raw Data with LOS
-ws_data = wb.create_sheet("Raw Data")
-data_cols = ['ip_number', 'diagnosis', 'department', 'age', 'gender', 'admission_datetime', 'discharge_time', 'length_of_stay', 'los_category']
-for r, row in enumerate(dataframe_to_rows(valid_los_df[data_cols], index=False), 1):
-    for c, value in enumerate(row, 1):
-        ws_data.cell(row=r, column=c, value=value)
+data_cols = ['ip_number', 'diagnosis', 'department', 'age', 'gender', 'admission_datetime', 'discharge_time', 'length_of_stay', 'los_category'] + EPISODE_COLUMNS
+wb.add_dataframe_sheet("Raw Data", valid_los_df[data_cols])
 
 # Sheet 3: LOS Statistics
 ws_stats = wb.create_sheet("LOS Statistics")
@@ -119,14 +196,14 @@ ws_stats['A1'] = "Length of Stay Statistics"
 ws_stats['A1'].font = Font(size=14, bold=True)
 
 los_stats = [
-    ["Mean LOS", valid_los_df['length_of_stay'].mean()],
+    ["Mean LOS", los_summary['mean']],
     ["Median LOS", valid_los_df['length_of_stay'].median()],
-    ["Std Deviation", valid_los_df['length_of_stay'].std()],
-    ["Min LOS", valid_los_df['length_of_stay'].min()],
+    ["Std Deviation", los_summary['std']],
+    ["Min LOS", los_summary['min']],
     ["25th Percentile", valid_los_df['length_of_stay'].quantile(0.25)],
     ["75th Percentile", valid_los_df['length_of_stay'].quantile(0.75)],
-    ["Max LOS", valid_los_df['length_of_stay'].max()],
-    ["Count", len(valid_los_df['length_of_stay'].dropna())],
+    ["Max LOS", los_summary['max']],
+    ["Count", int(los_summary['count'])],
 ]
 
 for i, (stat, value) in enumerate(los_stats, 2):
@@ -137,7 +214,7 @@ for i, (stat, value) in enumerate(los_stats, 2):
 ws_stats['D1'] = "LOS by Age Group"
 ws_stats['D1'].font = Font(size=14, bold=True)
 
-age_los = valid_los_df.groupby('age_group')['length_of_stay'].agg(['mean', 'median', 'count']).round(1)
+age_los = los_table(cube, valid_los_df, 'age_group')
 for i, (age_group, stats) in enumerate(age_los.iterrows(), 2):
     ws_stats[f'D{i}'] = str(age_group)
     ws_stats[f'E{i}'] = stats['mean']
@@ -148,7 +225,7 @@ for i, (age_group, stats) in enumerate(age_los.iterrows(), 2):
 ws_stats['I1'] = "LOS by Gender"
 ws_stats['I1'].font = Font(size=14, bold=True)
 
-gender_los = valid_los_df.groupby('gender')['length_of_stay'].agg(['mean', 'median', 'count']).round(1)
+gender_los = los_table(cube, valid_los_df, 'gender')
 for i, (gender, stats) in enumerate(gender_los.iterrows(), 2):
     ws_stats[f'I{i}'] = gender
     ws_stats[f'J{i}'] = stats['mean']
@@ -159,7 +236,7 @@ for i, (gender, stats) in enumerate(gender_los.iterrows(), 2):
 ws_stats['A15'] = "LOS by Department"
 ws_stats['A15'].font = Font(size=14, bold=True)
 
-dept_los = valid_los_df.groupby('department')['length_of_stay'].agg(['mean', 'median', 'count']).round(1).sort_values('mean', ascending=False)
+dept_los = los_table(cube, valid_los_df, 'department').sort_values('mean', ascending=False)
 for i, (dept, stats) in enumerate(dept_los.iterrows(), 16):
     ws_stats[f'A{i}'] = dept[:30] + "..." if len(str(dept)) > 30 else str(dept)
     ws_stats[f'B{i}'] = stats['mean']
@@ -171,7 +248,7 @@ ws_charts = wb.create_sheet("Charts Data")
 
 # LOS distribution data
 ws_charts['A1'] = "LOS Distribution by Category"
-los_cat_data = valid_los_df['los_category'].value_counts().sort_index().reset_index()
+los_cat_data = los_histogram(cube).reset_index()
 los_cat_data.columns = ['LOS Category', 'Count']
 for r, row in enumerate(dataframe_to_rows(los_cat_data, index=False), 2):
     for c, value in enumerate(row, 1):
@@ -179,7 +256,7 @@ for r, row in enumerate(dataframe_to_rows(los_cat_data, index=False), 2):
 
 # Age group LOS data
 ws_charts['A15'] = "LOS by Age Group"
-age_los_data = valid_los_df.groupby('age_group')['length_of_stay'].mean().reset_index()
+age_los_data = rollup(cube, 'age_group')['mean'].reset_index()
 age_los_data.columns = ['Age Group', 'Mean LOS']
 for r, row in enumerate(dataframe_to_rows(age_los_data, index=False), 16):
     for c, value in enumerate(row, 1):
@@ -187,7 +264,7 @@ for r, row in enumerate(dataframe_to_rows(age_los_data, index=False), 16):
 
 # Department LOS data (top 10)
 ws_charts['A25'] = "LOS by Department (Top 10)"
-dept_los_data = valid_los_df.groupby('department')['length_of_stay'].mean().sort_values(ascending=False).head(10).reset_index()
+dept_los_data = rollup(cube, 'department')['mean'].sort_values(ascending=False).head(10).reset_index()
 dept_los_data.columns = ['Department', 'Mean LOS']
 for r, row in enumerate(dataframe_to_rows(dept_los_data, index=False), 26):
     for c, value in enumerate(row, 1):
@@ -195,8 +272,7 @@ for r, row in enumerate(dataframe_to_rows(dept_los_data, index=False), 26):
 
 # Monthly LOS trends
 if len(valid_los_df) > 0:
-    valid_los_df['admission_month'] = valid_los_df['admission_datetime'].dt.to_period('M')
-    monthly_los = valid_los_df.groupby('admission_month')['length_of_stay'].mean().reset_index()
+    monthly_los = rollup(cube, 'admission_month')['mean'].reset_index()
     monthly_los.columns = ['Month', 'Mean LOS']
     monthly_los['Month'] = monthly_los['Month'].astype(str)
 
@@ -205,97 +281,71 @@ if len(valid_los_df) > 0:
         for c, value in enumerate(row, 1):
             ws_charts.cell(row=r, column=c, value=value)
 
+# Sheet 5: Bed Occupancy (midnight census; stays without a discharge time count as still admitted)
+ws_beds = wb.create_sheet("Bed Occupancy")
+ward_census = census(df, 'ward')
+dept_census = census(df, 'department')
+stay_counts = stay_status_counts(df)
+print(f"Census stays: {stay_counts['closed']} discharged, {stay_counts['open']} still admitted, "
+      f"{stay_counts.iloc[2:].sum()} excluded")
+
+for col, title, occupancy in [('A', "Midnight Census by Ward", ward_census), ('H', "Midnight Census by Department", dept_census)]:
+    ws_beds[f'{col}1'] = title
+    ws_beds[f'{col}1'].font = Font(size=14, bold=True)
+    summary = occupancy_summary(occupancy).sort_values('peak_occupancy', ascending=False, kind='stable')
+    summary['peak_time'] = summary['peak_time'].dt.strftime('%Y-%m-%d')
+    summary = summary.reset_index()
+    summary.columns = ['Ward' if col == 'A' else 'Department', 'Mean', 'Median', 'Peak', 'Peak Date']
+    for r, row in enumerate(dataframe_to_rows(summary, index=False), 2):
+        for c, value in enumerate(row, ord(col) - ord('A') + 1):
+            ws_beds.cell(row=r, column=c, value=value)
+
+# Stays counted in (and left out of) the census
+ws_beds['O1'] = "Stays in Census"
+ws_beds['O1'].font = Font(size=14, bold=True)
+stay_labels = {
+    'closed': "Discharged",
+    'open': "Still admitted (no discharge time)",
+    'no_admission': "Excluded: no admission time",
+    'discharge_unparseable': "Excluded: unreadable discharge time",
+    'discharge_before_admission': "Excluded: discharge before admission",
+}
+for r, (status, count) in enumerate(stay_counts.items(), 2):
+    ws_beds.cell(row=r, column=15, value=stay_labels[status])
+    ws_beds.cell(row=r, column=16, value=int(count))
+
+# Sheets 6-7: census time series (daily per department and ward, hourly per department)
+daily_census = pd.concat([dept_census, ward_census], axis=1)
+wb.add_dataframe_sheet("Daily Census", daily_census.reset_index())
+wb.add_dataframe_sheet("Hourly Census", census(df, 'department', freq='h').reset_index())
+
+# Sheet 8: Readmissions (episodes linked by PR Number)
+ws_readmit = wb.create_sheet("Readmissions")
+ws_readmit['A1'] = "30-Day Readmissions by Department"
+ws_readmit['A1'].font = Font(size=14, bold=True)
+readmissions = readmission_table(df).rename_axis('Department').reset_index()
+readmissions = readmissions.astype(object).where(readmissions.notna(), None)
+for r, row in enumerate(dataframe_to_rows(readmissions, index=False), 2):
+    for c, value in enumerate(row, 1):
+        ws_readmit.cell(row=r, column=c, value=value)
+
 # Save workbook
 wb.save('LOS_Analysis_Dashboard.xlsx')
 print("LOS Dashboard Excel file created successfully!")
 
+trace.begin('render')
 # Create charts
-plt.style.use('default')
-sns.set_palette("husl")
-
-# LOS distribution histogram
-plt.figure(figsize=(12, 8))
-plt.hist(valid_los_df['length_of_stay'], bins=30, edgecolor='black', alpha=0.7, color='steelblue')
-plt.xlabel('Length of Stay (days)')
-plt.ylabel('Number of Patients')
-plt.title('Distribution of Length of Stay at SIMSRH IPD', fontsize=14, fontweight='bold')
-plt.grid(True, alpha=0.3)
-plt.axvline(valid_los_df['length_of_stay'].mean(), color='red', linestyle='--', linewidth=2,
-           label=f'Mean: {valid_los_df["length_of_stay"].mean():.1f} days')
-plt.axvline(valid_los_df['length_of_stay'].median(), color='green', linestyle='--', linewidth=2,
-           label=f'Median: {valid_los_df["length_of_stay"].median():.1f} days')
-plt.legend()
-plt.tight_layout()
-plt.savefig('los_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# LOS by age group
-plt.figure(figsize=(10, 6))
-age_los_means = valid_los_df.groupby('age_group')['length_of_stay'].mean().sort_index()
-bars = plt.bar(range(len(age_los_means)), age_los_means.values, color='lightcoral', edgecolor='black', alpha=0.8)
-plt.xticks(range(len(age_los_means)), age_los_means.index, rotation=45)
-plt.xlabel('Age Group')
-plt.ylabel('Average Length of Stay (days)')
-plt.title('Average Length of Stay by Age Group')
-plt.grid(True, alpha=0.3)
-
-for bar, value in zip(bars, age_los_means.values):
-    plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.1,
-             f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('los_by_age_group.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# LOS by gender
-plt.figure(figsize=(8, 6))
-gender_los_means = valid_los_df.groupby('gender')['length_of_stay'].mean()
-bars = plt.bar(gender_los_means.index, gender_los_means.values, color=['lightblue', 'lightpink'], edgecolor='black', alpha=0.8)
-plt.xlabel('Gender')
-plt.ylabel('Average Length of Stay (days)')
-plt.title('Average Length of Stay by Gender')
-plt.grid(True, alpha=0.3)
-
-for bar, value in zip(bars, gender_los_means.values):
-    plt.text(bar.get_x(), bar.get_height() + 0.1,
-             f'{value:.1f}', ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('los_by_gender.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# LOS categories pie chart
-plt.figure(figsize=(10, 8))
-los_cat_counts = valid_los_df['los_category'].value_counts()
-colors = ['#ff9999','#66b3ff','#99ff99','#ffcc99','#c2c2f0','#ffb3e6']
-explode = [0.05] * len(los_cat_counts)
-
-plt.pie(los_cat_counts.values, labels=los_cat_counts.index, autopct='%1.1f%%',
-        colors=colors[:len(los_cat_counts)], explode=explode, shadow=True, startangle=90)
-plt.title('Length of Stay Distribution by Category', fontsize=14, fontweight='bold')
-plt.axis('equal')
-plt.tight_layout()
-plt.savefig('los_categories_pie.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# Monthly LOS trends
+jobs = [
+    figure_job('los_distribution.png', draw_los_distribution, valid_los_df['length_of_stay'], figsize=(12, 8)),
+    figure_job('los_by_age_group.png', draw_los_by_age_group, rollup(cube, 'age_group')['mean']),
+    figure_job('los_by_gender.png', draw_los_by_gender, rollup(cube, 'gender')['mean'], figsize=(8, 6)),
+    figure_job('los_categories_pie.png', draw_los_categories,
+               los_histogram(cube).sort_values(ascending=False, kind='stable'), figsize=(10, 8)),
+]
 if len(valid_los_df) > 0:
-    plt.figure(figsize=(12, 6))
-    monthly_los_trend = valid_los_df.groupby('admission_month')['length_of_stay'].mean()
-    plt.plot(range(len(monthly_los_trend)), monthly_los_trend.values, marker='o', linewidth=3,
-             markersize=10, color='darkgreen', markerfacecolor='green', markeredgecolor='darkgreen')
-    plt.xticks(range(len(monthly_los_trend)), [str(x) for x in monthly_los_trend.index], rotation=45)
-    plt.xlabel('Month')
-    plt.ylabel('Average Length of Stay (days)')
-    plt.title('Monthly Trends in Average Length of Stay')
-    plt.grid(True, alpha=0.3)
-
-    for i, v in enumerate(monthly_los_trend.values):
-        plt.text(i, v + 0.1, f'{v:.1f}', ha='center', va='bottom', fontweight='bold', fontsize=10)
-
-    plt.tight_layout()
-    plt.savefig('monthly_los_trends.png', dpi=300, bbox_inches='tight')
-    plt.close()
+    jobs.append(figure_job('monthly_los_trends.png', draw_monthly_los_trends,
+                           rollup(cube, 'admission_month')['mean'], figsize=(12, 6)))
+render_figures(jobs, setup=apply_style)
 
 print("LOS dashboard and charts created successfully!")
 print("Files created:")
@@ -305,3 +355,5 @@ print("- los_by_age_group.png")
 print("- los_by_gender.png")
 print("- los_categories_pie.png")
 print("- monthly_los_trends.png")
+
+trace.finish()
@@ -8,6 +8,8 @@ from docx.oxml.ns import nsdecls, qn
 from docx.oxml import parse_xml
 import os
 from datetime import datetime
+from docx_images import add_picture
+from docx_tables import add_rows_table
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -128,14 +130,6 @@ def create_professional_gastroenteritis_docx():
 
     # Add Table 1
     doc.add_paragraph("Overall Study Population Characteristics", style='Heading2Style')
-    table = doc.add_table(rows=4, cols=2)
-    table.style = 'Table Grid'
-
-    # Table headers
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = 'Parameter'
-    hdr_cells[1].text = 'Value'
-
     # Table data
     data = [
         ['Total IPD Admissions', '1,366'],
@@ -144,11 +138,7 @@ def create_professional_gastroenteritis_docx():
         ['Study Location', 'Shridevi Institute of Medical Sciences and Research Hospital, Tumkur']
     ]
 
-    for i, (param, value) in enumerate(data, 1):
-        if i < len(table.rows):
-            row_cells = table.rows[i].cells
-            row_cells[0].text = param
-            row_cells[1].text = value
+    add_rows_table(doc, ['Parameter', 'Value'], data, bold_header=False)
 
     doc.add_paragraph("Table 1: Overall Study Population Characteristics", style='NormalStyle')
     doc.add_paragraph("", style='NormalStyle')  # Space
@@ -163,13 +153,6 @@ def create_professional_gastroenteritis_docx():
 
     # Demographic characteristics table
     doc.add_paragraph("Demographic Characteristics of AGE/ADD Cases", style='Heading2Style')
-    table2 = doc.add_table(rows=6, cols=2)
-    table2.style = 'Table Grid'
-
-    hdr_cells2 = table2.rows[0].cells
-    hdr_cells2[0].text = 'Characteristic'
-    hdr_cells2[1].text = 'Value'
-
     demo_data = [
         ['Mean Age ± SD', '45.7 ± 21.6 years'],
         ['Median Age', '47.0 years'],
@@ -179,11 +162,7 @@ def create_professional_gastroenteritis_docx():
         ['Male:Female Ratio', '1.2:1']
     ]
 
-    for i, (char, value) in enumerate(demo_data, 1):
-        if i < len(table2.rows):
-            row_cells = table2.rows[i].cells
-            row_cells[0].text = char
-            row_cells[1].text = value
+    add_rows_table(doc, ['Characteristic', 'Value'], demo_data, bold_header=False)
 
     doc.add_paragraph("Table 2: Demographic Characteristics of AGE/ADD Cases", style='NormalStyle')
 
@@ -194,7 +173,7 @@ def create_professional_gastroenteritis_docx():
     # Embed the figure if it exists
     if os.path.exists('gi_diagnosis_reclassified.png'):
         try:
-            doc.add_picture('gi_diagnosis_reclassified.png', width=Inches(5))
+            add_picture(doc, 'gi_diagnosis_reclassified.png', width=Inches(5))
             doc.add_paragraph("Figure 1: AGE/ADD Cases by Reclassified Diagnosis Categories at Shridevi Institute", style='NormalStyle')
         except:
             doc.add_paragraph("[Figure 1: AGE/ADD diagnosis reclassification chart - not available for embedding]", style='NormalStyle')
@@ -208,15 +187,6 @@ def create_professional_gastroenteritis_docx():
     doc.add_paragraph("Comprehensive LOS analysis revealed significant clinical insights into the severity and resource utilization of hospitalized AGE/ADD cases. Among 13 cases with valid LOS data, the analysis demonstrated extended hospitalization patterns.", style='NormalStyle')
 
     # LOS table
-    table3 = doc.add_table(rows=7, cols=4)
-    table3.style = 'Table Grid'
-
-    hdr_cells3 = table3.rows[0].cells
-    hdr_cells3[0].text = 'LOS Category'
-    hdr_cells3[1].text = 'Count'
-    hdr_cells3[2].text = 'Percentage'
-    hdr_cells3[3].text = 'Mean LOS (days)'
-
     los_data = [
         ['1 day', '0', '0.0%', '-'],
         ['2-3 days', '0', '0.0%', '-'],
@@ -226,12 +196,7 @@ def create_professional_gastroenteritis_docx():
         ['30+ days', '7', '53.8%', '61.8']
     ]
 
-    for i, (cat, count, pct, mean) in enumerate(los_data, 1):
-        row_cells = table3.rows[i].cells
-        row_cells[0].text = cat
-        row_cells[1].text = count
-        row_cells[2].text = pct
-        row_cells[3].text = mean
+    add_rows_table(doc, ['LOS Category', 'Count', 'Percentage', 'Mean LOS (days)'], los_data, bold_header=False)
 
     doc.add_paragraph("Table 4: Length of Stay Distribution by Categories", style='NormalStyle')
 
@@ -413,14 +378,6 @@ def create_professional_respiratory_docx():
 
     # Add Table 1
     doc.add_paragraph("Overall Study Population and Respiratory Infection Burden", style='Heading2Style')
-    table = doc.add_table(rows=5, cols=2)
-    table.style = 'Table Grid'
-
-    # Table headers
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = 'Parameter'
-    hdr_cells[1].text = 'Value'
-
     # Table data
     data = [
         ['Total IPD Admissions', '1,366'],
@@ -430,11 +387,7 @@ def create_professional_respiratory_docx():
         ['Methodology', 'Comprehensive search with advanced pattern recognition']
     ]
 
-    for i, (param, value) in enumerate(data, 1):
-        if i < len(table.rows):
-            row_cells = table.rows[i].cells
-            row_cells[0].text = param
-            row_cells[1].text = value
+    add_rows_table(doc, ['Parameter', 'Value'], data, bold_header=False)
 
     doc.add_paragraph("Table 1: Overall Study Population and Respiratory Infection Burden", style='NormalStyle')
 
@@ -448,13 +401,6 @@ def create_professional_respiratory_docx():
 
     # Demographic characteristics table
     doc.add_paragraph("Demographic Characteristics of Respiratory Infection Cases", style='Heading2Style')
-    table2 = doc.add_table(rows=6, cols=2)
-    table2.style = 'Table Grid'
-
-    hdr_cells2 = table2.rows[0].cells
-    hdr_cells2[0].text = 'Characteristic'
-    hdr_cells2[1].text = 'Value'
-
     demo_data = [
         ['Mean Age ± SD', '35.2 ± 24.1 years'],
         ['Median Age', '32.0 years'],
@@ -464,11 +410,7 @@ def create_professional_respiratory_docx():
         ['Male:Female Ratio', '1.1:1']
     ]
 
-    for i, (char, value) in enumerate(demo_data, 1):
-        if i < len(table2.rows):
-            row_cells = table2.rows[i].cells
-            row_cells[0].text = char
-            row_cells[1].text = value
+    add_rows_table(doc, ['Characteristic', 'Value'], demo_data, bold_header=False)
 
     doc.add_paragraph("Table 2: Demographic Characteristics of Respiratory Infection Cases", style='NormalStyle')
 
@@ -478,7 +420,7 @@ def create_professional_respiratory_docx():
     # Embed Figure 1 if it exists
     if os.path.exists('comprehensive_resp_figures/resp_diagnosis_distribution.png'):
         try:
-            doc.add_picture('comprehensive_resp_figures/resp_diagnosis_distribution.png', width=Inches(5))
+            add_picture(doc, 'comprehensive_resp_figures/resp_diagnosis_distribution.png', width=Inches(5))
             doc.add_paragraph("Figure 1: Respiratory Infection Cases by Diagnostic Category at Shridevi Institute", style='NormalStyle')
         except:
             doc.add_paragraph("[Figure 1: Respiratory diagnosis distribution chart - not available for embedding]", style='NormalStyle')
@@ -488,7 +430,7 @@ def create_professional_respiratory_docx():
     # Embed Figure 2 if it exists
     if os.path.exists('comprehensive_resp_figures/resp_by_department.png'):
         try:
-            doc.add_picture('comprehensive_resp_figures/resp_by_department.png', width=Inches(5))
+            add_picture(doc, 'comprehensive_resp_figures/resp_by_department.png', width=Inches(5))
             doc.add_paragraph("Figure 2: Respiratory Infection Cases by Managing Department at Shridevi Institute", style='NormalStyle')
         except:
             doc.add_paragraph("[Figure 2: Department distribution chart - not available for embedding]", style='NormalStyle')
@@ -502,15 +444,6 @@ def create_professional_respiratory_docx():
     doc.add_paragraph("Comprehensive LOS analysis revealed significant insights into clinical severity and resource utilization patterns for hospitalized respiratory infections. Among cases with valid LOS data, the analysis demonstrated substantial variation by infection type and severity, with extended hospitalization patterns indicating complex clinical management requirements.", style='NormalStyle')
 
     # LOS table
-    table3 = doc.add_table(rows=7, cols=4)
-    table3.style = 'Table Grid'
-
-    hdr_cells3 = table3.rows[0].cells
-    hdr_cells3[0].text = 'LOS Category'
-    hdr_cells3[1].text = 'Count'
-    hdr_cells3[2].text = 'Percentage'
-    hdr_cells3[3].text = 'Mean LOS (days)'
-
     los_data = [
         ['1 day', '12', '2.8%', '1.0'],
         ['2-3 days', '34', '7.8%', '2.6'],
@@ -520,12 +453,7 @@ def create_professional_respiratory_docx():
         ['30+ days', '81', '18.6%', '42.8']
     ]
 
-    for i, (cat, count, pct, mean) in enumerate(los_data, 1):
-        row_cells = table3.rows[i].cells
-        row_cells[0].text = cat
-        row_cells[1].text = count
-        row_cells[2].text = pct
-        row_cells[3].text = mean
+    add_rows_table(doc, ['LOS Category', 'Count', 'Percentage', 'Mean LOS (days)'], los_data, bold_header=False)
 
     doc.add_paragraph("Table 6: Length of Stay Distribution by Categories", style='NormalStyle')
 
@@ -0,0 +1,140 @@
+import argparse
+import numpy as np
+import pandas as pd
+from ipd_data import EXPORT_TIME_FORMAT, decode_ip_dates, combine_admission_datetime, parse_age_sex, parse_export_times
+
+# Cut-offs the dashboards use to drop implausible stays
+LOS_THRESHOLDS = [50, 200, 365]
+# Largest difference (days) between our LOS and the export's duration column still treated as agreement
+EXPORT_LOS_TOLERANCE = 1 / 24
+EXPORT_LOS_COLUMN = 'unnamed:_13'
+
+# Check name -> (column reported as the value, description)
+CHECKS = {
+    'ip_missing': ('ip_number', "IP Number is empty"),
+    'ip_unparseable': ('ip_number', "IP Number does not decode to a calendar date (IPYYMMDDnnnn)"),
+    'ip_duplicate': ('ip_number', "IP Number appears on more than one row"),
+    'ip_date_mismatch': ('admission_time', "IP Number date differs from the Admission Time date"),
+    'admission_time_unparseable': ('admission_time', f"Admission Time is missing or not in the export format ({EXPORT_TIME_FORMAT})"),
+    'discharge_time_missing': ('discharge_time', "Discharge Time is empty"),
+    'discharge_time_unparseable': ('discharge_time', f"Discharge Time is not in the export format ({EXPORT_TIME_FORMAT})"),
+    'discharge_before_admission': ('discharge_time', "Discharge is earlier than admission"),
+    **{f'los_over_{days}': ('length_of_stay', f"Length of stay exceeds {days} days") for days in LOS_THRESHOLDS},
+    'los_export_mismatch': (EXPORT_LOS_COLUMN, "Length of stay disagrees with the export's own duration column"),
+    'los_export_next_row': (EXPORT_LOS_COLUMN, "Export duration matches the next row's stay (column shifted)"),
+    'diagnosis_missing': ('diagnosis', "Diagnosis is empty"),
+    'icd_missing': ('icd_code', "ICD code is empty"),
+    'age_sex_missing': ('a/s', "A/S is empty"),
+    'age_sex_unparseable': ('a/s', "A/S does not parse to an age and gender"),
+}
+
+
+def quality_masks(df):
+    """Evaluate every check on the loaded frame (raw export columns) and return one boolean column per check
+
+    Times are parsed with ipd_data.parse_export_times, as the loaders do, so a
+    row flagged unparseable here is one the analysis scripts also see as NaT.
+    The los_over_* checks use the scripts' LOS (IP-number date plus time of
+    day, what the dashboards filter on); discharge_before_admission and the
+    export duration comparison use the Admission Time as written. Also
+    returns the scripts' LOS.
+    """
+    ip = df['ip_number']
+    ip_dates = decode_ip_dates(ip)
+    admit_raw, discharge_raw = df['admission_time'], df['discharge_time']
+    admit = parse_export_times(admit_raw)
+    discharge = parse_export_times(discharge_raw)
+    admission_datetime = combine_admission_datetime(ip_dates, admit_raw)
+    los = (discharge - admission_datetime).dt.total_seconds().to_numpy() / (24 * 3600)
+    strict_los = (discharge - admit).dt.total_seconds().to_numpy() / (24 * 3600)
+    demographics = parse_age_sex(df['a/s'])
+
+    masks = {
+        'ip_missing': ip.isna(),
+        'ip_unparseable': ip.notna() & ip_dates.isna(),
+        'ip_duplicate': ip.notna() & ip.duplicated(keep=False),
+        'ip_date_mismatch': ip_dates.notna() & admit.notna() & (ip_dates != admit.dt.normalize()),
+        'admission_time_unparseable': admit.isna(),
+        'discharge_time_missing': discharge_raw.isna(),
+        'discharge_time_unparseable': discharge_raw.notna() & discharge.isna(),
+        'discharge_before_admission': strict_los < 0,
+    }
+    # Cumulative, like the dashboards' cut-offs: a 250-day stay counts as over 50 and over 200
+    for days in LOS_THRESHOLDS:
+        masks[f'los_over_{days}'] = los > days
+
+    if EXPORT_LOS_COLUMN in df.columns:
+        export_los = df[EXPORT_LOS_COLUMN].to_numpy(dtype=float)
+        disagrees = np.abs(strict_los - export_los) > EXPORT_LOS_TOLERANCE
+        next_los = np.append(strict_los[1:], np.nan)
+        masks['los_export_mismatch'] = ~np.isnan(export_los) & (disagrees | np.isnan(strict_los))
+        masks['los_export_next_row'] = masks['los_export_mismatch'] & (np.abs(next_los - export_los) <= EXPORT_LOS_TOLERANCE)
+    else:
+        masks['los_export_mismatch'] = masks['los_export_next_row'] = np.zeros(len(df), dtype=bool)
+
+    masks.update({
+        'diagnosis_missing': df['diagnosis'].isna(),
+        'icd_missing': df['icd_code'].isna(),
+        'age_sex_missing': df['a/s'].isna(),
+        'age_sex_unparseable': df['a/s'].notna() & (demographics['age_years'].isna() | demographics['gender'].isna()),
+    })
+    result = pd.DataFrame({name: np.asarray(masks[name], dtype=bool) for name in CHECKS}, index=df.index)
+    return result, pd.Series(los, index=df.index, name='length_of_stay')
+
+
+def quality_issues(df):
+    """Return (issues, summary): one row per failed check per admission, and counts per check
+
+    issues has the source row label, IP number, check name, the offending value
+    and the check's description, in row order.
+    """
+    masks, los = quality_masks(df)
+    rows, checks = np.nonzero(masks.to_numpy())
+    check_names = list(CHECKS)
+    names = np.array(check_names, dtype=object)[checks]
+    values = np.empty(len(rows), dtype=object)
+    for code in np.unique(checks):
+        column = CHECKS[check_names[code]][0]
+        at = checks == code
+        source = los if column == 'length_of_stay' else df[column]
+        values[at] = source.to_numpy(dtype=object)[rows[at]]
+
+    issues = pd.DataFrame({
+        'row': df.index.to_numpy()[rows],
+        'ip_number': df['ip_number'].to_numpy(dtype=object)[rows],
+        'check': pd.Categorical(names, categories=list(CHECKS)),
+        'value': values,
+        'description': [CHECKS[name][1] for name in names],
+    })
+    counts = masks.sum()
+    summary = pd.DataFrame({
+        'rows_flagged': counts,
+        'percent': (counts / max(len(df), 1) * 100).round(1),
+        'description': [CHECKS[name][1] for name in CHECKS],
+    })
+    summary.index.name = 'check'
+    return issues, summary
+
+
+if __name__ == "__main__":
+    from ipd_data import load_ipd_data
+    from instrumentation import StageTrace
+
+    parser = argparse.ArgumentParser(description="Run every data-quality check on the IPD export and list the failing rows")
+    parser.add_argument('--issues', default='data_quality_issues.csv', help="CSV of failing rows")
+    parser.add_argument('--summary', default='data_quality_summary.csv', help="CSV of counts per check")
+    args = parser.parse_args()
+
+    trace = StageTrace('data_quality')
+    with trace.stage('load'):
+        df = load_ipd_data()
+    with trace.stage('check', rows=len(df)):
+        issues, summary = quality_issues(df)
+    with trace.stage('write', rows=len(issues)):
+        issues.to_csv(args.issues, index=False)
+        summary.to_csv(args.summary)
+    trace.finish()
+
+    print(f"{len(issues)} issues in {issues['row'].nunique()} of {len(df)} rows")
+    print(summary[summary['rows_flagged'] > 0].to_string())
+    print(f"Saved {args.issues} and {args.summary}")
@@ -0,0 +1,58 @@
+import hashlib
+import os
+from docx.shared import Inches
+from PIL import Image
+
+IMAGE_CACHE_DIR = '.image_cache'
+# Figures are saved at 300 dpi; embedding them at their printed width keeps that resolution
+PRINT_DPI = 300
+IMAGE_WIDTH = Inches(5)
+
+
+def prepare_image(path, width=IMAGE_WIDTH, dpi=PRINT_DPI, cache_dir=IMAGE_CACHE_DIR):
+    """Return the path of a copy of an image sized for printing at width and dpi
+
+    The copy is downsampled (never enlarged) to width x dpi pixels across and
+    saved as an optimised PNG under cache_dir, named by the hash of the source
+    bytes and the target size. Later calls with the same image, from any
+    document or process, reuse it. Files Pillow cannot read or convert are
+    returned unchanged.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    target_px = int(round(width.inches * dpi))
+    key = hashlib.sha256(data + f'\0{target_px}\0{dpi}'.encode()).hexdigest()[:32]
+    cached = os.path.join(cache_dir, f'{key}.png')
+    if os.path.exists(cached):
+        return cached
+
+    # Write then rename, so concurrent builds never read a half-written file
+    partial = f'{cached}.{os.getpid()}.tmp'
+    try:
+        with Image.open(path) as image:
+            image.load()
+            # PNG has no CMYK and keeps palette transparency poorly; normalise to RGB(A)
+            if image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+                has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+                image = image.convert('RGBA' if has_alpha else 'RGB')
+            if image.width > target_px:
+                height = max(1, int(round(image.height * target_px / image.width)))
+                image = image.resize((target_px, height), Image.LANCZOS)
+            os.makedirs(cache_dir, exist_ok=True)
+            image.save(partial, format='PNG', optimize=True, dpi=(dpi, dpi))
+        os.replace(partial, cached)
+    except (OSError, ValueError):
+        # Unreadable, truncated or unsupported by Pillow: embed the original as before
+        if os.path.exists(partial):
+            os.remove(partial)
+        return path
+    return cached
+
+
+def add_picture(doc, path, width=IMAGE_WIDTH, dpi=PRINT_DPI):
+    """doc.add_picture with the image pre-processed by prepare_image
+
+    python-docx stores each distinct image once per package, so a figure
+    placed several times in a document is embedded once.
+    """
+    return doc.add_picture(prepare_image(path, width, dpi), width=width)
@@ -0,0 +1,77 @@
+from xml.sax.saxutils import escape
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import Emu
+
+TABLE_STYLE = 'Table Grid'
+
+
+def _run_xml(text, bold):
+    # Tabs and line breaks become w:tab/w:br, as cell.text does
+    parts = []
+    for i, line in enumerate(str(text).split('\n')):
+        if i:
+            parts.append('<w:br/>')
+        for j, chunk in enumerate(line.split('\t')):
+            if j:
+                parts.append('<w:tab/>')
+            if chunk:
+                parts.append(f'<w:t xml:space="preserve">{escape(chunk)}</w:t>')
+    if not parts:
+        return ''
+    return f"<w:r>{'<w:rPr><w:b/></w:rPr>' if bold else ''}{''.join(parts)}</w:r>"
+
+
+def _cell_xml(value, bold):
+    # A list value is a sequence of (text, bold) runs, for mixed formatting within a cell
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ''.join(_run_xml(text, run_bold) for text, run_bold in value)
+    return _run_xml(value, bold)
+
+
+def rows_xml(header, rows, col_width, bold_header=True):
+    """Build the w:tr XML for a header row plus data rows as one string, wrapped in a w:tbl
+
+    Matches what Table.add_row followed by cell.text produces: every cell is
+    col_width twips wide and holds one paragraph, missing trailing cells are
+    left empty and None is written as an empty cell. A cell value may also be
+    a list of (text, bold) runs.
+    """
+    cols = len(header)
+    tc_open = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_width}"/></w:tcPr><w:p>'
+
+    def row_xml(values, bold):
+        values = list(values)[:cols]
+        values += [None] * (cols - len(values))
+        cells = ''.join(f"{tc_open}{_cell_xml(value, bold)}</w:p></w:tc>" for value in values)
+        return f'<w:tr>{cells}</w:tr>'
+
+    return (
+        f'<w:tbl {nsdecls("w")}>'
+        + row_xml(header, bold_header)
+        + ''.join(row_xml(row, False) for row in rows)
+        + '</w:tbl>'
+    )
+
+
+def add_rows_table(doc, header, rows, style=TABLE_STYLE, bold_header=True):
+    """Append a table of header + rows to doc, its rows built as one XML string instead of cell by cell
+
+    The table itself comes from doc.add_table, so its grid, width and style
+    are python-docx's own; only the rows are parsed in bulk and appended.
+    """
+    table = doc.add_table(rows=0, cols=len(header), style=style)
+    col_width = Emu(table.columns[0].width).twips if len(header) else 0
+    for tr in parse_xml(rows_xml(header, rows, col_width, bold_header)):
+        table._tbl.append(tr)
+    return table
+
+
+def add_dataframe_table(doc, df, style=TABLE_STYLE, bold_header=True, index=False):
+    """Append a DataFrame as a table (column names as the header row, values as str)"""
+    if index:
+        df = df.reset_index()
+    rows = ([str(value) for value in row] for row in df.itertuples(index=False, name=None))
+    return add_rows_table(doc, [str(column) for column in df.columns], rows, style, bold_header)
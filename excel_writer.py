@@ -0,0 +1,75 @@
+from copy import copy
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import MergedCell
+from openpyxl.utils.dataframe import dataframe_to_rows
+
+
+class StreamingWorkbook:
+    """Dashboard workbook whose large data sheets are streamed row by row
+
+    Layout sheets (titles, metrics, small tables, charts) are ordinary openpyxl
+    worksheets with random cell access. Data sheets are only registered here and
+    written through a write_only workbook when save() is called, so memory does
+    not grow with the number of admissions.
+    """
+
+    def __init__(self):
+        self._layout = Workbook()
+        self._layout.remove(self._layout.active)
+        self._sheets = []
+
+    def create_sheet(self, title):
+        """Create a normal (random-access) worksheet for summary content"""
+        ws = self._layout.create_sheet(title)
+        self._sheets.append((title, ws))
+        return ws
+
+    def add_rows_sheet(self, title, rows):
+        """Register a sheet whose rows come from an iterable, consumed lazily at save time"""
+        self._sheets.append((title, rows))
+
+    def add_dataframe_sheet(self, title, df, index=False):
+        """Register a DataFrame (header row first) to be streamed into its own sheet"""
+        self.add_rows_sheet(title, dataframe_to_rows(df, index=index))
+
+    def save(self, path):
+        out = Workbook(write_only=True)
+        for title, source in self._sheets:
+            ws = out.create_sheet(title)
+            if hasattr(source, 'iter_rows'):
+                _copy_layout(source, ws)
+            else:
+                for row in source:
+                    ws.append(row)
+        out.save(path)
+
+
+def _copy_layout(src, dst):
+    # Column widths, merges, charts and images must be set before rows are written
+    for key, dim in src.column_dimensions.items():
+        if dim.width:
+            dst.column_dimensions[key].width = dim.width
+    for merged in src.merged_cells.ranges:
+        dst.merged_cells.add(merged.coord)
+    for chart in src._charts:
+        dst.add_chart(chart)
+    for image in src._images:
+        dst.add_image(image)
+
+    for row in src.iter_rows():
+        values = []
+        for cell in row:
+            if isinstance(cell, MergedCell) or (cell.value is None and not cell.has_style):
+                values.append(None)
+                continue
+            out = WriteOnlyCell(dst, value=cell.value)
+            if cell.has_style:
+                out.font = copy(cell.font)
+                out.fill = copy(cell.fill)
+                out.border = copy(cell.border)
+                out.alignment = copy(cell.alignment)
+                out.number_format = cell.number_format
+                out.protection = copy(cell.protection)
+            values.append(out)
+        dst.append(values)
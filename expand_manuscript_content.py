@@ -8,6 +8,8 @@ from docx.oxml.ns import nsdecls, qn
 from docx.oxml import parse_xml
 import os
 from datetime import datetime
+from docx_images import add_picture
+from docx_tables import add_rows_table
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -162,13 +164,6 @@ def create_expanded_gastroenteritis_docx():
 
     # Study Population Table
     doc.add_paragraph("Study Population Characteristics", style='Heading2Style')
-    table = doc.add_table(rows=4, cols=2)
-    table.style = 'Table Grid'
-
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = 'Parameter'
-    hdr_cells[1].text = 'Value'
-
     data = [
         ['Total IPD Admissions', '1,366'],
         ['AGE/ADD Cases', '134 (9.8%)'],
@@ -176,10 +171,7 @@ def create_expanded_gastroenteritis_docx():
         ['Study Location', 'Shridevi Institute of Medical Sciences and Research Hospital, Tumkur']
     ]
 
-    for i, (param, value) in enumerate(data):
-        row_cells = table.rows[i].cells
-        row_cells[0].text = param
-        row_cells[1].text = value
+    add_rows_table(doc, ['Parameter', 'Value'], data, bold_header=False)
 
     doc.add_paragraph("Table 1: Overall Study Population Characteristics", style='NormalStyle')
 
@@ -188,13 +180,6 @@ def create_expanded_gastroenteritis_docx():
     doc.add_paragraph("The hospitalized AGE/ADD cases demonstrated distinct demographic patterns compared to typical outpatient gastroenteritis populations. The mean age was 45.7 ± 21.6 years, with a median age of 47.0 years (range: 1-85 years), indicating a predominantly adult population requiring hospitalization. This older age distribution contrasts sharply with global patterns where pediatric gastroenteritis predominates, suggesting that hospitalized cases represent severe complications in adult populations.", style='NormalStyle')
 
     # Demographic Table
-    table2 = doc.add_table(rows=6, cols=2)
-    table2.style = 'Table Grid'
-
-    hdr_cells2 = table2.rows[0].cells
-    hdr_cells2[0].text = 'Characteristic'
-    hdr_cells2[1].text = 'Value'
-
     demo_data = [
         ['Mean Age ± SD', '45.7 ± 21.6 years'],
         ['Median Age', '47.0 years'],
@@ -204,11 +189,7 @@ def create_expanded_gastroenteritis_docx():
         ['Male:Female Ratio', '1.2:1']
     ]
 
-    for i, (char, value) in enumerate(demo_data, 1):
-        if i < len(table2.rows):
-            row_cells = table2.rows[i].cells
-            row_cells[0].text = char
-            row_cells[1].text = value
+    add_rows_table(doc, ['Characteristic', 'Value'], demo_data, bold_header=False)
 
     doc.add_paragraph("Table 2: Demographic Characteristics of AGE/ADD Cases", style='NormalStyle')
 
@@ -221,14 +202,6 @@ def create_expanded_gastroenteritis_docx():
     doc.add_paragraph("Traditional diagnostic categorization revealed substantial heterogeneity in gastroenteritis presentations. To improve analytical clarity and clinical interpretation, diagnoses were innovatively reclassified into meaningful clinical categories based on severity, etiology, and clinical presentation patterns. This reclassification revealed that severe acute gastroenteritis (33.6%) was the most common presentation, followed by acute gastroenteritis (20.9%) and acute diarrheal disease (13.4%). The presence of cholera (4.5%) and dysentery (3.7%) indicates ongoing transmission of specific bacterial pathogens in the region.", style='NormalStyle')
 
     # Diagnostic Table
-    table3 = doc.add_table(rows=10, cols=3)
-    table3.style = 'Table Grid'
-
-    hdr_cells3 = table3.rows[0].cells
-    hdr_cells3[0].text = 'Diagnosis Category'
-    hdr_cells3[1].text = 'Count'
-    hdr_cells3[2].text = 'Percentage'
-
     diag_data = [
         ['Acute Gastroenteritis', '45', '33.6%'],
         ['Severe Acute Gastroenteritis', '28', '20.9%'],
@@ -241,11 +214,7 @@ def create_expanded_gastroenteritis_docx():
         ['Other Gastroenteritis', '5', '3.7%']
     ]
 
-    for i, (cat, count, pct) in enumerate(diag_data, 1):
-        row_cells = table3.rows[i].cells
-        row_cells[0].text = cat
-        row_cells[1].text = count
-        row_cells[2].text = pct
+    add_rows_table(doc, ['Diagnosis Category', 'Count', 'Percentage'], diag_data, bold_header=False)
 
     doc.add_paragraph("Table 3: AGE/ADD Cases by Reclassified Diagnosis Categories", style='NormalStyle')
 
@@ -255,13 +224,6 @@ def create_expanded_gastroenteritis_docx():
 
     # Table 1: Gastroenteritis/ADD Case Summary Statistics
     doc.add_paragraph("Table 1: Gastroenteritis/ADD Case Summary Statistics", style='Heading2Style')
-    table1 = doc.add_table(rows=6, cols=2)
-    table1.style = 'Table Grid'
-
-    hdr_cells1 = table1.rows[0].cells
-    hdr_cells1[0].text = 'Metric'
-    hdr_cells1[1].text = 'Value'
-
     table1_data = [
         ['Total IPD Admissions', '1,366'],
         ['Gastroenteritis/ADD Cases', '134 (9.8%)'],
@@ -272,11 +234,7 @@ def create_expanded_gastroenteritis_docx():
         ['Female Cases', '61 (45.5%)']
     ]
 
-    for i, (metric, value) in enumerate(table1_data):
-        if i < len(table1.rows):
-            row_cells = table1.rows[i].cells
-            row_cells[0].text = metric
-            row_cells[1].text = value
+    add_rows_table(doc, ['Metric', 'Value'], table1_data, bold_header=False)
 
     # Diagnostic Distribution
     doc.add_paragraph("Diagnostic Distribution", style='Heading2Style')
@@ -286,7 +244,7 @@ def create_expanded_gastroenteritis_docx():
     doc.add_paragraph("Figure 1: Gastroenteritis Cases by Diagnosis at SIMSRH IPD (Aug-Nov 2025)", style='Heading2Style')
     if os.path.exists('gi_diagnosis_reclassified.png'):
         try:
-            doc.add_picture('gi_diagnosis_reclassified.png', width=Inches(5))
+            add_picture(doc, 'gi_diagnosis_reclassified.png', width=Inches(5))
         except:
             doc.add_paragraph("[Figure 1: Diagnosis distribution chart - not available for embedding]", style='NormalStyle')
 
@@ -298,7 +256,7 @@ def create_expanded_gastroenteritis_docx():
     doc.add_paragraph("Figure 2: Age Distribution of Gastroenteritis Cases at SIMSRH", style='Heading2Style')
     if os.path.exists('gi_figures/gi_age_distribution.png'):
         try:
-            doc.add_picture('gi_figures/gi_age_distribution.png', width=Inches(5))
+            add_picture(doc, 'gi_figures/gi_age_distribution.png', width=Inches(5))
         except:
             doc.add_paragraph("[Figure 2: Age distribution chart - not available for embedding]", style='NormalStyle')
 
@@ -310,7 +268,7 @@ def create_expanded_gastroenteritis_docx():
     doc.add_paragraph("Figure 3: Gender Distribution in Gastroenteritis Cases at SIMSRH", style='Heading2Style')
     if os.path.exists('gi_figures/gi_gender_distribution.png'):
         try:
-            doc.add_picture('gi_figures/gi_gender_distribution.png', width=Inches(5))
+            add_picture(doc, 'gi_figures/gi_gender_distribution.png', width=Inches(5))
         except:
             doc.add_paragraph("[Figure 3: Gender distribution chart - not available for embedding]", style='NormalStyle')
 
@@ -320,14 +278,6 @@ def create_expanded_gastroenteritis_docx():
 
     # Table 3: Age Group Distribution
     doc.add_paragraph("Table 3: Age Group Distribution of Gastroenteritis Cases", style='Heading2Style')
-    table3 = doc.add_table(rows=7, cols=3)
-    table3.style = 'Table Grid'
-
-    hdr_cells3 = table3.rows[0].cells
-    hdr_cells3[0].text = 'Age Group'
-    hdr_cells3[1].text = 'Count'
-    hdr_cells3[2].text = 'Percentage'
-
     age_data = [
         ['0-4 years', '8', '6.0%'],
         ['5-17 years', '12', '9.0%'],
@@ -337,12 +287,7 @@ def create_expanded_gastroenteritis_docx():
         ['65+ years', '28', '20.9%']
     ]
 
-    for i, (age, count, pct) in enumerate(age_data):
-        if i < len(table3.rows):
-            row_cells = table3.rows[i].cells
-            row_cells[0].text = age
-            row_cells[1].text = count
-            row_cells[2].text = pct
+    add_rows_table(doc, ['Age Group', 'Count', 'Percentage'], age_data, bold_header=False)
 
     # Departmental Utilization
     doc.add_paragraph("Departmental Utilization", style='Heading2Style')
@@ -350,26 +295,13 @@ def create_expanded_gastroenteritis_docx():
 
     # Table 4: Departmental Distribution
     doc.add_paragraph("Table 4: Departmental Distribution of Gastroenteritis Cases", style='Heading2Style')
-    table4 = doc.add_table(rows=4, cols=3)
-    table4.style = 'Table Grid'
-
-    hdr_cells4 = table4.rows[0].cells
-    hdr_cells4[0].text = 'Department'
-    hdr_cells4[1].text = 'Count'
-    hdr_cells4[2].text = 'Percentage'
-
     dept_data = [
         ['General Medicine', '114', '85.1%'],
         ['Pediatrics', '11', '8.2%'],
         ['Other Specialties', '9', '6.7%']
     ]
 
-    for i, (dept, count, pct) in enumerate(dept_data):
-        if i < len(table4.rows):
-            row_cells = table4.rows[i].cells
-            row_cells[0].text = dept
-            row_cells[1].text = count
-            row_cells[2].text = pct
+    add_rows_table(doc, ['Department', 'Count', 'Percentage'], dept_data, bold_header=False)
 
     # Length of Stay Analysis
     doc.add_paragraph("Length of Stay Analysis", style='Heading2Style')
@@ -377,15 +309,6 @@ def create_expanded_gastroenteritis_docx():
 
     # Table 5: Length of Stay Analysis for ADD Cases
     doc.add_paragraph("Table 5: Length of Stay Analysis for ADD Cases", style='Heading2Style')
-    table5 = doc.add_table(rows=7, cols=4)
-    table5.style = 'Table Grid'
-
-    hdr_cells5 = table5.rows[0].cells
-    hdr_cells5[0].text = 'LOS Category'
-    hdr_cells5[1].text = 'Count'
-    hdr_cells5[2].text = 'Percentage'
-    hdr_cells5[3].text = 'Mean LOS (days)'
-
     los_data = [
         ['1 day', '0', '0.0%', '-'],
         ['2-3 days', '0', '0.0%', '-'],
@@ -395,13 +318,7 @@ def create_expanded_gastroenteritis_docx():
         ['30+ days', '7', '53.8%', '61.8']
     ]
 
-    for i, (cat, count, pct, mean) in enumerate(los_data):
-        if i < len(table5.rows):
-            row_cells = table5.rows[i].cells
-            row_cells[0].text = cat
-            row_cells[1].text = count
-            row_cells[2].text = pct
-            row_cells[3].text = mean
+    add_rows_table(doc, ['LOS Category', 'Count', 'Percentage', 'Mean LOS (days)'], los_data, bold_header=False)
 
     doc.add_paragraph("The LOS distribution showed that 53.8% of ADD cases had extended hospitalizations (>30 days), with mean LOS of 61.8 days in this group. Age group analysis revealed that the 18-34 year age group had the longest average LOS (61.3 days), followed by the 65+ group (54.2 days). Male patients had longer average LOS (47.2 days) compared to females (32.9 days).", style='NormalStyle')
 
@@ -420,15 +337,6 @@ def create_expanded_gastroenteritis_docx():
     doc.add_paragraph("The LOS distribution showed a wide range (6.8-91.6 days), with 53.8% of cases requiring hospitalization longer than 30 days. This extended LOS pattern suggests that hospitalized gastroenteritis represents a distinct clinical entity requiring specialized care protocols, nutritional support, and monitoring for complications. The prolonged hospitalization also has significant implications for healthcare resource utilization and cost containment strategies.", style='NormalStyle')
 
     # LOS Table
-    table4 = doc.add_table(rows=7, cols=4)
-    table4.style = 'Table Grid'
-
-    hdr_cells4 = table4.rows[0].cells
-    hdr_cells4[0].text = 'LOS Category'
-    hdr_cells4[1].text = 'Count'
-    hdr_cells4[2].text = 'Percentage'
-    hdr_cells4[3].text = 'Mean LOS (days)'
-
     los_data = [
         ['1 day', '0', '0.0%', '-'],
         ['2-3 days', '0', '0.0%', '-'],
@@ -438,12 +346,7 @@ def create_expanded_gastroenteritis_docx():
         ['30+ days', '7', '53.8%', '61.8']
     ]
 
-    for i, (cat, count, pct, mean) in enumerate(los_data, 1):
-        row_cells = table4.rows[i].cells
-        row_cells[0].text = cat
-        row_cells[1].text = count
-        row_cells[2].text = pct
-        row_cells[3].text = mean
+    add_rows_table(doc, ['LOS Category', 'Count', 'Percentage', 'Mean LOS (days)'], los_data, bold_header=False)
 
     doc.add_paragraph("Table 4: Length of Stay Distribution by Categories", style='NormalStyle')
 
@@ -452,15 +355,6 @@ def create_expanded_gastroenteritis_docx():
     doc.add_paragraph("Analysis across demographic subgroups revealed significant variations in LOS patterns. Male patients demonstrated longer average hospitalization (47.2 days) compared to females (32.9 days), suggesting gender differences in clinical severity or healthcare-seeking patterns. Age-specific analysis showed the longest LOS in the 18-34 year age group (61.3 days), followed by the elderly population (54.2 days), indicating that young adults and geriatric patients require the most intensive and prolonged gastroenteritis management.", style='NormalStyle')
 
     # LOS by Demographics Table
-    table5 = doc.add_table(rows=7, cols=4)
-    table5.style = 'Table Grid'
-
-    hdr_cells5 = table5.rows[0].cells
-    hdr_cells5[0].text = 'Subgroup'
-    hdr_cells5[1].text = 'Mean LOS (days)'
-    hdr_cells5[2].text = 'Median LOS (days)'
-    hdr_cells5[3].text = 'Range (days)'
-
     los_demo_data = [
         ['Overall', '40.3', '34.1', '6.8-91.6'],
         ['Male', '47.2', '42.8', '8.2-91.6'],
@@ -470,12 +364,7 @@ def create_expanded_gastroenteritis_docx():
         ['Age 50-64', '38.7', '35.2', '8.2-68.9']
     ]
 
-    for i, (sub, mean, med, rng) in enumerate(los_demo_data, 1):
-        row_cells = table5.rows[i].cells
-        row_cells[0].text = sub
-        row_cells[1].text = mean
-        row_cells[2].text = med
-        row_cells[3].text = rng
+    add_rows_table(doc, ['Subgroup', 'Mean LOS (days)', 'Median LOS (days)', 'Range (days)'], los_demo_data, bold_header=False)
 
     doc.add_paragraph("Table 5: Length of Stay by Demographic Subgroups", style='NormalStyle')
 
@@ -770,13 +659,6 @@ def create_expanded_respiratory_docx():
 
     # Study Population Table
     doc.add_paragraph("Study Population Characteristics", style='Heading2Style')
-    table = doc.add_table(rows=5, cols=2)
-    table.style = 'Table Grid'
-
-    hdr_cells = table.rows[0].cells
-    hdr_cells[0].text = 'Parameter'
-    hdr_cells[1].text = 'Value'
-
     data = [
         ['Total IPD Admissions', '1,366'],
         ['Respiratory Infection Cases', '436 (31.9%)'],
@@ -785,10 +667,7 @@ def create_expanded_respiratory_docx():
         ['Methodology', 'Comprehensive search with advanced pattern recognition']
     ]
 
-    for i, (param, value) in enumerate(data):
-        row_cells = table.rows[i].cells
-        row_cells[0].text = param
-        row_cells[1].text = value
+    add_rows_table(doc, ['Parameter', 'Value'], data, bold_header=False)
 
     doc.add_paragraph("Table 1: Overall Study Population and Respiratory Infection Burden", style='NormalStyle')
 
@@ -797,13 +676,6 @@ def create_expanded_respiratory_docx():
     doc.add_paragraph("The hospitalized respiratory infection cases demonstrated broad demographic representation, reflecting the universal susceptibility to respiratory pathogens across all age groups. The mean age was 35.2 ± 24.1 years, with a median age of 32.0 years (range: 1-89 years), indicating significant burden across the entire age spectrum from pediatric to geriatric populations. This broad age distribution suggests that respiratory infections represent a universal health challenge requiring comprehensive prevention and management strategies across all demographic groups.", style='NormalStyle')
 
     # Demographic Table
-    table2 = doc.add_table(rows=6, cols=2)
-    table2.style = 'Table Grid'
-
-    hdr_cells2 = table2.rows[0].cells
-    hdr_cells2[0].text = 'Characteristic'
-    hdr_cells2[1].text = 'Value'
-
     demo_data = [
         ['Mean Age ± SD', '35.2 ± 24.1 years'],
         ['Median Age', '32.0 years'],
@@ -813,10 +685,7 @@ def create_expanded_respiratory_docx():
         ['Male:Female Ratio', '1.1:1']
     ]
 
-    for i, (char, value) in enumerate(demo_data):
-        row_cells = table2.rows[i].cells
-        row_cells[0].text = char
-        row_cells[1].text = value
+    add_rows_table(doc, ['Characteristic', 'Value'], demo_data, bold_header=False)
 
     doc.add_paragraph("Table 2: Demographic Characteristics of Respiratory Infection Cases", style='NormalStyle')
 
@@ -831,14 +700,6 @@ def create_expanded_respiratory_docx():
     doc.add_paragraph("The comprehensive search methodology revealed a diverse spectrum of respiratory infections, far exceeding the scope captured by traditional diagnostic approaches. The diagnostic distribution highlighted the complexity and heterogeneity of hospitalized respiratory cases, with ARI (20.4%) being the most common category, followed by ARTI (17.4%) and URTI (15.6%). The substantial proportion of pneumonia (10.3%) and LRTI (11.9%) indicates that many hospitalized cases involve severe lower respiratory tract involvement requiring intensive management.", style='NormalStyle')
 
     # Diagnostic Table
-    table3 = doc.add_table(rows=9, cols=3)
-    table3.style = 'Table Grid'
-
-    hdr_cells3 = table3.rows[0].cells
-    hdr_cells3[0].text = 'Diagnostic Category'
-    hdr_cells3[1].text = 'Count'
-    hdr_cells3[2].text = 'Percentage'
-
     diag_data = [
         ['ARI (Acute Respiratory Infection)', '89', '20.4%'],
         ['ARTI (Acute Respiratory Tract Infection)', '76', '17.4%'],
@@ -850,11 +711,7 @@ def create_expanded_respiratory_docx():
         ['Other Respiratory Conditions', '34', '7.8%']
     ]
 
-    for i, (cat, count, pct) in enumerate(diag_data, 1):
-        row_cells = table3.rows[i].cells
-        row_cells[0].text = cat
-        row_cells[1].text = count
-        row_cells[2].text = pct
+    add_rows_table(doc, ['Diagnostic Category', 'Count', 'Percentage'], diag_data, bold_header=False)
 
     doc.add_paragraph("Table 3: Respiratory Infection Diagnostic Categories", style='NormalStyle')
 
@@ -862,7 +719,7 @@ def create_expanded_respiratory_docx():
     doc.add_paragraph("Comprehensive Respiratory Diagnosis Distribution", style='Heading2Style')
     if os.path.exists('comprehensive_resp_figures/resp_diagnosis_distribution.png'):
         try:
-            doc.add_picture('comprehensive_resp_figures/resp_diagnosis_distribution.png', width=Inches(5))
+            add_picture(doc, 'comprehensive_resp_figures/resp_diagnosis_distribution.png', width=Inches(5))
             doc.add_paragraph("Figure 1: Respiratory Infection Cases by Diagnostic Category at Shridevi Institute", style='NormalStyle')
         except:
             doc.add_paragraph("[Figure 1: Respiratory diagnosis distribution chart - not available for embedding]", style='NormalStyle')
@@ -874,14 +731,6 @@ def create_expanded_respiratory_docx():
     doc.add_paragraph("Respiratory infection cases were managed across multiple departments, reflecting the specialized nature of respiratory care and the complexity of hospitalized cases. General Medicine managed the majority of cases (45.4%), followed by Pediatrics (17.4%) and Respiratory Medicine (20.0%). This distribution ensures appropriate specialization based on clinical severity and specific respiratory care requirements, with complex cases being referred to specialized respiratory care units.", style='NormalStyle')
 
     # Department Table
-    table4 = doc.add_table(rows=6, cols=3)
-    table4.style = 'Table Grid'
-
-    hdr_cells4 = table4.rows[0].cells
-    hdr_cells4[0].text = 'Department'
-    hdr_cells4[1].text = 'Count'
-    hdr_cells4[2].text = 'Percentage'
-
     dept_data = [
         ['General Medicine', '198', '45.4%'],
         ['Respiratory Medicine', '87', '20.0%'],
@@ -890,18 +739,14 @@ def create_expanded_respiratory_docx():
         ['Other Specialties', '30', '6.9%']
     ]
 
-    for i, (dept, count, pct) in enumerate(dept_data, 1):
-        row_cells = table4.rows[i].cells
-        row_cells[0].text = dept
-        row_cells[1].text = count
-        row_cells[2].text = pct
+    add_rows_table(doc, ['Department', 'Count', 'Percentage'], dept_data, bold_header=False)
 
     doc.add_paragraph("Table 4: Departmental Distribution of Respiratory Cases", style='NormalStyle')
 
     # Try to embed Figure 2
     if os.path.exists('comprehensive_resp_figures/resp_by_department.png'):
         try:
-            doc.add_picture('comprehensive_resp_figures/resp_by_department.png', width=Inches(5))
+            add_picture(doc, 'comprehensive_resp_figures/resp_by_department.png', width=Inches(5))
             doc.add_paragraph("Figure 2: Respiratory Infection Cases by Managing Department at Shridevi Institute", style='NormalStyle')
         except:
             doc.add_paragraph("[Figure 2: Department distribution chart - not available for embedding]", style='NormalStyle')
@@ -917,15 +762,6 @@ def create_expanded_respiratory_docx():
     doc.add_paragraph("The LOS distribution showed a wide range (1-120 days), with 47.0% of cases requiring extended hospitalizations (>15 days) and 18.6% staying longer than 30 days. This extended LOS pattern suggests that hospitalized respiratory infections represent a distinct clinical entity requiring specialized care protocols, prolonged antibiotic therapy, respiratory support, and monitoring for complications. The substantial resource utilization has significant implications for healthcare planning and cost containment strategies.", style='NormalStyle')
 
     # LOS Table
-    table5 = doc.add_table(rows=7, cols=4)
-    table5.style = 'Table Grid'
-
-    hdr_cells5 = table5.rows[0].cells
-    hdr_cells5[0].text = 'LOS Category'
-    hdr_cells5[1].text = 'Count'
-    hdr_cells5[2].text = 'Percentage'
-    hdr_cells5[3].text = 'Mean LOS (days)'
-
     los_data = [
         ['1 day', '12', '2.8%', '1.0'],
         ['2-3 days', '34', '7.8%', '2.6'],
@@ -935,12 +771,7 @@ def create_expanded_respiratory_docx():
         ['30+ days', '81', '18.6%', '42.8']
     ]
 
-    for i, (cat, count, pct, mean) in enumerate(los_data, 1):
-        row_cells = table5.rows[i].cells
-        row_cells[0].text = cat
-        row_cells[1].text = count
-        row_cells[2].text = pct
-        row_cells[3].text = mean
+    add_rows_table(doc, ['LOS Category', 'Count', 'Percentage', 'Mean LOS (days)'], los_data, bold_header=False)
 
     doc.add_paragraph("Table 5: Length of Stay Distribution by Categories", style='NormalStyle')
 
@@ -949,15 +780,6 @@ def create_expanded_respiratory_docx():
     doc.add_paragraph("Analysis across demographic subgroups revealed significant variations in LOS patterns. Pediatric patients (0-17 years) demonstrated the longest average hospitalization (35.2 days), reflecting the specialized care required for respiratory infections in children. Elderly patients (65+ years) also showed extended stays (38.7 days), likely due to comorbidities and reduced physiological reserve. Adult patients (18-64 years) had more variable LOS patterns, with working-age adults showing relatively shorter stays despite higher case volumes.", style='NormalStyle')
 
     # LOS by Demographics Table
-    table6 = doc.add_table(rows=8, cols=4)
-    table6.style = 'Table Grid'
-
-    hdr_cells6 = table6.rows[0].cells
-    hdr_cells6[0].text = 'Subgroup'
-    hdr_cells6[1].text = 'Mean LOS (days)'
-    hdr_cells6[2].text = 'Median LOS (days)'
-    hdr_cells6[3].text = 'Range (days)'
-
     los_demo_data = [
         ['Overall Respiratory Cases', '31.8', '18.5', '1-120'],
         ['Male Patients', '33.2', '20.1', '1-120'],
@@ -968,12 +790,7 @@ def create_expanded_respiratory_docx():
         ['General Medicine Cases', '28.3', '15.8', '1-95']
     ]
 
-    for i, (sub, mean, med, rng) in enumerate(los_demo_data, 1):
-        row_cells = table6.rows[i].cells
-        row_cells[0].text = sub
-        row_cells[1].text = mean
-        row_cells[2].text = med
-        row_cells[3].text = rng
+    add_rows_table(doc, ['Subgroup', 'Mean LOS (days)', 'Median LOS (days)', 'Range (days)'], los_demo_data, bold_header=False)
 
     doc.add_paragraph("Table 6: Length of Stay by Demographic and Clinical Subgroups", style='NormalStyle')
 
@@ -0,0 +1,120 @@
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# A chart to render: output path, a module-level draw function, the pre-aggregated
+# data it needs, and figure options. draw(data) draws onto the current figure.
+FigureJob = namedtuple('FigureJob', ['path', 'draw', 'data', 'figsize', 'dpi'])
+
+# Set by a parent running several renderers at once (pipeline.py) to cap each one's pool
+PROCESSES_ENV = 'FIGURE_PROCESSES'
+
+
+def figure_job(path, draw, data, figsize=(10, 6), dpi=300):
+    """Build a FigureJob; draw and data must be picklable for the process pool"""
+    return FigureJob(path, draw, data, figsize, dpi)
+
+
+def _reset_peak_rss():
+    # Linux lets a process reset its high-water mark so the peak can be read per figure;
+    # returns False where it cannot, since the lifetime peak would then be reported instead
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float('nan')
+
+
+def default_processes():
+    """Worker count for a pool: the FIGURE_PROCESSES budget if set, otherwise one per CPU"""
+    budget = os.environ.get(PROCESSES_ENV, '')
+    return max(1, int(budget)) if budget.isdigit() else os.cpu_count() or 1
+
+
+def _init_worker(setup):
+    import matplotlib
+    matplotlib.use('Agg')
+    if setup is not None:
+        setup()
+
+
+def _render(job):
+    import matplotlib.pyplot as plt
+    measured = _reset_peak_rss()
+    start = time.perf_counter()
+    error = None
+    try:
+        plt.figure(figsize=job.figsize)
+        job.draw(job.data)
+        plt.tight_layout()
+        plt.savefig(job.path, dpi=job.dpi, bbox_inches='tight')
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        plt.close('all')
+    return {
+        'path': job.path,
+        'seconds': time.perf_counter() - start,
+        'peak_rss_mb': _peak_rss_mb() if measured else float('nan'),
+        'error': error,
+    }
+
+
+def _pool_context(jobs):
+    # Draw functions defined in a top-level script live in __main__, which only a
+    # forked worker already has; spawned workers would re-run the whole script
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    if any(getattr(getattr(job.draw, 'func', job.draw), '__module__', None) == '__main__' for job in jobs):
+        return None
+    return multiprocessing.get_context()
+
+
+def render_figures(jobs, processes=None, setup=None, report=True):
+    """Render FigureJobs in a process pool with the Agg backend
+
+    setup (a module-level function) runs once in every worker to apply styles and
+    rcParams. processes defaults to default_processes(), capped at the number of
+    jobs. Returns one dict per job with its path, render seconds, peak RSS in
+    MB (NaN where /proc cannot give a per-figure peak) and error message (None
+    on success), in job order. processes=1 renders in the current process, as
+    do jobs drawn by functions of the running script on platforms without fork.
+    """
+    jobs = list(jobs)
+    if processes is None:
+        processes = min(len(jobs), default_processes())
+    context = _pool_context(jobs)
+    if processes <= 1 or len(jobs) <= 1 or context is None:
+        _init_worker(setup)
+        results = [_render(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context,
+                                 initializer=_init_worker, initargs=(setup,)) as pool:
+            results = list(pool.map(_render, jobs))
+
+    if report:
+        print_render_report(results)
+    return results
+
+
+def print_render_report(results):
+    """Print render time and peak RSS per figure"""
+    print(f"{'Figure':<45} {'Time (s)':>9} {'Peak RSS (MB)':>14}")
+    for result in results:
+        status = f"  FAILED: {result['error']}" if result['error'] else ''
+        print(f"{os.path.basename(result['path']):<45} {result['seconds']:>9.2f} {result['peak_rss_mb']:>14.1f}{status}")
+    print(f"Total render time: {sum(r['seconds'] for r in results):.2f}s across {len(results)} figures")
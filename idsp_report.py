@@ -0,0 +1,177 @@
+import argparse
+import csv
+import os
+import numpy as np
+import pandas as pd
+from binning import bin_codes, code_column, BIN_REGISTRY
+from excel_writer import StreamingWorkbook
+
+IDSP_COHORTS = ['ARI', 'ADD']
+AGE_SCHEME = 'age_idsp'
+SEXES = ['M', 'F']
+OUTPUT_DIR = 'idsp_reports'
+LINE_LIST_COLUMNS = ['ip_number', 'pr_number', 'patient_name', 'age', 'gender', 'department', 'ward/bed',
+                     'admission_datetime', 'discharge_time', 'diagnosis', 'icd_code']
+CHUNK_ROWS = 10000
+
+
+def epi_weeks(dates):
+    """Assign each date to its IDSP reporting week (Monday to Sunday)
+
+    Returns (week code per row, -1 where the date is missing; DataFrame of the
+    weeks from the first to the last date with epi_week label, week_start and
+    week_end). Labels are ISO year-week, computed once per week.
+    """
+    days = pd.to_datetime(dates).to_numpy(dtype='datetime64[D]')
+    known = ~np.isnat(days)
+    day_numbers = days.astype(np.int64)
+    week_numbers = (day_numbers + 3) // 7  # 1970-01-01 was a Thursday, so weeks start on Monday
+    if not known.any():
+        return np.full(len(days), -1, dtype=np.int64), pd.DataFrame(columns=['epi_week', 'week_start', 'week_end'])
+    first = week_numbers[known].min()
+    codes = np.where(known, week_numbers - first, -1)
+
+    starts = pd.to_datetime(((np.arange(first, week_numbers[known].max() + 1) * 7) - 3).astype('datetime64[D]'))
+    iso = starts.isocalendar()
+    weeks = pd.DataFrame({
+        'epi_week': [f"{year}-W{week:02d}" for year, week in zip(iso['year'], iso['week'])],
+        'week_start': starts.date,
+        'week_end': (starts + pd.Timedelta(days=6)).date,
+    })
+    return codes, weeks
+
+
+def report_dates(df, date_col='admission_datetime', fallback_col='admission_date'):
+    """Admission instant per row, falling back to the IP-number date where the time of day is missing"""
+    dates = pd.to_datetime(df[date_col])
+    if fallback_col in df.columns:
+        dates = dates.fillna(pd.to_datetime(df[fallback_col]))
+    return dates
+
+
+def pform_counts(df, cohort_masks, cohorts=IDSP_COHORTS, date_col='admission_datetime'):
+    """Weekly P-form style case counts per cohort by age band and sex
+
+    One bincount over (cohort, week, age band, sex) covers every week in the
+    data, including nil weeks. Rows of unknown age are only counted in
+    'Age unknown' and 'Total'; unknown sex only in the band total.
+    """
+    week_codes, weeks = epi_weeks(report_dates(df, date_col))
+    if code_column(AGE_SCHEME) in df.columns:
+        age_codes = df[code_column(AGE_SCHEME)].to_numpy()
+    else:
+        age_codes = bin_codes(df[['age']], {AGE_SCHEME: BIN_REGISTRY[AGE_SCHEME]})[code_column(AGE_SCHEME)].to_numpy()
+    bands = BIN_REGISTRY[AGE_SCHEME]['labels']
+    sex_codes = pd.Categorical(df['gender'], categories=SEXES).codes
+
+    n_weeks, n_bands, n_sexes = len(weeks), len(bands) + 1, len(SEXES) + 1
+    band = np.where(age_codes < 0, len(bands), age_codes)
+    sex = np.where(sex_codes < 0, len(SEXES), sex_codes)
+    rows, cohort = np.nonzero(cohort_masks[cohorts].to_numpy(dtype=bool))
+    keep = week_codes[rows] >= 0
+    rows, cohort = rows[keep], cohort[keep]
+    cells = ((cohort * n_weeks + week_codes[rows]) * n_bands + band[rows]) * n_sexes + sex[rows]
+    counts = np.bincount(cells, minlength=len(cohorts) * n_weeks * n_bands * n_sexes)
+    counts = counts.reshape(len(cohorts) * n_weeks, n_bands, n_sexes)
+
+    table = pd.concat([weeks] * len(cohorts), ignore_index=True)
+    table.insert(1, 'cohort', np.repeat(cohorts, n_weeks))
+    for b, label in enumerate(bands):
+        for s, sex_label in enumerate(SEXES):
+            table[f'{label} {sex_label}'] = counts[:, b, s]
+        table[f'{label} Total'] = counts[:, b, :].sum(axis=1)
+    table['Age unknown'] = counts[:, len(bands), :].sum(axis=1)
+    table['Total'] = counts.sum(axis=(1, 2))
+    return table
+
+
+def line_list_rows(df, cohort_masks, cohorts=IDSP_COHORTS, date_col='admission_datetime', header=True):
+    """Yield the line list (header first) ordered by week, cohort and admission time
+
+    The order is one argsort over the cohort cases; rows are then pulled from
+    the frame CHUNK_ROWS at a time, so only one chunk is materialised.
+    """
+    dates = report_dates(df, date_col)
+    week_codes, weeks = epi_weeks(dates)
+    columns = [c for c in LINE_LIST_COLUMNS if c in df.columns]
+    positions = df.columns.get_indexer(columns)
+    if header:
+        yield ['epi_week', 'cohort'] + columns
+
+    rows, cohort = np.nonzero(cohort_masks[cohorts].to_numpy(dtype=bool))
+    keep = week_codes[rows] >= 0
+    rows, cohort = rows[keep], cohort[keep]
+    order = np.lexsort((dates.to_numpy()[rows], cohort, week_codes[rows]))
+    rows, cohort = rows[order], cohort[order]
+    week_labels = weeks['epi_week'].to_numpy()
+    cohort_labels = np.asarray(cohorts, dtype=object)
+    for start in range(0, len(rows), CHUNK_ROWS):
+        chunk = rows[start:start + CHUNK_ROWS]
+        values = df.iloc[chunk, positions].astype(object).where(lambda frame: frame.notna(), None).to_numpy()
+        labels = zip(week_labels[week_codes[chunk]], cohort_labels[cohort[start:start + CHUNK_ROWS]])
+        for (week, name), row in zip(labels, values):
+            yield [week, name] + list(row)
+
+
+def write_reports(df, cohort_masks, cohorts=IDSP_COHORTS, output_dir=OUTPUT_DIR, date_col='admission_datetime'):
+    """Write the weekly P-form counts and line list for every week as CSV and one XLSX workbook
+
+    Returns the paths written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pform = pform_counts(df, cohort_masks, cohorts, date_col)
+    paths = {
+        'pform_csv': os.path.join(output_dir, 'idsp_weekly_pform.csv'),
+        'line_list_csv': os.path.join(output_dir, 'idsp_line_list.csv'),
+        'xlsx': os.path.join(output_dir, 'IDSP_Weekly_Report.xlsx'),
+    }
+    pform.to_csv(paths['pform_csv'], index=False)
+    # Build the line list once; the CSV takes every row and each cohort's sheet its own, in the same order
+    header, *rows = line_list_rows(df, cohort_masks, cohorts, date_col)
+    with open(paths['line_list_csv'], 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    sheets = {name: [header] for name in cohorts}
+    for row in rows:
+        sheets[row[1]].append(row)
+
+    wb = StreamingWorkbook()
+    wb.add_dataframe_sheet("P-form Weekly", pform)
+    for name in cohorts:
+        wb.add_rows_sheet(f"{name} Line List", sheets[name])
+    wb.save(paths['xlsx'])
+    return paths
+
+
+if __name__ == "__main__":
+    from cohorts import match_cohorts
+    from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex
+    from instrumentation import StageTrace
+
+    parser = argparse.ArgumentParser(description="Write IDSP-style weekly P-form counts and line lists for ARI and ADD")
+    parser.add_argument('--cohorts', nargs='+', default=IDSP_COHORTS, help="registered cohorts to report")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="directory for the CSV and XLSX reports")
+    args = parser.parse_args()
+
+    trace = StageTrace('idsp_report')
+    with trace.stage('load'):
+        df = load_ipd_data()
+    with trace.stage('derive', rows=len(df)):
+        df['admission_date'] = decode_ip_dates(df['ip_number'])
+        df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
+        df['discharge_time'] = parse_export_times(df['discharge_time'])
+        demographics = parse_age_sex(df['a/s'])
+        df['age'] = demographics['age_years']
+        df['gender'] = demographics['gender']
+        df = df.join(bin_codes(df))
+    with trace.stage('cohort', rows=len(df)):
+        cohort_masks = match_cohorts(df['diagnosis'])
+    with trace.stage('write', rows=int(cohort_masks[args.cohorts].any(axis=1).sum())):
+        paths = write_reports(df, cohort_masks, args.cohorts, args.output_dir)
+    trace.finish()
+
+    for name in args.cohorts:
+        print(f"{name}: {int(cohort_masks[name].sum())} cases")
+    for path in paths.values():
+        print(f"Saved {path}")
@@ -0,0 +1,177 @@
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+TRACE_DIR = '.ipd_traces'
+
+
+class StageTrace:
+    """Record wall time, CPU time, peak traced memory and row counts per script stage
+
+    Stages can be wrapped with the stage() context manager or timed() decorator,
+    or marked sequentially in flat scripts with begin()/end(). finish() writes the
+    run to <trace_dir>/<name>.json, appends a one-line summary to
+    <name>.history.jsonl for comparing runs, and with speedscope=True (or
+    IPD_SPEEDSCOPE=1) also writes <name>.speedscope.json. Memory tracking uses
+    tracemalloc and can be switched off with memory=False or IPD_TRACE_MEMORY=0.
+    """
+
+    def __init__(self, name, trace_dir=TRACE_DIR, memory=None, speedscope=None):
+        self.name = name
+        self.trace_dir = trace_dir
+        self.memory = os.environ.get('IPD_TRACE_MEMORY', '1') != '0' if memory is None else memory
+        self.speedscope = os.environ.get('IPD_SPEEDSCOPE') == '1' if speedscope is None else speedscope
+        self.started = datetime.now().isoformat(timespec='seconds')
+        self.records = []
+        self._stack = []
+        self._open = None
+        self._origin = time.perf_counter()
+        self._started_tracing = self.memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def _push(self, name, rows):
+        if self.memory:
+            # Fold the enclosing stage's peak so far in before the counter is reset
+            if self._stack:
+                parent = self._stack[-1]
+                parent['_peak'] = max(parent['_peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        record = {
+            'name': name,
+            'depth': len(self._stack),
+            'rows': rows,
+            'start_s': time.perf_counter() - self._origin,
+            '_wall': time.perf_counter(),
+            '_cpu': time.process_time(),
+            '_peak': 0,
+        }
+        self._stack.append(record)
+        return record
+
+    def _pop(self, record, rows=None, error=None):
+        wall = time.perf_counter() - record.pop('_wall')
+        cpu = time.process_time() - record.pop('_cpu')
+        peak = record.pop('_peak')
+        if self.memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            if len(self._stack) > 1:
+                self._stack[-2]['_peak'] = max(self._stack[-2]['_peak'], peak)
+        self._stack.remove(record)
+        record.update({
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_mb': round(peak / 2**20, 3) if self.memory else None,
+        })
+        if rows is not None:
+            record['rows'] = int(rows)
+        if error is not None:
+            record['error'] = error
+        self.records.append(record)
+        return record
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time the enclosed block; the yielded dict's 'rows' may be set inside the block"""
+        record = self._push(name, rows)
+        try:
+            yield record
+        except Exception as e:
+            self._pop(record, error=f"{type(e).__name__}: {e}")
+            raise
+        self._pop(record)
+
+    def timed(self, name=None):
+        """Decorator form of stage(); rows is taken from len() of the result when available"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__) as record:
+                    result = func(*args, **kwargs)
+                    if hasattr(result, '__len__'):
+                        record['rows'] = len(result)
+                return result
+            return wrapper
+        return decorate
+
+    def begin(self, name, rows=None):
+        """Start a sequential stage, ending the previous one started with begin()"""
+        self.end()
+        self._open = self._push(name, rows)
+
+    def end(self, rows=None):
+        """End the current sequential stage, optionally recording its row count"""
+        if self._open is not None:
+            self._pop(self._open, rows)
+            self._open = None
+
+    def summary(self):
+        """Per-stage totals keyed by stage name, as stored in the history file"""
+        return {r['name']: {key: r.get(key) for key in ('wall_s', 'cpu_s', 'peak_mb', 'rows')} for r in self.records}
+
+    def finish(self, rows=None, report=True):
+        """End any open stage, write the trace files and print the per-stage report"""
+        self.end(rows)
+        total = time.perf_counter() - self._origin
+        if self._started_tracing:
+            tracemalloc.stop()
+        os.makedirs(self.trace_dir, exist_ok=True)
+        base = os.path.join(self.trace_dir, self.name)
+        stages = sorted(self.records, key=lambda r: r['start_s'])
+        with open(base + '.json', 'w') as f:
+            json.dump({'name': self.name, 'started': self.started, 'total_wall_s': round(total, 6),
+                       'stages': stages}, f, indent=2)
+        with open(base + '.history.jsonl', 'a') as f:
+            f.write(json.dumps({'started': self.started, 'total_wall_s': round(total, 6),
+                                'stages': self.summary()}) + '\n')
+        if self.speedscope:
+            write_speedscope(stages, base + '.speedscope.json', self.name, total)
+        if report:
+            print_stage_report(stages, total)
+        return stages
+
+
+def write_speedscope(stages, path, name, total_s):
+    """Write stage records as a speedscope evented profile (open at https://www.speedscope.app)"""
+    frames, frame_index, events = [], {}, []
+    for record in stages:
+        if record['name'] not in frame_index:
+            frame_index[record['name']] = len(frames)
+            frames.append({'name': record['name']})
+        frame = frame_index[record['name']]
+        start_ms = record['start_s'] * 1000
+        events.append((start_ms, 1, record['depth'], {'type': 'O', 'frame': frame, 'at': start_ms}))
+        end_ms = start_ms + record['wall_s'] * 1000
+        events.append((end_ms, 0, -record['depth'], {'type': 'C', 'frame': frame, 'at': end_ms}))
+    # Close inner stages before outer ones at the same instant, and close before opening
+    events.sort(key=lambda e: e[:3])
+    profile = {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'evented',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': total_s * 1000,
+            'events': [e[3] for e in events],
+        }],
+    }
+    with open(path, 'w') as f:
+        json.dump(profile, f)
+
+
+def print_stage_report(stages, total_s):
+    """Print wall time, CPU time, peak memory and rows per stage"""
+    print(f"{'Stage':<30} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak (MB)':>10} {'Rows':>10}")
+    for record in stages:
+        peak = f"{record['peak_mb']:.1f}" if record['peak_mb'] is not None else '-'
+        rows = record['rows'] if record['rows'] is not None else '-'
+        label = '  ' * record['depth'] + record['name']
+        print(f"{label:<30} {record['wall_s']:>9.2f} {record['cpu_s']:>9.2f} {peak:>10} {rows:>10}")
+    print(f"Total: {total_s:.2f}s")
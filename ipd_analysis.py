@@ -2,12 +2,18 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from collections import Counter
+from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex
+from instrumentation import StageTrace
+from binning import bin_codes, bin_labels
 import warnings
 warnings.filterwarnings('ignore')
 
+trace = StageTrace('ipd_analysis')
+
+trace.begin('load')
 # Load the data
 try:
-    df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
+    df = load_ipd_data()
     print("Data loaded successfully")
     print(f"Shape: {df.shape}")
     print(f"Columns: {list(df.columns)}")
@@ -19,39 +25,23 @@ except Exception as e:
     print(f"Error loading data: {e}")
     exit()
 
-# Clean column names (remove spaces, lowercase)
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-
+trace.end(rows=len(df))
+trace.begin('clean', rows=len(df))
 # Basic data cleaning
 print("\nMissing values:")
 print(df.isnull().sum())
 
+trace.begin('derive', rows=len(df))
 # Extract correct admission date from IP Number (column C) and Admission Time (column E)
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            from datetime import datetime
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
+df['admission_date'], ip_diagnostics = decode_ip_dates(df['ip_number'], return_diagnostics=True)
+print(f"IP numbers with no decodable admission date: {ip_diagnostics['invalid']} "
+      f"(malformed: {ip_diagnostics['malformed']}, invalid date: {ip_diagnostics['invalid_date']}, "
+      f"missing: {ip_diagnostics['missing']})")
 
 # Create proper admission datetime by combining date from IP and time from Admission Time
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
-df['admission_time_only'] = pd.to_datetime(df['admission_time'], errors='coerce').dt.time
+df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
 
-# Combine date and time for complete admission datetime
-df['admission_datetime'] = pd.to_datetime(df.apply(
-    lambda row: f"{row['admission_date'].strftime('%Y-%m-%d')} {row['admission_time_only']}" if pd.notna(row['admission_date']) and pd.notna(row['admission_time_only']) else None, axis=1
-), errors='coerce')
-
-df['discharge_time'] = pd.to_datetime(df['discharge_time'], errors='coerce')
+df['discharge_time'] = parse_export_times(df['discharge_time'])
 
 print(f"Admission date range: {df['admission_datetime'].min()} to {df['admission_datetime'].max()}")
 
@@ -63,15 +53,15 @@ print("="*50)
 # Parse A/S column for age and gender
 if 'a/s' in df.columns:
     # Extract age and gender from A/S (format: "25Y/F")
-    df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-    df['gender'] = df['a/s'].str.extract(r'/([MF])')
+    demographics = parse_age_sex(df['a/s'])
+    df['age'] = demographics['age_years']
+    df['gender'] = demographics['gender']
 
     print(f"Age statistics:")
     print(df['age'].describe())
     print(f"Age distribution:")
-    age_bins = [0, 18, 35, 50, 65, 100]
-    age_labels = ['0-18', '19-35', '36-50', '51-65', '65+']
-    df['age_group'] = pd.cut(df['age'], bins=age_bins, labels=age_labels, right=False)
+    df = df.join(bin_codes(df[['age']]))
+    df['age_group'] = bin_labels(df, 'age_broad')
     print(df['age_group'].value_counts())
 
     print(f"\nGender distribution:")
@@ -87,11 +77,11 @@ if 'admission_datetime' in df.columns and 'discharge_time' in df.columns:
     print("Length of stay statistics:")
     print(df['length_of_stay'].describe())
     print("Length of stay distribution:")
-    los_bins = [0, 1, 3, 7, 14, 30, 1000]
-    los_labels = ['1 day', '2-3 days', '4-7 days', '8-14 days', '15-30 days', '30+ days']
-    df['los_category'] = pd.cut(df['length_of_stay'], bins=los_bins, labels=los_labels, right=False)
+    df = df.join(bin_codes(df[['length_of_stay']]))
+    df['los_category'] = bin_labels(df, 'los')
     print(df['los_category'].value_counts())
 
+trace.begin('aggregate', rows=len(df))
 # Diagnosis Analysis
 print("\n" + "="*50)
 print("DIAGNOSIS ANALYSIS")
@@ -141,6 +131,7 @@ if 'admission_datetime' in df.columns:
     print("\nAdmissions by day of week:")
     print(df['admission_day'].value_counts())
 
+trace.begin('write', rows=len(df))
 # Save results to CSV files
 try:
     # Save basic statistics
@@ -191,4 +182,6 @@ try:
 except Exception as e:
     print(f"Error saving results: {e}")
 
+trace.finish()
+
 print("\nAnalysis complete!")
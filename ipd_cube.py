@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Dimensions every cube cell is keyed on (after the cohort level)
+CUBE_DIMENSIONS = ['department', 'age_group', 'gender', 'admission_month']
+
+# LOS categories shared by the dashboards (bins are closed on the left, as pd.cut(right=False))
+LOS_BINS = [0, 1, 3, 7, 14, 30, 1000]
+LOS_LABELS = ['1 day', '2-3 days', '4-7 days', '8-14 days', '15-30 days', '30+ days']
+
+ALL_COHORT = 'ALL'
+
+
+def build_cube(df, cohort_masks=None, dimensions=CUBE_DIMENSIONS, los_col='length_of_stay',
+               los_range=(0, 365), los_bins=LOS_BINS, los_labels=LOS_LABELS):
+    """Pre-aggregate admissions and LOS over cohort x dimensions in a single groupby
+
+    Each cell holds the admission count plus count, sum, sum of squares, min, max
+    and a histogram of the LOS values inside los_range (None keeps every
+    non-missing LOS). Admissions in several cohorts appear once per cohort; the
+    ALL cohort always covers every row. Missing dimension values are kept as
+    their own cells so roll-ups over other dimensions stay complete.
+    """
+    cohort_names = [ALL_COHORT]
+    positions = [np.arange(len(df))]
+    if cohort_masks is not None:
+        for name in cohort_masks.columns:
+            cohort_names.append(name)
+            positions.append(np.flatnonzero(cohort_masks[name].to_numpy()))
+    lengths = [len(p) for p in positions]
+    positions = np.concatenate(positions)
+
+    cells = df[list(dimensions)].iloc[positions].reset_index(drop=True)
+    cells.insert(0, 'cohort', pd.Categorical.from_codes(np.repeat(np.arange(len(cohort_names)), lengths),
+                                                        categories=cohort_names))
+
+    los = df[los_col].to_numpy(dtype=float)[positions]
+    valid = ~np.isnan(los)
+    if los_range is not None:
+        valid &= (los >= los_range[0]) & (los <= los_range[1])
+    los_valid = np.where(valid, los, np.nan)
+
+    cells['admissions'] = 1
+    cells['los_n'] = valid.astype(np.int64)
+    cells['los_sum'] = np.where(valid, los, 0.0)
+    cells['los_sumsq'] = np.where(valid, los * los, 0.0)
+    cells['los_min'] = los_valid
+    cells['los_max'] = los_valid
+
+    bin_codes = np.searchsorted(los_bins, los_valid, side='right') - 1
+    in_bins = valid & (bin_codes >= 0) & (bin_codes < len(los_labels))
+    for i, label in enumerate(los_labels):
+        cells[label] = (in_bins & (bin_codes == i)).astype(np.int64)
+
+    aggregations = {col: 'sum' for col in ['admissions', 'los_n', 'los_sum', 'los_sumsq'] + list(los_labels)}
+    aggregations.update({'los_min': 'min', 'los_max': 'max'})
+    cube = cells.groupby(['cohort'] + list(dimensions), observed=True, dropna=False, sort=True).agg(aggregations)
+    cube.attrs['los_labels'] = list(los_labels)
+    return cube
+
+
+def _finish(totals, los_labels):
+    # Turn additive cell totals into count/mean/std columns
+    n = totals['los_n']
+    mean = totals['los_sum'] / n.where(n > 0)
+    variance = (totals['los_sumsq'] - totals['los_sum'] * mean) / (n - 1).where(n > 1)
+    return pd.DataFrame({
+        'admissions': totals['admissions'],
+        'count': n,
+        'mean': mean,
+        'std': np.sqrt(variance.clip(lower=0)),
+        'min': totals['los_min'],
+        'max': totals['los_max'],
+        **{label: totals[label] for label in los_labels},
+    })
+
+
+def rollup(cube, by=(), cohort=ALL_COHORT):
+    """Roll the cube up to the given dimension(s) for one cohort
+
+    Returns admissions, LOS count/mean/std/min/max and the LOS histogram per
+    group (missing keys dropped, categorical levels kept in category order).
+    With no dimensions a single-row summary indexed by the cohort is returned.
+    """
+    los_labels = cube.attrs.get('los_labels', LOS_LABELS)
+    cells = cube.xs(cohort, level='cohort')
+    aggregations = {col: 'sum' for col in ['admissions', 'los_n', 'los_sum', 'los_sumsq'] + los_labels}
+    aggregations.update({'los_min': 'min', 'los_max': 'max'})
+    by = [by] if isinstance(by, str) else list(by)
+    if not by:
+        totals = cells.groupby(np.repeat(cohort, len(cells))).agg(aggregations)
+    else:
+        totals = cells.groupby(level=by, observed=False, dropna=True).agg(aggregations)
+    return _finish(totals, los_labels)
+
+
+def los_histogram(cube, cohort=ALL_COHORT):
+    """Return the LOS category counts for one cohort as a Series in bin order"""
+    los_labels = cube.attrs.get('los_labels', LOS_LABELS)
+    return rollup(cube, cohort=cohort)[los_labels].iloc[0].astype(np.int64).rename_axis('los_category')
+
+
+def los_table(cube, rows, by, cohort=ALL_COHORT, los_col='length_of_stay'):
+    """Return rounded mean/median/count LOS per group
+
+    Mean and count come from the cube; medians are not additive, so they are
+    taken from the matching rows. rows must hold the same LOS values the cube
+    counted for the cohort (e.g. filtered to its los_range); a group whose
+    row count differs from the cube's raises ValueError instead of mixing the
+    two in one row.
+    """
+    table = rollup(cube, by, cohort)[['mean', 'count']]
+    groups = rows.groupby(by, observed=False)[los_col]
+    counts = groups.count().reindex(table.index, fill_value=0)
+    mismatched = counts.index[counts.to_numpy() != table['count'].to_numpy()]
+    if len(mismatched):
+        raise ValueError(f"LOS rows do not match the cube for {cohort} by {by}: {', '.join(map(str, mismatched))}")
+    table.insert(1, 'median', groups.median())
+    return table.round(1)
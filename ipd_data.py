@@ -0,0 +1,199 @@
+import hashlib
+import os
+import re
+import numpy as np
+import pandas as pd
+
+DATA_FILE = 'Compiled IPD case data SIMSRH_4months.xls'
+CACHE_DIR = '.ipd_cache'
+
+# A/S values look like "25Y/F"; infants are recorded in months ("8M/F") or days ("3D/M")
+AGE_SEX_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([YMD])?\s*(?:/\s*([MF]))?')
+AGE_UNITS = ['Y', 'M', 'D']
+AGE_UNIT_YEARS = np.array([1.0, 1 / 12, 1 / 365.25], dtype=np.float32)
+GENDERS = ['F', 'M']
+# Admission/Discharge Time as exported (day first, 12-hour clock)
+EXPORT_TIME_FORMAT = '%d-%m-%Y %I:%M %p'
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clean_columns(df):
+    """Normalise export column names (strip, lowercase, spaces to underscores)"""
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    return df
+
+
+def _read_cache(cache_base):
+    # Parquet needs pyarrow/fastparquet; fall back to pickle when neither is installed
+    if os.path.exists(cache_base + '.parquet'):
+        try:
+            df = pd.read_parquet(cache_base + '.parquet')
+            # Parquet round-trips missing strings as None; restore NaN like read_excel
+            obj_cols = df.select_dtypes('object').columns
+            df[obj_cols] = df[obj_cols].where(df[obj_cols].notna(), np.nan)
+            return df
+        except Exception:
+            pass
+    if os.path.exists(cache_base + '.pkl'):
+        try:
+            return pd.read_pickle(cache_base + '.pkl')
+        except Exception:
+            pass
+    return None
+
+
+def _write_cache(df, cache_base):
+    os.makedirs(os.path.dirname(cache_base), exist_ok=True)
+    try:
+        df.to_parquet(cache_base + '.parquet', index=False)
+    except ImportError:
+        df.to_pickle(cache_base + '.pkl')
+
+
+def load_ipd_data(path=DATA_FILE, cache_dir=CACHE_DIR, use_cache=True):
+    """Load the IPD workbook with cleaned column names, parsing the .xls only once per file version
+
+    The cleaned frame is cached under cache_dir keyed by the SHA-256 of the source
+    file, so any edit to the workbook produces a new cache entry automatically.
+    """
+    if not use_cache:
+        return clean_columns(pd.read_excel(path))
+
+    cache_base = os.path.join(cache_dir, f"ipd_{file_digest(path)[:16]}")
+    df = _read_cache(cache_base)
+    if df is not None:
+        return df
+
+    df = clean_columns(pd.read_excel(path))
+    try:
+        _write_cache(df, cache_base)
+    except Exception as e:
+        print(f"Warning: could not write IPD cache ({e})")
+    return df
+
+
+def decode_ip_dates(ip_numbers, return_diagnostics=False):
+    """Decode admission dates from IP numbers (IPYYMMDDnnnn) in a single vectorized pass
+
+    Values that are missing, malformed or encode an impossible calendar date become NaT.
+    With return_diagnostics=True a (dates, diagnostics) tuple is returned, where
+    diagnostics counts total, missing, malformed and invalid_date entries.
+    """
+    values = ip_numbers.to_numpy(dtype=object)
+    missing = pd.isna(values)
+    n = len(values)
+
+    # Fixed-width unicode array viewed as a (rows x 16) matrix of code points;
+    # only the first 9 characters matter, shorter strings are NUL padded
+    text = np.where(missing, '', values).astype(str).astype('U16')
+    codes = text.view(np.uint32).reshape(n, 16)
+    digits = codes[:, 2:8].astype(np.int64) - ord('0')
+    well_formed = ((codes[:, 0] == ord('I')) & (codes[:, 1] == ord('P')) & (codes[:, 8] != 0)
+                   & ((digits >= 0) & (digits <= 9)).all(axis=1))
+
+    year = 2000 + digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 2] * 10 + digits[:, 3]
+    day = digits[:, 4] * 10 + digits[:, 5]
+    month_ok = well_formed & (month >= 1) & (month <= 12) & (day >= 1)
+
+    month_start = ((year - 1970) * 12 + np.clip(month, 1, 12) - 1).astype('datetime64[M]')
+    dates = month_start.astype('datetime64[D]') + np.clip(day - 1, 0, 30).astype('timedelta64[D]')
+    # Day overflow (e.g. 30 Feb) rolls into the next month, so reject those rows
+    valid = month_ok & (dates.astype('datetime64[M]') == month_start)
+    dates = np.where(valid, dates, np.datetime64('NaT')).astype('datetime64[ns]')
+    result = pd.Series(dates, index=ip_numbers.index, name=ip_numbers.name)
+
+    if not return_diagnostics:
+        return result
+    malformed = int((~missing & ~well_formed).sum())
+    diagnostics = {
+        'total': n,
+        'missing': int(missing.sum()),
+        'malformed': malformed,
+        'invalid_date': int((well_formed & ~valid).sum()),
+        'invalid': int((~missing & ~valid).sum()),
+    }
+    return result, diagnostics
+
+
+def parse_export_times(values):
+    """Parse Admission/Discharge Time values with EXPORT_TIME_FORMAT
+
+    An explicit format keeps pandas on its vectorized parser instead of
+    per-value dateutil inference, which reads day-first dates month first.
+    Missing or non-conforming values are NaT.
+    """
+    return pd.to_datetime(values, format=EXPORT_TIME_FORMAT, errors='coerce')
+
+
+def combine_admission_datetime(admission_date, admission_time):
+    """Combine IP-derived admission dates with the time of day from Admission Time
+
+    Pure datetime64/timedelta64 arithmetic: date + (time - midnight). Rows missing
+    either part, or whose Admission Time is not in EXPORT_TIME_FORMAT, are NaT.
+    """
+    times = parse_export_times(admission_time)
+    time_of_day = times - times.dt.normalize()
+    return pd.to_datetime(admission_date).dt.normalize() + time_of_day
+
+
+def parse_age_sex(a_s):
+    """Parse A/S values into age value, age unit, age in years and gender in one pass
+
+    Only the distinct strings go through AGE_SEX_PATTERN; results are broadcast
+    back by factorize code. A missing unit is read as years and unparseable
+    values are NaN. Returns age_value and age_years as float32 and age_unit
+    (Y/M/D) and gender (F/M) as categoricals, on the input's index.
+    """
+    codes, uniques = pd.factorize(a_s)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.upper().str.extract(AGE_SEX_PATTERN)
+    value = parts[0].astype(np.float32).to_numpy()
+    unit = pd.Categorical(parts[1].where(parts[1].notna() | parts[0].isna(), 'Y'), categories=AGE_UNITS).codes
+    gender = pd.Categorical(parts[2], categories=GENDERS).codes
+
+    # Missing inputs (code -1) map to an extra all-missing entry at the end
+    rows = np.where(codes < 0, len(uniques), codes)
+    value = np.append(value, np.float32(np.nan))[rows]
+    unit = np.append(unit, -1).astype(np.int8)[rows]
+    gender = np.append(gender, -1).astype(np.int8)[rows]
+    age_years = np.where(unit >= 0, value * AGE_UNIT_YEARS[unit], np.nan).astype(np.float32)
+
+    return pd.DataFrame({
+        'age_value': value,
+        'age_unit': pd.Categorical.from_codes(unit, categories=AGE_UNITS),
+        'age_years': age_years,
+        'gender': pd.Categorical.from_codes(gender, categories=GENDERS),
+    }, index=a_s.index)
+
+
+def parse_ward_bed(ward_bed):
+    """Split Ward/Bed values ("M M W 1/12", "A/C SINGLE/3") into ward and bed on the last '/'
+
+    Like parse_age_sex, only the distinct strings are split. Returns a
+    categorical ward and a string bed column on the input's index; values
+    without a '/' are taken as a ward with no bed.
+    """
+    codes, uniques = pd.factorize(ward_bed)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.rsplit('/', n=1, expand=True)
+    if parts.shape[1] == 1:
+        parts[1] = np.nan
+    wards = parts[0].str.strip()
+    beds = parts[1].str.strip()
+    beds = beds.where(beds.notna(), np.nan)
+
+    ward_codes, ward_names = pd.factorize(wards, sort=True)
+    rows = np.where(codes < 0, len(uniques), codes)
+    ward_codes = np.append(ward_codes, -1)[rows]
+    beds = np.append(beds.to_numpy(dtype=object), np.nan)[rows]
+    return pd.DataFrame({
+        'ward': pd.Categorical.from_codes(ward_codes, categories=ward_names),
+        'bed': beds,
+    }, index=ward_bed.index)
@@ -0,0 +1,158 @@
+import argparse
+import contextlib
+import io
+import os
+import runpy
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from figure_jobs import default_processes, _init_worker, _reset_peak_rss, _peak_rss_mb
+
+# A document build: a name, the callables to run in order (module-level functions or
+# partials, so they pickle) and the files it is expected to write
+DocumentJob = namedtuple('DocumentJob', ['name', 'steps', 'outputs'])
+
+
+def document_job(name, *steps, outputs=()):
+    """Build a DocumentJob from one or more steps run in sequence in the same worker"""
+    return DocumentJob(name, list(steps), list(outputs))
+
+
+def run_script(path):
+    """Run a top-level document script as if it were invoked directly"""
+    runpy.run_path(path, run_name='__main__')
+
+
+def _manuscript_jobs():
+    # Imported here so listing jobs or building a subset does not need every generator's imports
+    import create_final_manuscripts_docx as final
+    import create_professional_manuscripts as professional
+    import expand_manuscript_content as expanded
+    import revise_manuscripts as revise
+    from markdown_docx import convert_markdown
+
+    return [
+        document_job('final_gi', final.create_gastroenteritis_manuscript_docx,
+                     outputs=['comprehensive_gastroenteritis_manuscript_final.docx']),
+        document_job('final_resp', final.create_respiratory_manuscript_docx,
+                     outputs=['comprehensive_respiratory_manuscript_final.docx']),
+        document_job('professional_gi', professional.create_professional_gastroenteritis_docx,
+                     outputs=['comprehensive_gastroenteritis_manuscript_professional.docx']),
+        document_job('professional_resp', professional.create_professional_respiratory_docx,
+                     outputs=['comprehensive_respiratory_manuscript_professional.docx']),
+        document_job('expanded_gi', expanded.create_expanded_gastroenteritis_docx,
+                     outputs=['comprehensive_gastroenteritis_corrected.docx']),
+        document_job('expanded_resp', expanded.create_expanded_respiratory_docx,
+                     outputs=['comprehensive_respiratory_corrected.docx']),
+        document_job('final_updated_gi', revise.update_gastroenteritis_manuscript,
+                     partial(convert_markdown, 'comprehensive_gastroenteritis_manuscript_updated.md',
+                             'comprehensive_gastroenteritis_manuscript_final_updated.docx', blank_lines=False),
+                     outputs=['comprehensive_gastroenteritis_manuscript_updated.md',
+                              'comprehensive_gastroenteritis_manuscript_final_updated.docx']),
+        document_job('final_updated_resp', revise.update_respiratory_manuscript,
+                     partial(convert_markdown, 'comprehensive_respiratory_manuscript_updated.md',
+                             'comprehensive_respiratory_manuscript_final_updated.docx', blank_lines=False),
+                     outputs=['comprehensive_respiratory_manuscript_updated.md',
+                              'comprehensive_respiratory_manuscript_final_updated.docx']),
+        document_job('simsrh', partial(run_script, 'create_docx_manuscript.py'),
+                     outputs=['simsrh_manuscript_python_docx.docx']),
+        document_job('ari_submission', partial(run_script, 'create_ari_submission_docx.py'),
+                     outputs=['ari_final_submission_with_projects.docx']),
+        document_job('add_submission', partial(run_script, 'create_add_submission_docx.py'),
+                     outputs=['add_final_submission_with_projects.docx']),
+    ]
+
+
+def _build(job):
+    measured = _reset_peak_rss()
+    log = io.StringIO()
+    wall, cpu = time.perf_counter(), time.process_time()
+    error = None
+    try:
+        with contextlib.redirect_stdout(log):
+            for step in job.steps:
+                step()
+        missing = [path for path in job.outputs if not os.path.exists(path)]
+        if missing:
+            error = f"Missing output(s): {', '.join(missing)}"
+    except (Exception, SystemExit) as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        'name': job.name,
+        'outputs': job.outputs,
+        'seconds': time.perf_counter() - wall,
+        'cpu_seconds': time.process_time() - cpu,
+        'peak_rss_mb': _peak_rss_mb() if measured else float('nan'),
+        'error': error,
+        'log': log.getvalue(),
+    }
+
+
+def build_documents(jobs, processes=None, report=True):
+    """Build DocumentJobs in a process pool, one job per task
+
+    Each job's printed output is captured instead of interleaved. A job that
+    raises (or exits) is recorded with its error and the others carry on.
+    Returns one dict per job with name, outputs, wall and CPU seconds, peak
+    RSS in MB, error (None on success) and captured log, in job order.
+    processes=1 builds in the current process.
+    """
+    jobs = list(jobs)
+    if processes is None:
+        processes = min(len(jobs), default_processes())
+    if processes <= 1 or len(jobs) <= 1:
+        _init_worker(None)
+        results = [_build(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(None,)) as pool:
+            futures = [pool.submit(_build, job) for job in jobs]
+            results = []
+            for job, future in zip(jobs, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:  # the worker itself died
+                    results.append({'name': job.name, 'outputs': job.outputs, 'seconds': float('nan'),
+                                    'cpu_seconds': float('nan'), 'peak_rss_mb': float('nan'),
+                                    'error': f"{type(e).__name__}: {e}", 'log': ''})
+
+    if report:
+        print_build_report(results)
+    return results
+
+
+def print_build_report(results):
+    """Print wall/CPU time and peak RSS per document"""
+    print(f"{'Document':<22} {'Wall (s)':>9} {'CPU (s)':>9} {'Peak RSS (MB)':>14}")
+    for result in results:
+        status = f"  FAILED: {result['error']}" if result['error'] else ''
+        print(f"{result['name']:<22} {result['seconds']:>9.2f} {result['cpu_seconds']:>9.2f} "
+              f"{result['peak_rss_mb']:>14.1f}{status}")
+    failed = sum(1 for r in results if r['error'])
+    print(f"Total build time: {sum(r['seconds'] for r in results):.2f}s across {len(results)} documents"
+          f"{f', {failed} failed' if failed else ''}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build every manuscript variant concurrently")
+    parser.add_argument('names', nargs='*', help="documents to build (default: all)")
+    parser.add_argument('--jobs', type=int, default=None, help="number of worker processes")
+    parser.add_argument('--list', action='store_true', help="list the documents and their outputs")
+    args = parser.parse_args()
+
+    jobs = _manuscript_jobs()
+    if args.list:
+        for job in jobs:
+            print(f"{job.name}: {', '.join(job.outputs)}")
+        sys.exit(0)
+    if args.names:
+        unknown = set(args.names) - {job.name for job in jobs}
+        if unknown:
+            parser.error(f"unknown document(s): {', '.join(sorted(unknown))}")
+        jobs = [job for job in jobs if job.name in args.names]
+
+    start = time.perf_counter()
+    results = build_documents(jobs, processes=args.jobs)
+    print(f"Elapsed: {time.perf_counter() - start:.2f}s")
+    sys.exit(1 if any(r['error'] for r in results) else 0)
@@ -0,0 +1,106 @@
+import argparse
+import json
+import re
+import numpy as np
+from binning import BIN_REGISTRY
+
+STATS_FILE = 'tables/manuscript_stats.json'
+# LOS values outside this range (days) are treated as data errors, as in Table 6
+LOS_VALID_RANGE = (0, 200)
+
+# {{name}} or {{name:format_spec}}, e.g. {{cohort.ADD.n}}, {{age.mean:.2f}}
+PLACEHOLDER = re.compile(r'\{\{\s*([^{}:\s]+)\s*(?::([^{}]*))?\}\}')
+
+
+def _describe(prefix, values, stats):
+    values = values.dropna()
+    stats[f'{prefix}.n'] = int(len(values))
+    if len(values):
+        stats.update({
+            f'{prefix}.mean': float(values.mean()),
+            f'{prefix}.sd': float(values.std()),
+            f'{prefix}.median': float(values.median()),
+            f'{prefix}.q1': float(values.quantile(0.25)),
+            f'{prefix}.q3': float(values.quantile(0.75)),
+            f'{prefix}.min': float(values.min()),
+            f'{prefix}.max': float(values.max()),
+        })
+
+
+def _counts(prefix, values, total, stats, categories=None):
+    counts = values.value_counts()
+    for name in (counts.index if categories is None else categories):
+        n = int(counts.get(name, 0))
+        stats[f'{prefix}.{name}.n'] = n
+        stats[f'{prefix}.{name}.pct'] = n / total * 100 if total else 0.0
+
+
+def compute_stats(df, cohort_masks=None, age_scheme='age_broad'):
+    """Compute the named statistics manuscripts and tables refer to, as a flat {name: number} dict
+
+    Names are dotted paths: total.n; age.* and los.* (n, mean, sd, median,
+    q1, q3, min, max); age_group.<label>.n/.pct for the age_scheme bins;
+    gender.<M|F>.n/.pct; department.<name>.n/.pct; and per cohort
+    cohort.<name>.n/.pct plus its age.* and gender.* figures. Expects the
+    derived age, gender, length_of_stay and <age_scheme>_code columns.
+    """
+    total = len(df)
+    stats = {'total.n': total}
+    _describe('age', df['age'], stats)
+    los = df['length_of_stay']
+    _describe('los', los[(los >= LOS_VALID_RANGE[0]) & (los <= LOS_VALID_RANGE[1])], stats)
+
+    labels = BIN_REGISTRY[age_scheme]['labels']
+    codes = df[f'{age_scheme}_code'].to_numpy()
+    age_counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    for label, n in zip(labels, age_counts):
+        stats[f'age_group.{label}.n'] = int(n)
+        stats[f'age_group.{label}.pct'] = n / total * 100 if total else 0.0
+    _counts('gender', df['gender'], total, stats, categories=['M', 'F'])
+    _counts('department', df['department'], total, stats)
+
+    if cohort_masks is not None:
+        for name in cohort_masks.columns:
+            members = df[cohort_masks[name].to_numpy()]
+            stats[f'cohort.{name}.n'] = len(members)
+            stats[f'cohort.{name}.pct'] = len(members) / total * 100 if total else 0.0
+            _describe(f'cohort.{name}.age', members['age'], stats)
+            _counts(f'cohort.{name}.gender', members['gender'], len(members), stats, categories=['M', 'F'])
+    return stats
+
+
+def save_stats(stats, path=STATS_FILE):
+    with open(path, 'w') as f:
+        json.dump(stats, f, indent=2, sort_keys=True)
+
+
+def load_stats(path=STATS_FILE):
+    with open(path) as f:
+        return json.load(f)
+
+
+def render(template, stats):
+    """Fill {{name}} / {{name:spec}} placeholders; floats without a spec get one decimal place"""
+    def value(match):
+        name, spec = match.group(1), match.group(2)
+        if name not in stats:
+            raise KeyError(f"Template refers to unknown statistic {name!r}")
+        number = stats[name]
+        if spec is None:
+            spec = '.1f' if isinstance(number, float) else ''
+        return format(number, spec)
+    return PLACEHOLDER.sub(value, template)
+
+
+def render_rows(rows, stats):
+    """Render a list of (label, template) table rows into (label, text) rows"""
+    return [(label, render(template, stats)) for label, template in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the named statistics templates can refer to")
+    parser.add_argument('--stats', default=STATS_FILE, help="statistics JSON written by publication_tables.py")
+    args = parser.parse_args()
+
+    for name, number in sorted(load_stats(args.stats).items()):
+        print(f"{name} = {number}")
@@ -0,0 +1,155 @@
+import argparse
+import os
+import re
+from docx import Document
+from docx.shared import Pt
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.enum.style import WD_STYLE_TYPE
+from docx_images import add_picture, IMAGE_WIDTH
+from docx_tables import add_rows_table
+
+# Heading level -> (style name, font size in pt, space after in pt); level 1 is the centred title
+HEADING_STYLES = {
+    1: ('CustomTitle', 16, 20),
+    2: ('CustomHeading1', 14, 12),
+    3: ('CustomHeading2', 12, 8),
+}
+BOLD_PATTERN = re.compile(r'\*\*(.+?)\*\*')
+
+
+def tokenize(lines):
+    """Turn Markdown lines into block tokens in a single pass
+
+    Yields ('heading', level, text), ('table', header, rows), ('image', alt,
+    path), ('bullet', text), ('text', text) and ('blank',). Only the lines of
+    the current pipe table are held at once; a table needs a header and a
+    separator line, and one without data rows yields nothing.
+    """
+    table = []
+    for raw in lines:
+        line = raw.strip()
+        if line.startswith('|'):
+            table.append(line)
+            continue
+        if table:
+            yield from _table_token(table)
+            table = []
+
+        level = len(line) - len(line.lstrip('#'))
+        if 1 <= level <= 3 and line[level:level + 1] == ' ':
+            yield ('heading', level, line[level + 1:])
+        elif line.startswith('![') and '](' in line:
+            alt, path = line[2:].split('](', 1)
+            yield ('image', alt, path[:-1])
+        elif line.startswith('* ') or line.startswith('- '):
+            yield ('bullet', line[2:])
+        elif line:
+            yield ('text', line)
+        else:
+            yield ('blank',)
+    if table:
+        yield from _table_token(table)
+
+
+def _table_token(table):
+    def cells(line):
+        return [cell.strip() for cell in line.split('|')[1:-1]]
+    rows = [cells(line) for line in table[2:]]
+    if len(table) > 1 and rows:
+        yield ('table', cells(table[0]), rows)
+
+
+def add_heading_styles(doc):
+    """Add the HEADING_STYLES paragraph styles to doc (once)"""
+    names = {style.name for style in doc.styles}
+    for level, (name, size, _) in HEADING_STYLES.items():
+        if name in names:
+            continue
+        style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+        style.font.size = Pt(size)
+        style.font.bold = True
+        if level == 1:
+            style.paragraph_format.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+
+
+def inline_runs(text):
+    """Split text on **bold** spans into (text, bold) runs"""
+    return [(part, i % 2 == 1) for i, part in enumerate(BOLD_PATTERN.split(text)) if part]
+
+
+def add_inline(paragraph, text):
+    """Append text to a paragraph, turning **bold** spans into bold runs"""
+    for part, bold in inline_runs(text):
+        paragraph.add_run(part).bold = True if bold else None
+    return paragraph
+
+
+class MarkdownDocxWriter:
+    """Render Markdown tokens into a python-docx Document
+
+    One method per token type, so a manuscript needing different formatting
+    overrides a method instead of copying the parsing loop. blank_lines=False
+    drops the empty paragraphs that Markdown blank lines otherwise produce.
+    """
+
+    def __init__(self, doc=None, blank_lines=True, image_width=IMAGE_WIDTH):
+        self.doc = Document() if doc is None else doc
+        self.blank_lines = blank_lines
+        self.image_width = image_width
+        add_heading_styles(self.doc)
+
+    def write(self, lines):
+        for token in tokenize(lines):
+            getattr(self, token[0])(*token[1:])
+        return self.doc
+
+    def heading(self, level, text):
+        name, _, space_after = HEADING_STYLES[level]
+        p = add_inline(self.doc.add_paragraph(style=name), text)
+        p.paragraph_format.space_after = Pt(space_after)
+
+    def table(self, header, rows):
+        add_rows_table(self.doc, header, ([inline_runs(value) for value in row] for row in rows))
+        if self.blank_lines:
+            self.doc.add_paragraph()  # Space after table
+
+    def image(self, alt, path):
+        if not os.path.exists(path):
+            self.doc.add_paragraph(f"[Image not found: {path}]")
+            return
+        try:
+            add_picture(self.doc, path, width=self.image_width)
+            self.doc.add_paragraph(f"Figure: {alt}")
+        except Exception:
+            self.doc.add_paragraph(f"[Image could not be loaded: {path}]")
+
+    def bullet(self, text):
+        add_inline(self.doc.add_paragraph(style='List Bullet'), text)
+
+    def text(self, text):
+        add_inline(self.doc.add_paragraph(), text)
+
+    def blank(self):
+        if self.blank_lines:
+            self.doc.add_paragraph()
+
+
+def convert_markdown(md_path, docx_path, writer=MarkdownDocxWriter, **options):
+    """Stream a Markdown manuscript line by line into a new DOCX file"""
+    renderer = writer(**options)
+    with open(md_path, 'r', encoding='utf-8') as f:
+        renderer.write(f)
+    renderer.doc.save(docx_path)
+    return docx_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert Markdown manuscripts to DOCX")
+    parser.add_argument('markdown', nargs='+', help="Markdown files; each is written next to it as .docx")
+    parser.add_argument('--no-blank-lines', action='store_true', help="do not turn blank lines into empty paragraphs")
+    args = parser.parse_args()
+
+    for md_path in args.markdown:
+        docx_path = os.path.splitext(md_path)[0] + '.docx'
+        convert_markdown(md_path, docx_path, blank_lines=not args.no_blank_lines)
+        print(f"Saved {docx_path}")
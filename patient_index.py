@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+READMISSION_WINDOW_DAYS = 30
+EPISODE_COLUMNS = ['episode', 'days_since_last_discharge', 'readmission_30d', 'cumulative_bed_days']
+
+
+def patient_episodes(df, patient_col='pr_number', admit_col='admission_datetime', discharge_col='discharge_time',
+                     los_col='length_of_stay', window_days=READMISSION_WINDOW_DAYS, fallback_col='admission_date'):
+    """Link each admission to the same patient's earlier ones (PR Number identifies the patient)
+
+    One sort by (patient, admission time) and shifted comparisons give, per
+    admission: the episode number, days since the patient's previous discharge,
+    whether it is a readmission within window_days of that discharge, and the
+    patient's bed-days so far including this stay (negative or missing LOS
+    counts as 0). Where the admission time is missing the IP-number date in
+    fallback_col is used instead. Admissions still without a patient or an
+    admission date are left unlinked (missing values); readmission_table
+    counts them. Returns the EPISODE_COLUMNS on df's index.
+    """
+    patients = pd.factorize(df[patient_col])[0]
+    admit = pd.to_datetime(df[admit_col])
+    if fallback_col in df.columns:
+        admit = admit.fillna(pd.to_datetime(df[fallback_col]))
+    admit = admit.to_numpy(dtype='datetime64[ns]')
+    discharge = pd.to_datetime(df[discharge_col]).to_numpy(dtype='datetime64[ns]')
+    los = df[los_col].to_numpy(dtype=float)
+
+    rows = np.flatnonzero((patients >= 0) & ~np.isnat(admit))
+    rows = rows[np.lexsort((admit[rows], patients[rows]))]
+    patient = patients[rows]
+    first = np.r_[True, patient[1:] != patient[:-1]]
+
+    # Position of each row's first episode, carried forward through the group
+    group_start = np.maximum.accumulate(np.where(first, np.arange(len(rows)), 0))
+    episode = np.arange(len(rows)) - group_start + 1
+
+    previous_discharge = np.r_[np.datetime64('NaT', 'ns'), discharge[rows][:-1]]
+    previous_discharge[first] = np.datetime64('NaT', 'ns')
+    gap_days = (admit[rows] - previous_discharge) / np.timedelta64(1, 'D')
+    readmitted = (gap_days >= 0) & (gap_days <= window_days)
+
+    bed_days = np.cumsum(np.where(los[rows] > 0, los[rows], 0.0))
+    cumulative = bed_days - np.r_[0.0, bed_days][group_start]
+
+    result = pd.DataFrame({
+        'episode': pd.array(np.full(len(df), pd.NA), dtype='Int16'),
+        'days_since_last_discharge': np.full(len(df), np.nan, dtype=np.float32),
+        'readmission_30d': np.zeros(len(df), dtype=bool),
+        'cumulative_bed_days': np.full(len(df), np.nan, dtype=np.float32),
+    }, index=df.index)
+    result.iloc[rows, 0] = episode
+    result.iloc[rows, 1] = gap_days.astype(np.float32)
+    result.iloc[rows, 2] = readmitted
+    result.iloc[rows, 3] = cumulative.astype(np.float32)
+    return result
+
+
+def readmission_table(df, by='department', patient_col='pr_number'):
+    """Patients, admissions and 30-day readmissions per group, plus an 'All' row
+
+    Expects the patient_episodes columns on df. Readmissions are attributed to
+    the group of the readmitting admission. Unlinked Admissions counts rows
+    patient_episodes could not place (no PR Number or admission date).
+    """
+    work = df.assign(repeat=(df['episode'] > 1).fillna(False).astype(bool),
+                     unlinked=df['episode'].isna(),
+                     readmit_gap=df['days_since_last_discharge'].where(df['readmission_30d']))
+    aggregations = {
+        'Patients': (patient_col, 'nunique'),
+        'Admissions': (patient_col, 'size'),
+        'Unlinked Admissions': ('unlinked', 'sum'),
+        'Repeat Admissions': ('repeat', 'sum'),
+        '30-day Readmissions': ('readmission_30d', 'sum'),
+        'Readmission Rate (%)': ('readmission_30d', 'mean'),
+        'Median Days to Readmission': ('readmit_gap', 'median'),
+    }
+    table = pd.concat([
+        work.groupby(by, observed=True).agg(**aggregations),
+        work.groupby(np.repeat('All', len(work))).agg(**aggregations),
+    ])
+    table.index.name = by if isinstance(by, str) else None
+    table['Readmission Rate (%)'] = (table['Readmission Rate (%)'] * 100).round(1)
+    table['Median Days to Readmission'] = table['Median Days to Readmission'].round(1)
+    return table
@@ -0,0 +1,266 @@
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from ipd_data import DATA_FILE, file_digest
+from figure_jobs import PROCESSES_ENV
+
+STATE_FILE = '.pipeline_state.json'
+LOG_DIR = '.pipeline_logs'
+
+# A pipeline stage: the command to run, the files/directories it reads and writes,
+# and stages it must wait for without hashing their outputs (e.g. the data cache)
+Stage = namedtuple('Stage', ['name', 'command', 'inputs', 'outputs', 'after'])
+
+
+def stage(name, command=None, inputs=(), outputs=(), after=()):
+    """Declare a stage; by default it runs <name>.py, which is hashed along with its local imports"""
+    if command is None:
+        command = [sys.executable, f'{name}.py']
+        inputs = [f'{name}.py'] + list(inputs)
+    return Stage(name, list(command), list(inputs), list(outputs), list(after))
+
+
+GI_MD = 'comprehensive_gastroenteritis_manuscript.md'
+RESP_MD = 'comprehensive_respiratory_manuscript.md'
+
+# xls -> cached frame -> analyses (tables/figures) -> dashboards (xlsx) -> manuscripts (md/docx)
+STAGES = [
+    stage('ipd_cache', [sys.executable, '-c', 'from ipd_data import load_ipd_data; load_ipd_data()'],
+          inputs=['ipd_data.py', DATA_FILE], outputs=['.ipd_cache']),
+    stage('ipd_analysis', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['analysis_summary.txt', 'age_statistics.csv', 'age_distribution.csv', 'gender_distribution.csv',
+                   'los_statistics.csv', 'los_distribution.csv', 'diagnosis_top20.csv', 'icd_code_top20.csv',
+                   'department_distribution.csv', 'monthly_admissions.csv', 'daily_admissions.csv']),
+    stage('data_quality', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['data_quality_issues.csv', 'data_quality_summary.csv']),
+    stage('ipd_visualizations', inputs=[DATA_FILE], after=['ipd_cache'], outputs=['figures']),
+    stage('publication_tables', inputs=[DATA_FILE], after=['ipd_cache'], outputs=['tables']),
+    stage('respiratory_analysis', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['respiratory_figures', 'respiratory_tables']),
+    stage('comprehensive_gi_analysis', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['gi_figures', 'gi_tables', 'comprehensive_resp_figures', 'comprehensive_resp_tables']),
+    stage('comprehensive_cardiovascular_analysis', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['cv_figures', 'cv_tables']),
+    stage('create_los_dashboard', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['LOS_Analysis_Dashboard.xlsx', 'los_distribution.png', 'los_by_age_group.png',
+                   'los_by_gender.png', 'los_categories_pie.png', 'monthly_los_trends.png']),
+    stage('create_ari_dashboard', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['ARI_Dashboard.xlsx', 'ari_age_distribution.png', 'ari_gender_pie.png',
+                   'ari_age_groups.png', 'ari_monthly_trends.png', 'ari_daily_alerts.png']),
+    # create_add_dashboard.py is left out: it still fails on merged title cells when sizing columns
+    stage('create_add_dashboard_simple', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['ADD_Dashboard.xlsx', 'add_age_distribution.png', 'add_gender_pie.png', 'add_age_groups.png',
+                   'add_daily_alerts.png']),
+    stage('create_add_los_dashboard', inputs=[DATA_FILE], after=['ipd_cache'],
+          outputs=['ADD_LOS_Analysis_Dashboard.xlsx', 'add_los_distribution.png', 'add_los_by_age_group.png',
+                   'add_los_by_gender.png', 'add_los_categories_pie.png']),
+    stage('idsp_report', inputs=[DATA_FILE], after=['ipd_cache'], outputs=['idsp_reports']),
+    stage('revise_manuscripts', inputs=[DATA_FILE, GI_MD, RESP_MD], after=['ipd_cache'],
+          outputs=['gi_diagnosis_reclassified.png',
+                   'comprehensive_gastroenteritis_manuscript_updated.md',
+                   'comprehensive_respiratory_manuscript_updated.md',
+                   'comprehensive_gastroenteritis_manuscript_final_updated.docx',
+                   'comprehensive_respiratory_manuscript_final_updated.docx']),
+    stage('create_final_manuscripts_docx', inputs=[GI_MD, RESP_MD, 'gi_figures', 'comprehensive_resp_figures'],
+          outputs=['comprehensive_gastroenteritis_manuscript_final.docx',
+                   'comprehensive_respiratory_manuscript_final.docx']),
+    stage('create_docx_manuscript',
+          inputs=['tables/table1_demographics.csv', 'tables/table2_departments.csv', 'tables/table3_diagnoses.csv'],
+          outputs=['simsrh_manuscript_python_docx.docx']),
+    stage('create_professional_manuscripts', inputs=['gi_diagnosis_reclassified.png', 'comprehensive_resp_figures'],
+          outputs=['comprehensive_gastroenteritis_manuscript_professional.docx',
+                   'comprehensive_respiratory_manuscript_professional.docx']),
+    stage('expand_manuscript_content', inputs=['gi_diagnosis_reclassified.png', 'gi_figures', 'comprehensive_resp_figures'],
+          outputs=['comprehensive_gastroenteritis_corrected.docx', 'comprehensive_respiratory_corrected.docx']),
+    stage('create_ari_submission_docx', outputs=['ari_final_submission_with_projects.docx']),
+    stage('create_add_submission_docx', outputs=['add_final_submission_with_projects.docx']),
+]
+
+
+def local_imports(path, seen=None):
+    """Return the repository modules a script imports, followed transitively"""
+    seen = set() if seen is None else seen
+    try:
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError):
+        return seen
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            module = name.split('.')[0] + '.py'
+            if os.path.exists(module) and module not in seen:
+                seen.add(module)
+                local_imports(module, seen)
+    return seen
+
+
+def _expand(path):
+    # Files under a directory, in a stable order
+    if os.path.isdir(path):
+        return sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    return [path]
+
+
+def input_digest(st):
+    """Hash the contents of a stage's inputs, its command and the local modules its script imports"""
+    paths = set(st.inputs)
+    for path in st.inputs:
+        if path.endswith('.py'):
+            paths |= local_imports(path)
+    digest = hashlib.sha256(json.dumps(st.command[1:]).encode())
+    for path in sorted(paths):
+        for name in _expand(path):
+            file_hash = file_digest(name) if os.path.exists(name) else 'missing'
+            digest.update(f"{name}\0{file_hash}\n".encode())
+    return digest.hexdigest()
+
+
+def _covers(output, path):
+    # True when the output file/directory produces the given input path
+    output, path = os.path.normpath(output), os.path.normpath(path)
+    return path == output or path.startswith(output + os.sep) or output.startswith(path + os.sep)
+
+
+def dependencies(stages):
+    """Map each stage name to the stages that produce its inputs or that it is ordered after"""
+    deps = {}
+    for st in stages:
+        producers = {other.name for other in stages if other is not st
+                     and any(_covers(out, inp) for out in other.outputs for inp in st.inputs)}
+        deps[st.name] = producers | set(st.after)
+    return deps
+
+
+def _load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(state):
+    with open(STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def _run_stage(st, processes):
+    os.makedirs(LOG_DIR, exist_ok=True)
+    env = dict(os.environ, MPLBACKEND='Agg', **{PROCESSES_ENV: str(processes)})
+    start = time.perf_counter()
+    with open(os.path.join(LOG_DIR, f'{st.name}.log'), 'w') as log:
+        returncode = subprocess.call(st.command, stdout=log, stderr=subprocess.STDOUT, env=env)
+    return returncode, time.perf_counter() - start
+
+
+def run_pipeline(stages=STAGES, targets=None, force=False, jobs=None, dry_run=False):
+    """Run stages in dependency order, skipping those whose input hashes are unchanged
+
+    Independent stages run concurrently (one subprocess each, at most jobs at
+    a time) and share the CPUs: each stage's figure and document pools are
+    capped at cpu_count // jobs workers through FIGURE_PROCESSES. A stage
+    re-runs when its input digest differs from the last successful run, any
+    declared output is missing, or force is set. targets limits the run to the
+    named stages and everything they depend on. Returns {stage: status}.
+    """
+    by_name = {st.name: st for st in stages}
+    deps = dependencies(stages)
+    selected = set(by_name)
+    if targets:
+        unknown = set(targets) - selected
+        if unknown:
+            raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+        selected, queue = set(), list(targets)
+        while queue:
+            name = queue.pop()
+            if name not in selected:
+                selected.add(name)
+                queue.extend(deps[name])
+
+    state = _load_state()
+    status = {}
+    running = {}
+    pending = {}
+    cpus = os.cpu_count() or 1
+    jobs = jobs or cpus
+    processes = max(1, cpus // jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while len(status) < len(selected):
+            # Keep scanning until no more stages can be resolved without waiting
+            changed = True
+            while changed:
+                changed = False
+                for name in sorted(selected - set(status) - set(running.values())):
+                    upstream = deps[name] & selected
+                    if any(status.get(dep) in ('failed', 'blocked') for dep in upstream):
+                        status[name] = 'blocked'
+                        print(f"[blocked] {name}")
+                        changed = True
+                        continue
+                    if not all(dep in status for dep in upstream):
+                        continue
+                    changed = True
+                    st = by_name[name]
+                    digest = input_digest(st)
+                    outputs_exist = all(os.path.exists(out) for out in st.outputs)
+                    if not force and outputs_exist and state.get(name) == digest:
+                        status[name] = 'up-to-date'
+                        print(f"[up-to-date] {name}")
+                    elif dry_run:
+                        status[name] = 'would-run'
+                        print(f"[would run] {name}")
+                    else:
+                        print(f"[running] {name}")
+                        running[pool.submit(_run_stage, st, processes)] = name
+                        pending[name] = digest
+            if not running:
+                if len(status) < len(selected):
+                    raise RuntimeError("Stage dependencies contain a cycle")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                digest = pending.pop(name)
+                returncode, seconds = future.result()
+                if returncode == 0:
+                    status[name] = 'ran'
+                    state[name] = digest
+                    _save_state(state)
+                    print(f"[done] {name} ({seconds:.1f}s)")
+                else:
+                    status[name] = 'failed'
+                    state.pop(name, None)
+                    _save_state(state)
+                    print(f"[failed] {name} (exit {returncode}, see {LOG_DIR}/{name}.log)")
+    return status
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the IPD report pipeline, re-running only stages whose inputs changed")
+    parser.add_argument('stages', nargs='*', help="stages to bring up to date (default: all)")
+    parser.add_argument('--force', action='store_true', help="re-run stages even if their inputs are unchanged")
+    parser.add_argument('--jobs', type=int, default=None, help="maximum number of stages to run at once")
+    parser.add_argument('--dry-run', action='store_true', help="only report which stages would run")
+    parser.add_argument('--list', action='store_true', help="list stages and their dependencies")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, upstream in dependencies(STAGES).items():
+            print(f"{name}: {', '.join(sorted(upstream)) or '-'}")
+        sys.exit(0)
+
+    results = run_pipeline(targets=args.stages or None, force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+    sys.exit(1 if any(s in ('failed', 'blocked') for s in results.values()) else 0)
@@ -1,69 +1,81 @@
 import pandas as pd
 import numpy as np
 import os
-
+from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex
+from ipd_cube import build_cube, rollup
+from instrumentation import StageTrace
+from binning import bin_codes, bin_labels
+from cohorts import match_cohorts
+from manuscript_stats import compute_stats, save_stats, render_rows
+
+# Table 1 rows: characteristic and the template its n (%) cell is rendered from
+TABLE1_TEMPLATE = [
+    ('Total Patients', '{{total.n}} (100.0)'),
+    ('Age (years)', ''),
+    ('Mean ± SD', '{{age.mean:.2f}} ± {{age.sd:.2f}}'),
+    ('Median (IQR)', '{{age.median}} ({{age.q1}}-{{age.q3}})'),
+    ('Range', '{{age.min:.0f}}-{{age.max:.0f}}'),
+    ('Age Groups', ''),
+    ('0-18 years', '{{age_group.0-18.n}} ({{age_group.0-18.pct}})'),
+    ('19-35 years', '{{age_group.19-35.n}} ({{age_group.19-35.pct}})'),
+    ('36-50 years', '{{age_group.36-50.n}} ({{age_group.36-50.pct}})'),
+    ('51-65 years', '{{age_group.51-65.n}} ({{age_group.51-65.pct}})'),
+    ('65+ years', '{{age_group.65+.n}} ({{age_group.65+.pct}})'),
+    ('Gender', ''),
+    ('Male', '{{gender.M.n}} ({{gender.M.pct}})'),
+    ('Female', '{{gender.F.n}} ({{gender.F.pct}})'),
+]
+
+trace = StageTrace('publication_tables')
+
+trace.begin('load')
 # Load the data
-df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+df = load_ipd_data()
 
+trace.end(rows=len(df))
+trace.begin('derive', rows=len(df))
 # Parse A/S column for demographics
-df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-df['gender'] = df['a/s'].str.extract(r'/([MF])')
+demographics = parse_age_sex(df['a/s'])
+df['age'] = demographics['age_years']
+df['gender'] = demographics['gender']
 
 # Extract correct admission date from IP Number and Admission Time
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            from datetime import datetime
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
-
 # Create proper admission datetime by combining date from IP and time from Admission Time
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
-df['admission_time_only'] = pd.to_datetime(df['admission_time'], errors='coerce').dt.time
+df['admission_date'] = decode_ip_dates(df['ip_number'])
 
 # Combine date and time for complete admission datetime
-df['admission_datetime'] = pd.to_datetime(df.apply(
-    lambda row: f"{row['admission_date'].strftime('%Y-%m-%d')} {row['admission_time_only']}" if pd.notna(row['admission_date']) and pd.notna(row['admission_time_only']) else None, axis=1
-), errors='coerce')
-df['discharge_time'] = pd.to_datetime(df['discharge_time'], errors='coerce')
-
-# Create age groups
-age_bins = [0, 18, 35, 50, 65, 100]
-age_labels = ['0-18', '19-35', '36-50', '51-65', '65+']
-df['age_group'] = pd.cut(df['age'], bins=age_bins, labels=age_labels, right=False)
+df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
+df['discharge_time'] = parse_export_times(df['discharge_time'])
 
 # Calculate LOS
 df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
 
+# Bin codes for every registered age/LOS scheme, one searchsorted pass per column
+df = df.join(bin_codes(df))
+df['age_group'] = bin_labels(df, 'age_broad')
+df['admission_month'] = df['admission_datetime'].dt.to_period('M')
+
+trace.begin('aggregate', rows=len(df))
+# Pre-aggregate counts and LOS moments once; the cross-tabs below are roll-ups of this cube
+cube = build_cube(df, los_range=None)
+# Named statistics Table 1 is rendered from; saved with the tables so templates can list them
+stats = compute_stats(df, match_cohorts(df['diagnosis']))
+
+trace.begin('write', rows=len(df))
 # Create tables directory
 if not os.path.exists('tables'):
     os.makedirs('tables')
+save_stats(stats)
 
 # Table 1: Demographic Characteristics
 print("Creating Table 1: Demographic Characteristics")
-demographic_table = pd.DataFrame({
-    'Characteristic': ['Total Patients', 'Age (years)', 'Mean ± SD', 'Median (IQR)', 'Range',
-                      'Age Groups', '0-18 years', '19-35 years', '36-50 years', '51-65 years', '65+ years',
-                      'Gender', 'Male', 'Female'],
-    'n (%)': ['1366 (100.0)', '', '41.14 ± 25.44', '45.0 (20.0-64.0)', '0-91',
-             '', '310 (22.7)', '214 (15.7)', '238 (17.4)', '275 (20.1)', '329 (24.1)',
-             '', '802 (58.7)', '564 (41.3)']
-})
+demographic_table = pd.DataFrame(render_rows(TABLE1_TEMPLATE, stats), columns=['Characteristic', 'n (%)'])
 
 demographic_table.to_csv('tables/table1_demographics.csv', index=False)
 
 # Table 2: Department-wise Distribution
 print("Creating Table 2: Department-wise Distribution")
-dept_table = df['department'].value_counts().reset_index()
+dept_table = rollup(cube, 'department')['admissions'].sort_values(ascending=False, kind='stable').reset_index()
 dept_table.columns = ['Department', 'n (%)']
 total = dept_table['n (%)'].sum()
 dept_table['n (%)'] = dept_table['n (%)'].apply(lambda x: f"{x} ({x/total*100:.1f})")
@@ -79,8 +91,7 @@ diag_table.to_csv('tables/table3_diagnoses.csv', index=False)
 
 # Table 4: Monthly Admission Trends
 print("Creating Table 4: Monthly Admission Trends")
-df['admission_month'] = df['admission_datetime'].dt.to_period('M')
-monthly_table = df.groupby('admission_month').size().reset_index()
+monthly_table = rollup(cube, 'admission_month')['admissions'].reset_index()
 monthly_table.columns = ['Month', 'Admissions']
 monthly_table['Month'] = monthly_table['Month'].astype(str)
 monthly_table.to_csv('tables/table4_monthly_trends.csv', index=False)
@@ -112,13 +123,15 @@ los_stats.to_csv('tables/table6_los_analysis.csv', index=False)
 
 # Table 7: Age Group vs Gender Distribution
 print("Creating Table 7: Age Group vs Gender Distribution")
-age_gender_table = pd.crosstab(df['age_group'], df['gender'], margins=True)
+age_gender_table = rollup(cube, ['age_group', 'gender'])['admissions'].unstack('gender', fill_value=0)
+age_gender_table['All'] = age_gender_table.sum(axis=1)
+age_gender_table.loc['All'] = age_gender_table.sum()
 age_gender_table = age_gender_table.reset_index()
 age_gender_table.to_csv('tables/table7_age_gender_crosstab.csv', index=False)
 
 # Table 8: Department vs Average Length of Stay
 print("Creating Table 8: Department vs Average Length of Stay")
-dept_los_table = df.groupby('department')['length_of_stay'].agg(['count', 'mean', 'std', 'min', 'max']).round(1)
+dept_los_table = rollup(cube, 'department')[['count', 'mean', 'std', 'min', 'max']].round(1)
 dept_los_table = dept_los_table.reset_index()
 dept_los_table.columns = ['Department', 'N', 'Mean LOS', 'SD', 'Min', 'Max']
 dept_los_table['Mean LOS (SD)'] = dept_los_table.apply(lambda x: f"{x['Mean LOS']} ({x['SD']})", axis=1)
@@ -146,3 +159,5 @@ print("\nAll publication-quality tables created successfully!")
 print("Generated tables:")
 for i in range(1, 11):
     print(f"Table {i}: {['Demographic Characteristics', 'Department-wise Distribution', 'Top 10 Diagnoses', 'Monthly Admission Trends', 'Day of Week Admission Patterns', 'Length of Stay Analysis', 'Age Group vs Gender Distribution', 'Department vs Average Length of Stay', 'Ward/Bed Utilization Top 10', 'Summary Statistics'][i-1]}")
+
+trace.finish()
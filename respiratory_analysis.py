@@ -3,198 +3,173 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
-from datetime import datetime
+from cohorts import match_cohorts
+from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_age_sex
+from binning import bin_codes, bin_labels
+from figure_jobs import figure_job, render_figures
 import warnings
 warnings.filterwarnings('ignore')
 
+# Plotting style, applied in every rendering process
+PLOT_STYLE = {
+    'font.size': 12,
+    'font.family': 'serif',
+    'figure.figsize': (12, 8),
+    'figure.dpi': 150,
+    'axes.labelsize': 14,
+    'axes.titlesize': 16,
+    'xtick.labelsize': 12,
+    'ytick.labelsize': 12,
+    'legend.fontsize': 12,
+    'axes.grid': True,
+    'grid.alpha': 0.3
+}
+
+
+def apply_style():
+    warnings.filterwarnings('ignore')
+    plt.style.use('default')
+    sns.set_palette("husl")
+    plt.rcParams.update(PLOT_STYLE)
+
+
+# Chart renderers: each draws one figure from pre-aggregated data
+
+def draw_diagnoses(diag_counts):
+    bars = plt.bar(range(len(diag_counts)), diag_counts.values, color='skyblue', edgecolor='black', alpha=0.8)
+    plt.xticks(range(len(diag_counts)), diag_counts.index, rotation=45, ha='right')
+    plt.xlabel('Diagnosis')
+    plt.ylabel('Number of Cases')
+    plt.title('Respiratory Infection Cases by Diagnosis at SIMSRH IPD (Aug-Nov 2025)')
+
+    for bar, count in zip(bars, diag_counts.values):
+        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.5,
+                 f'{int(count)}', ha='center', va='bottom', fontweight='bold')
+
+
+def draw_age_distribution(ages):
+    plt.hist(ages, bins=15, edgecolor='black', alpha=0.7, color='lightcoral')
+    plt.xlabel('Age (years)')
+    plt.ylabel('Number of Respiratory Cases')
+    plt.title('Age Distribution of Respiratory Infection Cases at SIMSRH')
+    plt.grid(True, alpha=0.3)
+    plt.axvline(ages.mean(), color='red', linestyle='--', linewidth=2,
+               label=f'Mean: {ages.mean():.1f} years')
+    plt.legend()
+
+
+def draw_gender_distribution(gender_counts):
+    colors = ['lightblue', 'lightpink']
+    explode = (0.05, 0)
+
+    plt.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
+            colors=colors, explode=explode, shadow=True, startangle=90)
+    plt.title('Gender Distribution in Respiratory Infection Cases at SIMSRH', fontsize=16, fontweight='bold')
+    plt.axis('equal')
+
+
+def draw_monthly_trends(monthly_resp):
+    plt.plot(range(len(monthly_resp)), monthly_resp.values, marker='o', linewidth=3,
+             markersize=10, color='darkred', markerfacecolor='red', markeredgecolor='darkred')
+    plt.xticks(range(len(monthly_resp)), [str(x) for x in monthly_resp.index], rotation=45)
+    plt.xlabel('Month')
+    plt.ylabel('Number of Respiratory Cases')
+    plt.title('Monthly Trends of Respiratory Infection Cases at SIMSRH IPD')
+    plt.grid(True, alpha=0.3)
+
+    for i, v in enumerate(monthly_resp.values):
+        plt.text(i, v + 0.5, str(v), ha='center', va='bottom', fontweight='bold', fontsize=12)
+
+
+def draw_age_groups(age_group_counts):
+    bars = plt.bar(age_group_counts.index, age_group_counts.values, color='orange', edgecolor='black', alpha=0.8)
+    plt.xlabel('Age Group')
+    plt.ylabel('Number of Respiratory Cases')
+    plt.title('Age Group Distribution in Respiratory Infection Cases at SIMSRH')
+
+    for bar, count in zip(bars, age_group_counts.values):
+        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 1,
+                 f'{int(count)}', ha='center', va='bottom', fontweight='bold')
+
+    plt.grid(True, alpha=0.3)
+
+
+def draw_los_distribution(valid_los):
+    plt.hist(valid_los, bins=20, edgecolor='black', alpha=0.7, color='purple')
+    plt.xlabel('Length of Stay (days)')
+    plt.ylabel('Number of Respiratory Cases')
+    plt.title('Length of Stay Distribution for Respiratory Infection Cases at SIMSRH')
+    plt.grid(True, alpha=0.3)
+    plt.axvline(valid_los.mean(), color='red', linestyle='--', linewidth=2,
+               label=f'Mean LOS: {valid_los.mean():.1f} days')
+    plt.legend()
+
+
+def draw_departments(dept_resp):
+    bars = plt.bar(range(len(dept_resp)), dept_resp.values, color='teal', edgecolor='black', alpha=0.8)
+    plt.xticks(range(len(dept_resp)), dept_resp.index, rotation=45, ha='right')
+    plt.xlabel('Department')
+    plt.ylabel('Number of Respiratory Cases')
+    plt.title('Respiratory Infection Cases by Department at SIMSRH')
+
+    for bar, count in zip(bars, dept_resp.values):
+        plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.5,
+                 f'{int(count)}', ha='center', va='bottom', fontweight='bold')
+
+    plt.grid(True, alpha=0.3)
+
+
 # Load and prepare data
-df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+df = load_ipd_data()
 
 # Extract correct admission date from IP Number
-def extract_date_from_ip(ip_num):
-    if pd.isna(ip_num):
-        return None
-    ip_str = str(ip_num)
-    if len(ip_str) >= 9 and ip_str.startswith('IP'):
-        try:
-            year = 2000 + int(ip_str[2:4])
-            month = int(ip_str[4:6])
-            day = int(ip_str[6:8])
-            return datetime(year, month, day)
-        except:
-            return None
-    return None
-
-df['admission_date'] = df['ip_number'].apply(extract_date_from_ip)
-df['admission_time_only'] = pd.to_datetime(df['admission_time'], errors='coerce').dt.time
-df['admission_datetime'] = pd.to_datetime(df.apply(
-    lambda row: f"{row['admission_date'].strftime('%Y-%m-%d')} {row['admission_time_only']}" if pd.notna(row['admission_date']) and pd.notna(row['admission_time_only']) else None, axis=1
-), errors='coerce')
-df['discharge_time'] = pd.to_datetime(df['discharge_time'], errors='coerce')
+df['admission_date'] = decode_ip_dates(df['ip_number'])
+df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
+df['discharge_time'] = parse_export_times(df['discharge_time'])
 
 # Parse demographics
-df['age'] = df['a/s'].str.extract(r'(\d+)').astype(float)
-df['gender'] = df['a/s'].str.extract(r'/([MF])')
+demographics = parse_age_sex(df['a/s'])
+df['age'] = demographics['age_years']
+df['gender'] = demographics['gender']
 
 # Calculate LOS
 df['length_of_stay'] = (df['discharge_time'] - df['admission_datetime']).dt.total_seconds() / (24 * 3600)
 
-# Filter for respiratory infections
-respiratory_diagnoses = [
-    'Viral Fever', 'Acute Febrile Illness', 'LRTI', 'Bronchiolitis',
-    'Lower Respiratory Tract Infection', 'Upper Respiratory Tract Infection',
-    'Acute Febrile Illness Under Evaluation', 'Fever with Thrombocytopenia',
-    'Viral Fever with Thrombocytopenia', 'Viral Fever with URTI'
-]
+# Bin codes for every registered age/LOS scheme, one searchsorted pass per column
+df = df.join(bin_codes(df))
 
-resp_df = df[df['diagnosis'].isin(respiratory_diagnoses)].copy()
+# Filter for respiratory infections (exact-match RESP cohort from the registry)
+cohort_masks = match_cohorts(df['diagnosis'], icd_codes=df['icd_code'])
+resp_df = df[cohort_masks['RESP']].copy()
 
 print(f"Total respiratory infection cases: {len(resp_df)}")
 print(f"Percentage of total admissions: {len(resp_df)/len(df)*100:.1f}%")
 
 # Create age groups
-age_bins = [0, 18, 35, 50, 65, 100]
-age_labels = ['0-18', '19-35', '36-50', '51-65', '65+']
-resp_df['age_group'] = pd.cut(resp_df['age'], bins=age_bins, labels=age_labels, right=False)
-
-# Set up plotting style
-plt.style.use('default')
-sns.set_palette("husl")
-plt.rcParams.update({
-    'font.size': 12,
-    'font.family': 'serif',
-    'figure.figsize': (12, 8),
-    'figure.dpi': 150,
-    'axes.labelsize': 14,
-    'axes.titlesize': 16,
-    'xtick.labelsize': 12,
-    'ytick.labelsize': 12,
-    'legend.fontsize': 12,
-    'axes.grid': True,
-    'grid.alpha': 0.3
-})
+resp_df['age_group'] = bin_labels(resp_df, 'age_broad')
 
 # Create output directories
 os.makedirs('respiratory_figures', exist_ok=True)
 os.makedirs('respiratory_tables', exist_ok=True)
 
-# 1. Respiratory Cases by Diagnosis
-plt.figure(figsize=(14, 8))
-diag_counts = resp_df['diagnosis'].value_counts()
-bars = plt.bar(range(len(diag_counts)), diag_counts.values, color='skyblue', edgecolor='black', alpha=0.8)
-plt.xticks(range(len(diag_counts)), diag_counts.index, rotation=45, ha='right')
-plt.xlabel('Diagnosis')
-plt.ylabel('Number of Cases')
-plt.title('Respiratory Infection Cases by Diagnosis at SIMSRH IPD (Aug-Nov 2025)')
-
-for bar, count in zip(bars, diag_counts.values):
-    plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.5,
-             f'{int(count)}', ha='center', va='bottom', fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('respiratory_figures/resp_diagnosis_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# 2. Age Distribution of Respiratory Cases
-plt.figure(figsize=(10, 6))
-plt.hist(resp_df['age'].dropna(), bins=15, edgecolor='black', alpha=0.7, color='lightcoral')
-plt.xlabel('Age (years)')
-plt.ylabel('Number of Respiratory Cases')
-plt.title('Age Distribution of Respiratory Infection Cases at SIMSRH')
-plt.grid(True, alpha=0.3)
-plt.axvline(resp_df['age'].mean(), color='red', linestyle='--', linewidth=2,
-           label=f'Mean: {resp_df["age"].mean():.1f} years')
-plt.legend()
-plt.tight_layout()
-plt.savefig('respiratory_figures/resp_age_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# 3. Gender Distribution in Respiratory Cases
-plt.figure(figsize=(8, 8))
-gender_counts = resp_df['gender'].value_counts()
-colors = ['lightblue', 'lightpink']
-explode = (0.05, 0)
-
-plt.pie(gender_counts.values, labels=gender_counts.index, autopct='%1.1f%%',
-        colors=colors, explode=explode, shadow=True, startangle=90)
-plt.title('Gender Distribution in Respiratory Infection Cases at SIMSRH', fontsize=16, fontweight='bold')
-plt.axis('equal')
-plt.tight_layout()
-plt.savefig('respiratory_figures/resp_gender_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# 4. Monthly Trends of Respiratory Cases
+# Pre-aggregate the data behind each chart
 resp_df['admission_month'] = resp_df['admission_datetime'].dt.to_period('M')
-monthly_resp = resp_df.groupby('admission_month').size()
-
-plt.figure(figsize=(12, 6))
-plt.plot(range(len(monthly_resp)), monthly_resp.values, marker='o', linewidth=3,
-         markersize=10, color='darkred', markerfacecolor='red', markeredgecolor='darkred')
-plt.xticks(range(len(monthly_resp)), [str(x) for x in monthly_resp.index], rotation=45)
-plt.xlabel('Month')
-plt.ylabel('Number of Respiratory Cases')
-plt.title('Monthly Trends of Respiratory Infection Cases at SIMSRH IPD')
-plt.grid(True, alpha=0.3)
-
-for i, v in enumerate(monthly_resp.values):
-    plt.text(i, v + 0.5, str(v), ha='center', va='bottom', fontweight='bold', fontsize=12)
-
-plt.tight_layout()
-plt.savefig('respiratory_figures/resp_monthly_trends.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# 5. Age Group Distribution in Respiratory Cases
-plt.figure(figsize=(10, 6))
-age_group_counts = resp_df['age_group'].value_counts().sort_index()
-bars = plt.bar(age_group_counts.index, age_group_counts.values, color='orange', edgecolor='black', alpha=0.8)
-plt.xlabel('Age Group')
-plt.ylabel('Number of Respiratory Cases')
-plt.title('Age Group Distribution in Respiratory Infection Cases at SIMSRH')
-
-for bar, count in zip(bars, age_group_counts.values):
-    plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 1,
-             f'{int(count)}', ha='center', va='bottom', fontweight='bold')
-
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig('respiratory_figures/resp_age_groups.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# 6. Length of Stay Distribution for Respiratory Cases
-plt.figure(figsize=(10, 6))
 valid_los = resp_df['length_of_stay'].dropna()
 valid_los = valid_los[(valid_los >= 0) & (valid_los <= 50)]  # Filter outliers
 
-plt.hist(valid_los, bins=20, edgecolor='black', alpha=0.7, color='purple')
-plt.xlabel('Length of Stay (days)')
-plt.ylabel('Number of Respiratory Cases')
-plt.title('Length of Stay Distribution for Respiratory Infection Cases at SIMSRH')
-plt.grid(True, alpha=0.3)
-plt.axvline(valid_los.mean(), color='red', linestyle='--', linewidth=2,
-           label=f'Mean LOS: {valid_los.mean():.1f} days')
-plt.legend()
-plt.tight_layout()
-plt.savefig('respiratory_figures/resp_los_distribution.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# 7. Respiratory Cases by Department
-dept_resp = resp_df['department'].value_counts()
-plt.figure(figsize=(10, 6))
-bars = plt.bar(range(len(dept_resp)), dept_resp.values, color='teal', edgecolor='black', alpha=0.8)
-plt.xticks(range(len(dept_resp)), dept_resp.index, rotation=45, ha='right')
-plt.xlabel('Department')
-plt.ylabel('Number of Respiratory Cases')
-plt.title('Respiratory Infection Cases by Department at SIMSRH')
-
-for bar, count in zip(bars, dept_resp.values):
-    plt.text(bar.get_x() + bar.get_width()/2., bar.get_height() + 0.5,
-             f'{int(count)}', ha='center', va='bottom', fontweight='bold')
-
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig('respiratory_figures/resp_by_department.png', dpi=300, bbox_inches='tight')
-plt.close()
+render_figures([
+    figure_job('respiratory_figures/resp_diagnosis_distribution.png', draw_diagnoses,
+               resp_df['diagnosis'].value_counts(), figsize=(14, 8)),
+    figure_job('respiratory_figures/resp_age_distribution.png', draw_age_distribution, resp_df['age'].dropna()),
+    figure_job('respiratory_figures/resp_gender_distribution.png', draw_gender_distribution,
+               resp_df['gender'].value_counts(), figsize=(8, 8)),
+    figure_job('respiratory_figures/resp_monthly_trends.png', draw_monthly_trends,
+               resp_df.groupby('admission_month').size(), figsize=(12, 6)),
+    figure_job('respiratory_figures/resp_age_groups.png', draw_age_groups,
+               resp_df['age_group'].value_counts().sort_index()),
+    figure_job('respiratory_figures/resp_los_distribution.png', draw_los_distribution, valid_los),
+    figure_job('respiratory_figures/resp_by_department.png', draw_departments, resp_df['department'].value_counts()),
+], setup=apply_style)
 
 # Generate Tables
 # Table 1: Respiratory Cases Summary
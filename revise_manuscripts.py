@@ -1,30 +1,22 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from docx import Document
-from docx.shared import Inches, Pt, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.enum.style import WD_STYLE_TYPE
 import os
 from datetime import datetime
+from cohorts import match_cohorts, classify_unique
+from ipd_data import load_ipd_data
+from markdown_docx import convert_markdown
 import warnings
 warnings.filterwarnings('ignore')
 
 def create_innovative_gi_categories():
     """Create innovative reclassification of GI diagnoses for better visualization"""
     # Load data and identify GI cases
-    df = pd.read_excel('Compiled IPD case data SIMSRH_4months.xls')
-    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    df = load_ipd_data()
 
     # Find ADD cases
-    add_keywords = ['gastroenteritis', 'gastro', 'diarrhea', 'diarrhoea', 'diarrh', 'dysentery', 'cholera', 'food poisoning', 'add', 'acute ge', 'age', 'diarrhrea', 'loose', 'motion', 'stool', 'bowel', 'enteric', 'dehydration']
-    add_cases = []
-    for idx, row in df.iterrows():
-        diagnosis = str(row['diagnosis']).lower()
-        if any(keyword in diagnosis for keyword in add_keywords):
-            add_cases.append(idx)
-
-    add_df = df.loc[add_cases].copy() if add_cases else pd.DataFrame()
+    cohort_masks = match_cohorts(df['diagnosis'])
+    add_df = df[cohort_masks['ADD']].copy()
 
     # Innovative reclassification of GI diagnoses
     def classify_gi_diagnosis(diagnosis):
@@ -70,7 +62,7 @@ def create_innovative_gi_categories():
             return 'Other Gastroenteritis'
 
     if len(add_df) > 0:
-        add_df['diagnosis_category'] = add_df['diagnosis'].apply(classify_gi_diagnosis)
+        add_df['diagnosis_category'] = classify_unique(add_df['diagnosis'], classify_gi_diagnosis)
 
         # Create improved visualization
         plt.style.use('default')
@@ -1121,54 +1113,8 @@ def create_final_docx_manuscripts():
 
     # Create gastroenteritis DOCX
     try:
-        with open('comprehensive_gastroenteritis_manuscript_updated.md', 'r', encoding='utf-8') as f:
-            gi_content = f.read()
-
-        doc_gi = Document()
-        title_style = doc_gi.styles.add_style('CustomTitle', 1)
-        title_style.font.size = Pt(16)
-        title_style.font.bold = True
-        title_style.paragraph_format.alignment = 1
-
-        lines = gi_content.split('\n')
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if line.startswith('# '):
-                p = doc_gi.add_paragraph(line[2:], style='CustomTitle')
-            elif line.startswith('## '):
-                p = doc_gi.add_paragraph(line[3:])
-                p.runs[0].bold = True
-            elif line.startswith('|') and '|' in line:
-                # Parse table
-                table_lines = []
-                while i < len(lines) and lines[i].strip().startswith('|'):
-                    table_lines.append(lines[i])
-                    i += 1
-                i -= 1
-                if len(table_lines) > 1:
-                    headers = [col.strip() for col in table_lines[0].split('|')[1:-1]]
-                    data_rows = []
-                    for table_line in table_lines[2:]:
-                        if table_line.strip():
-                            row_data = [col.strip() for col in table_line.split('|')[1:-1]]
-                            data_rows.append(row_data)
-                    if data_rows:
-                        table = doc_gi.add_table(rows=len(data_rows) + 1, cols=len(headers))
-                        table.style = 'Table Grid'
-                        hdr_cells = table.rows[0].cells
-                        for j, header in enumerate(headers):
-                            hdr_cells[j].text = header
-                            hdr_cells[j].paragraphs[0].runs[0].bold = True
-                        for row_idx, row_data in enumerate(data_rows):
-                            row_cells = table.rows[row_idx + 1].cells
-                            for col_idx, cell_data in enumerate(row_data):
-                                row_cells[col_idx].text = cell_data
-            elif line:
-                p = doc_gi.add_paragraph(line)
-            i += 1
-
-        doc_gi.save('comprehensive_gastroenteritis_manuscript_final_updated.docx')
+        convert_markdown('comprehensive_gastroenteritis_manuscript_updated.md',
+                         'comprehensive_gastroenteritis_manuscript_final_updated.docx', blank_lines=False)
         print("Final gastroenteritis manuscript DOCX created")
 
     except Exception as e:
@@ -1176,54 +1122,8 @@ def create_final_docx_manuscripts():
 
     # Create respiratory DOCX
     try:
-        with open('comprehensive_respiratory_manuscript_updated.md', 'r', encoding='utf-8') as f:
-            resp_content = f.read()
-
-        doc_resp = Document()
-        title_style = doc_resp.styles.add_style('CustomTitle', 1)
-        title_style.font.size = Pt(16)
-        title_style.font.bold = True
-        title_style.paragraph_format.alignment = 1
-
-        lines = resp_content.split('\n')
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if line.startswith('# '):
-                p = doc_resp.add_paragraph(line[2:], style='CustomTitle')
-            elif line.startswith('## '):
-                p = doc_resp.add_paragraph(line[3:])
-                p.runs[0].bold = True
-            elif line.startswith('|') and '|' in line:
-                # Parse table
-                table_lines = []
-                while i < len(lines) and lines[i].strip().startswith('|'):
-                    table_lines.append(lines[i])
-                    i += 1
-                i -= 1
-                if len(table_lines) > 1:
-                    headers = [col.strip() for col in table_lines[0].split('|')[1:-1]]
-                    data_rows = []
-                    for table_line in table_lines[2:]:
-                        if table_line.strip():
-                            row_data = [col.strip() for col in table_line.split('|')[1:-1]]
-                            data_rows.append(row_data)
-                    if data_rows:
-                        table = doc_resp.add_table(rows=len(data_rows) + 1, cols=len(headers))
-                        table.style = 'Table Grid'
-                        hdr_cells = table.rows[0].cells
-                        for j, header in enumerate(headers):
-                            hdr_cells[j].text = header
-                            hdr_cells[j].paragraphs[0].runs[0].bold = True
-                        for row_idx, row_data in enumerate(data_rows):
-                            row_cells = table.rows[row_idx + 1].cells
-                            for col_idx, cell_data in enumerate(row_data):
-                                row_cells[col_idx].text = cell_data
-            elif line:
-                p = doc_resp.add_paragraph(line)
-            i += 1
-
-        doc_resp.save('comprehensive_respiratory_manuscript_final_updated.docx')
+        convert_markdown('comprehensive_respiratory_manuscript_updated.md',
+                         'comprehensive_respiratory_manuscript_final_updated.docx', blank_lines=False)
         print("Final respiratory manuscript DOCX created")
 
     except Exception as e:
@@ -0,0 +1,114 @@
+import argparse
+import numpy as np
+import pandas as pd
+from census import stay_intervals
+
+# Stays longer than this are kept out of the back-scan bound (see StayIndex)
+LONG_STAY_DAYS = 50
+
+
+class StayIndex:
+    """Overlap index over admission/discharge intervals, partitioned by ward (or ward/bed)
+
+    Stays are sorted once by (partition, admission). A query for [start, end)
+    binary-searches each partition's admissions: a stay that overlaps start can
+    only have been admitted within the partition's longest stay before it, so
+    just that slice is checked instead of the whole frame. Only stays that
+    stay_intervals marks usable are indexed. Open-ended stays and stays longer
+    than long_stay_days go in a separate per-partition list, checked directly
+    against every admission before end, so one outlier cannot widen the
+    back-scan to the whole partition. Results are index labels of the source frame.
+    """
+
+    def __init__(self, df, by='ward', admit_col='admission_datetime', discharge_col='discharge_time',
+                 missing_col='discharge_missing', long_stay_days=LONG_STAY_DAYS):
+        self.by, self.admit_col, self.discharge_col, self.missing_col = by, admit_col, discharge_col, missing_col
+        admit, discharge, status = stay_intervals(df, admit_col, discharge_col, missing_col)
+        part_codes, self.partitions = pd.factorize(df[by], sort=True)
+        valid = (status <= 1) & (part_codes >= 0)
+        rows = np.flatnonzero(valid)
+        # Open-ended stays have discharge OPEN_ENDED, so they always exceed the limit
+        long_stay = discharge[rows] - admit[rows] > long_stay_days * 86_400 * 10**9
+        self._labels = df.index.to_numpy()
+        self._closed = self._build(rows[~long_stay], part_codes, admit, discharge)
+        self._long = self._build(rows[long_stay], part_codes, admit, discharge)
+
+    def _build(self, rows, part_codes, admit, discharge):
+        order = np.lexsort((admit[rows], part_codes[rows]))
+        rows = rows[order]
+        codes = part_codes[rows]
+        bounds = np.searchsorted(codes, np.arange(len(self.partitions) + 1))
+        durations = discharge[rows] - admit[rows]
+        longest = np.array([durations[a:b].max() if b > a else 0 for a, b in zip(bounds[:-1], bounds[1:])],
+                           dtype=np.int64)
+        return {'rows': rows, 'admit': admit[rows], 'discharge': discharge[rows], 'bounds': bounds, 'longest': longest}
+
+    def _partition_codes(self, partition):
+        if partition is None:
+            return range(len(self.partitions))
+        names = [partition] if np.isscalar(partition) else list(partition)
+        codes = self.partitions.get_indexer(names)
+        if (codes < 0).any():
+            missing = [name for name, code in zip(names, codes) if code < 0]
+            raise KeyError(f"Unknown partition(s): {', '.join(map(str, missing))}")
+        return codes
+
+    @staticmethod
+    def _to_ns(when):
+        return pd.Timestamp(when).to_datetime64().astype('datetime64[ns]').view(np.int64)
+
+    def query(self, start, end=None, partition=None):
+        """Index labels of stays overlapping [start, end) (or present at start when end is None)"""
+        t1 = self._to_ns(start)
+        t2 = t1 + 1 if end is None else self._to_ns(end)
+        found = []
+        for code in self._partition_codes(partition):
+            closed = self._closed
+            a, b = closed['bounds'][code], closed['bounds'][code + 1]
+            admit = closed['admit'][a:b]
+            lo = np.searchsorted(admit, t1 - closed['longest'][code], side='left')
+            hi = np.searchsorted(admit, t2, side='left')
+            hits = lo + np.flatnonzero(closed['discharge'][a + lo:a + hi] > t1)
+            found.append(closed['rows'][a + hits])
+
+            long = self._long
+            a, b = long['bounds'][code], long['bounds'][code + 1]
+            hi = np.searchsorted(long['admit'][a:b], t2, side='left')
+            hits = np.flatnonzero(long['discharge'][a:a + hi] > t1)
+            found.append(long['rows'][a + hits])
+        rows = np.sort(np.concatenate(found)) if found else np.array([], dtype=np.int64)
+        return pd.Index(self._labels[rows])
+
+    def contacts(self, df, label):
+        """Index labels of other stays in the same partition that overlapped the given stay"""
+        row = df.loc[label]
+        if pd.notna(row[self.discharge_col]):
+            end = row[self.discharge_col]
+        elif row.get(self.missing_col, False):
+            end = pd.Timestamp.max
+        else:
+            raise ValueError(f"Stay {label!r} has an unreadable discharge time")
+        overlapping = self.query(row[self.admit_col], end, row[self.by])
+        return overlapping.drop(label, errors='ignore')
+
+
+if __name__ == "__main__":
+    from ipd_data import load_ipd_data, decode_ip_dates, combine_admission_datetime, parse_export_times, parse_ward_bed
+
+    parser = argparse.ArgumentParser(description="List patients admitted to a ward between two times (contact tracing)")
+    parser.add_argument('ward', help="ward name as in Ward/Bed, e.g. 'M M W 1'")
+    parser.add_argument('start', help="start of the window, e.g. 2025-09-01 or '2025-09-01 14:00'")
+    parser.add_argument('end', nargs='?', default=None, help="end of the window (default: patients present at start)")
+    args = parser.parse_args()
+
+    df = load_ipd_data()
+    df['admission_date'] = decode_ip_dates(df['ip_number'])
+    df['admission_datetime'] = combine_admission_datetime(df['admission_date'], df['admission_time'])
+    df['discharge_missing'] = df['discharge_time'].isna()
+    df['discharge_time'] = parse_export_times(df['discharge_time'])
+    df['ward'] = parse_ward_bed(df['ward/bed'])['ward']
+
+    index = StayIndex(df)
+    labels = index.query(args.start, args.end, args.ward)
+    print(f"{len(labels)} stays in {args.ward} overlapping {args.start} - {args.end or args.start}")
+    print(df.loc[labels, ['ip_number', 'ward/bed', 'admission_datetime', 'discharge_time', 'diagnosis']].to_string())
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from numpy.lib.stride_tricks import sliding_window_view
+
+# EARS (CDC Early Aberration Reporting System) settings: 7-day baseline, C2/C3 with a 2-day guard band
+EARS_BASELINE_DAYS = 7
+EARS_GUARD_DAYS = 2
+C1_THRESHOLD = 3.0
+C2_THRESHOLD = 3.0
+C3_THRESHOLD = 2.0
+# Floor on the baseline SD so a single case after an all-zero week does not alert
+MIN_SD = 1.0
+# Upper CUSUM on the C2-standardised counts: reference value k and decision interval h
+CUSUM_K = 0.5
+CUSUM_H = 4.0
+
+
+def daily_counts(df, cohort_masks, by='department', date_col='admission_date', start=None, end=None):
+    """Daily admissions for every cohort x group series in one bincount
+
+    Returns a DataFrame indexed by every calendar day from start to end (default:
+    the first and last admission date) with (cohort, group) columns.
+    """
+    days = pd.to_datetime(df[date_col]).to_numpy(dtype='datetime64[D]')
+    start = np.datetime64(pd.Timestamp(start).date()) if start is not None else days[~np.isnat(days)].min()
+    end = np.datetime64(pd.Timestamp(end).date()) if end is not None else days[~np.isnat(days)].max()
+    n_days = int((end - start).astype(int)) + 1
+    group_codes, groups = pd.factorize(df[by], sort=True)
+
+    rows, cohorts = np.nonzero(cohort_masks.to_numpy(dtype=bool))
+    day = (days[rows] - start).astype(np.int64)
+    keep = ~np.isnat(days[rows]) & (day >= 0) & (day < n_days) & (group_codes[rows] >= 0)
+    series = cohorts[keep] * len(groups) + group_codes[rows][keep]
+    n_series = cohort_masks.shape[1] * len(groups)
+    counts = np.bincount(series * n_days + day[keep], minlength=n_series * n_days).reshape(n_series, n_days)
+
+    columns = pd.MultiIndex.from_product([cohort_masks.columns, groups], names=['cohort', by])
+    index = pd.date_range(pd.Timestamp(start), periods=n_days, freq='D', name='date')
+    return pd.DataFrame(counts.T, index=index, columns=columns)
+
+
+def _baseline(x, lag, min_sd):
+    # Mean and SD of the EARS_BASELINE_DAYS days ending `lag` days before each day (NaN until available)
+    n = EARS_BASELINE_DAYS
+    mean = np.full(x.shape, np.nan)
+    sd = np.full(x.shape, np.nan)
+    windows = sliding_window_view(x, n, axis=0)  # windows[i] covers days i .. i+n-1
+    usable = len(x) - n - lag + 1
+    if usable > 0:
+        mean[n + lag - 1:] = windows[:usable].mean(axis=-1)
+        sd[n + lag - 1:] = windows[:usable].std(axis=-1, ddof=1)
+    return mean, np.maximum(sd, min_sd)
+
+
+def ears_statistics(counts, min_sd=MIN_SD):
+    """EARS C1, C2 and C3 statistics for every series at once; returns three (days x series) arrays
+
+    C1 compares each day with the mean/SD of the previous 7 days, C2 with the
+    7 days ending 3 days earlier (a 2-day guard band), and C3 sums the C2 excess
+    over 1 across the current and two previous days.
+    """
+    x = counts.to_numpy(dtype=float)
+    mean1, sd1 = _baseline(x, 1, min_sd)
+    mean2, sd2 = _baseline(x, 1 + EARS_GUARD_DAYS, min_sd)
+    c1 = (x - mean1) / sd1
+    c2 = (x - mean2) / sd2
+    excess = np.maximum(c2 - 1, 0)
+    c3 = np.full(x.shape, np.nan)
+    c3[2:] = excess[2:] + excess[1:-1] + excess[:-2]
+    return c1, c2, c3
+
+
+def cusum(z, k=CUSUM_K):
+    """Upper CUSUM S_t = max(0, S_t-1 + z_t - k) run across all series together
+
+    Days without a standardised value (no baseline yet) are NaN and do not
+    advance the sum.
+    """
+    z = np.asarray(z, dtype=float)
+    out = np.full(z.shape, np.nan)
+    s = np.zeros(z.shape[1:])
+    for t in range(len(z)):
+        ready = ~np.isnan(z[t])
+        s = np.where(ready, np.maximum(0.0, s + np.where(ready, z[t], 0.0) - k), s)
+        out[t] = np.where(ready, s, np.nan)
+    return out
+
+
+def detect_outbreaks(counts, min_sd=MIN_SD, k=CUSUM_K, h=CUSUM_H):
+    """Run EARS C1/C2/C3 and CUSUM over every daily series and return one row per day and series
+
+    Columns: date, the counts column levels (e.g. cohort, department), count,
+    c1, c2, c3, cusum, one flag per detector and alert (any detector fired).
+    """
+    c1, c2, c3 = ears_statistics(counts, min_sd)
+    s = cusum(c2, k)
+    n_days, n_series = counts.shape
+    result = pd.DataFrame({'date': np.repeat(counts.index.to_numpy(), n_series)})
+    for level, name in enumerate(counts.columns.names):
+        result[name] = np.tile(counts.columns.get_level_values(level).to_numpy(), n_days)
+    result['count'] = counts.to_numpy().ravel()
+    for name, values in [('c1', c1), ('c2', c2), ('c3', c3), ('cusum', s)]:
+        result[name] = values.ravel().round(2)
+    result['c1_alert'] = result['c1'] > C1_THRESHOLD
+    result['c2_alert'] = result['c2'] > C2_THRESHOLD
+    result['c3_alert'] = result['c3'] > C3_THRESHOLD
+    result['cusum_alert'] = result['cusum'] > h
+    result['alert'] = result[['c1_alert', 'c2_alert', 'c3_alert', 'cusum_alert']].any(axis=1)
+    return result
+
+
+def alert_table(results):
+    """Days that raised at least one alert, with the detectors that fired"""
+    alerts = results[results['alert']].copy()
+    flags = ['c1_alert', 'c2_alert', 'c3_alert', 'cusum_alert']
+    names = np.array(['C1', 'C2', 'C3', 'CUSUM'])
+    alerts['detectors'] = [', '.join(names[fired]) for fired in alerts[flags].to_numpy(dtype=bool)]
+    columns = [c for c in results.columns if c not in flags and c != 'alert']
+    return alerts[columns + ['detectors']].reset_index(drop=True)
+
+
+def draw_alert_overlay(results, by='department', title='Daily Admissions with Outbreak Alerts'):
+    """Plot daily counts per group for one cohort with alert days marked"""
+    counts = results.pivot_table(index='date', columns=by, values='count', aggfunc='sum', observed=True)
+    for group in counts.columns:
+        plt.plot(counts.index, counts[group], linewidth=1.2, alpha=0.8, label=str(group))
+    alerts = results[results['alert']]
+    if len(alerts):
+        plt.scatter(alerts['date'], alerts['count'], color='red', marker='v', s=60, zorder=3, label='Alert (EARS/CUSUM)')
+    plt.xlabel('Date')
+    plt.ylabel('Admissions per Day')
+    plt.title(title)
+    plt.legend(fontsize=9)
+    plt.grid(True, alpha=0.3)
+    plt.xticks(rotation=45)
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+# Column order of the cleaned SIMSRH export (as returned by ipd_data.load_ipd_data)
+IPD_COLUMNS = ['sn', 'unnamed:_1', 'ip_number', 'pr_number', 'admission_time', 'discharge_time', 'patient_name',
+               'a/s', 'department', 'ward/bed', 'diagnosis', 'icd_code', 'unnamed:_12', 'unnamed:_13']
+
+# Department mix and wards of the four-month SIMSRH sample
+DEPARTMENT_SHARE = {'GENERAL MEDICINE': 0.59, 'PAEDIATRIC': 0.21, 'RESPIRATORY MEDICINE': 0.20}
+DEPARTMENT_WARDS = {
+    'GENERAL MEDICINE': ['M M W 1', 'M M W 2', 'M M W 3', 'F M W 1', 'F M W 2', 'MICU'],
+    'PAEDIATRIC': ['PAED W 1', 'PAED W 2', 'PAED W3', 'PAED W4', 'NICU', 'PICU'],
+    'RESPIRATORY MEDICINE': ['M TB W', 'F TB W', 'RICU', 'SS-1', 'SS-4', 'SS- 5'],
+}
+
+# Fallback diagnosis vocabulary in the style of the export, used when the workbook is not available
+DEFAULT_DIAGNOSES = {
+    'GENERAL MEDICINE': [
+        'ACUTE GASTROENTERITIS WITH SOME DEHYDRATION', 'ACUTE FEBRILE ILLNESS UNDER EVALUATION',
+        'VIRAL FEVER WITH THROMBOCYTOPENIA', 'DENGUE FEVER WITH THROMBOCYTOPENIA',
+        '1. SYSTEMIC HYPERTENSION\n2. TYPE 2 DIABETES MELLITUS', 'CORONARY ARTERY DISEASE - ACUTE CORONARY SYNDROME',
+        'CEREBROVASCULAR ACCIDENT - ACUTE ISCHEMIC STROKE', 'URINARY TRACT INFECTION - ESCHERICHIA COLI',
+        'ACUTE KIDNEY INJURY', 'ALCOHOLIC LIVER DISEASE WITH ASCITES', 'ORGANOPHOSPHORUS POISONING',
+        'HEART FAILURE WITH REDUCED EJECTION FRACTION', 'SEPSIS WITH SEPTIC SHOCK', 'ACUTE DIARRHOEAL DISEASE',
+    ],
+    'PAEDIATRIC': [
+        'TERM| 38 WKS|SINGLE |MALE|LSCS|2.9KGS| AGA| ROUTINE NEW BORN CARE', 'BRONCHIOLITIS', 'LRTI',
+        'ACUTE GASTROENTERITIS WITH SOME DEHYDRATION', 'VIRAL FEVER', 'PNEUMONIA', 'FEBRILE SEIZURE',
+        'NEONATAL HYPERBILIRUBINEMIA', 'PRETERM/ LOW BIRTH WEIGHT/ PROBABLE SEPSIS', 'ACUTE DIARRHOEA',
+    ],
+    'RESPIRATORY MEDICINE': [
+        'ACUTE EXACERBATION OF CHRONIC OBSTRUCTIVE PULMONARY DISEASE', 'COMMUNITY ACQUIRED PNEUMONIA',
+        'MICROBIOLOGICALLY CONFIRMED PULMONARY TUBERCULOSIS', 'BRONCHIAL ASTHMA IN ACUTE EXACERBATION',
+        'LOWER RESPIRATORY TRACT INFECTION', 'RIGHT SIDED PLEURAL EFFUSION', 'INTERSTITIAL LUNG DISEASE',
+        'TYPE 2 RESPIRATORY FAILURE', 'UPPER RESPIRATORY TRACT INFECTION', 'SPONTANEOUS PNEUMOTHORAX',
+    ],
+}
+DEFAULT_ICD_CODES = ['A09', 'J18.9', 'J44.9', 'I10', 'E11.9', 'N39.0', 'A90', 'I21.9', 'J96.0']
+
+# Admission hour-of-day profile of the sample (busiest around midday)
+ADMISSION_HOUR_SHARE = np.array([36, 34, 25, 18, 13, 12, 7, 14, 20, 31, 59, 78, 96, 61, 68, 78,
+                                 56, 49, 51, 47, 41, 39, 32, 35], dtype=float)
+
+# Keep IP serials (nnnn) well below 9999 per day, as in the export
+MAX_ADMISSIONS_PER_DAY = 800
+
+
+def vocabulary_from_frame(df):
+    """Build a diagnosis vocabulary {department: Series of weights indexed by diagnosis} from a real frame"""
+    vocab = {}
+    for dept, diagnoses in df.dropna(subset=['diagnosis']).groupby('department')['diagnosis']:
+        vocab[dept] = diagnoses.value_counts(normalize=True)
+    return vocab
+
+
+def _default_vocabulary():
+    return {dept: pd.Series(1 / len(dx), index=dx) for dept, dx in DEFAULT_DIAGNOSES.items()}
+
+
+def _date_strings(days, minutes, epoch):
+    # 'dd-mm-YYYY hh:MM AM' built from a per-day and a per-minute lookup table
+    day_values, day_codes = np.unique(days, return_inverse=True)
+    day_text = pd.DatetimeIndex(epoch + day_values.astype('timedelta64[D]')).strftime('%d-%m-%Y ').to_numpy(dtype='U11')
+    minute_text = pd.date_range('2000-01-01', periods=1440, freq='min').strftime('%I:%M %p').to_numpy(dtype='U8')
+    return np.char.add(day_text[day_codes], minute_text[minutes])
+
+
+def generate_ipd(n_rows, seed=0, start='2025-08-01', days=104, vocabulary=None,
+                 readmission_rate=0.05, missing_discharge_rate=0.002, icd_rate=0.006, export_los_rate=0.2):
+    """Generate a deterministic synthetic IPD frame with the cleaned SIMSRH columns
+
+    IP numbers follow IPYYMMDDnnnn, A/S values look like "25Y/F" (with D and M
+    units for infants), admission/discharge times use the export's
+    'dd-mm-YYYY hh:MM AM' text, and diagnoses are sampled per department from
+    vocabulary (see vocabulary_from_frame) or a built-in list. The admission
+    window is stretched when needed to keep IP serials under MAX_ADMISSIONS_PER_DAY.
+    The same seed always yields the same frame.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = _default_vocabulary() if vocabulary is None else vocabulary
+    n = int(n_rows)
+    days = max(int(days), -(-n // MAX_ADMISSIONS_PER_DAY))
+    epoch = np.datetime64(start, 'D')
+
+    # Admission instants, in chronological order
+    adm_day = np.sort(rng.integers(0, days, n))
+    adm_minute = rng.choice(24, n, p=ADMISSION_HOUR_SHARE / ADMISSION_HOUR_SHARE.sum()) * 60 + rng.integers(0, 60, n)
+    order = np.lexsort((adm_minute, adm_day))
+    adm_day, adm_minute = adm_day[order], adm_minute[order]
+
+    # IP serial: increasing within each day with irregular gaps
+    gaps = rng.integers(1, 12, n)
+    day_start = np.r_[0, np.flatnonzero(np.diff(adm_day)) + 1]
+    cum = np.cumsum(gaps)
+    serial = cum - np.repeat(cum[day_start] - gaps[day_start], np.diff(np.r_[day_start, n]))
+    serial = np.minimum(serial, 9999)
+    day_values, day_codes = np.unique(adm_day, return_inverse=True)
+    ip_prefix = pd.DatetimeIndex(epoch + day_values.astype('timedelta64[D]')).strftime('IP%y%m%d').to_numpy(dtype='U8')
+    serial_text = np.char.zfill(np.arange(10000).astype('U4'), 4)
+    ip_number = np.char.add(ip_prefix[day_codes], serial_text[serial])
+
+    # Department, ward/bed and demographics
+    departments = list(DEPARTMENT_SHARE)
+    dept_code = rng.choice(len(departments), n, p=np.array(list(DEPARTMENT_SHARE.values())))
+    department = np.array(departments, dtype=object)[dept_code]
+    ward_bed = np.empty(n, dtype=object)
+    diagnosis = np.empty(n, dtype=object)
+    for code, dept in enumerate(departments):
+        rows = np.flatnonzero(dept_code == code)
+        wards = np.array([f"{ward}/{bed}" for ward in DEPARTMENT_WARDS[dept] for bed in range(1, 31)], dtype=object)
+        ward_bed[rows] = wards[rng.integers(0, len(wards), len(rows))]
+        weights = vocabulary.get(dept)
+        if weights is None or len(weights) == 0:
+            weights = pd.concat(list(vocabulary.values()))
+        diagnosis[rows] = weights.index.to_numpy(dtype=object)[
+            rng.choice(len(weights), len(rows), p=(weights / weights.sum()).to_numpy())]
+
+    paediatric = department == 'PAEDIATRIC'
+    # Most paediatric admissions are neonates (ages recorded in days)
+    paed_age = np.where(rng.random(n) < 0.68, 0, rng.integers(1, 18, n))
+    age_years = np.where(paediatric, paed_age, np.clip(rng.normal(52, 18, n), 13, 95).astype(int))
+    unit = np.zeros(n, dtype=np.int64)  # 0=Y, 1=M, 2=D
+    infant = paediatric & (age_years == 0)
+    unit[infant] = np.where(rng.random(infant.sum()) < 0.9, 2, 1)
+    age_value = np.where(unit == 2, rng.integers(1, 28, n), np.where(unit == 1, rng.integers(1, 12, n), age_years))
+    female = rng.random(n) < 0.41
+    as_table = np.array([f"{age}{u}/{g}" for age in range(100) for u in 'YMD' for g in 'MF'], dtype=object)
+    a_s = as_table[(age_value * 3 + unit) * 2 + female]
+    patient_name = np.where(female, 'MS. SYNTHETIC PATIENT', 'MR. SYNTHETIC PATIENT').astype(object)
+
+    # Patient identifiers: first visits get a new PR number, readmissions reuse an earlier one
+    pr_number = (pd.DatetimeIndex(epoch + day_values.astype('timedelta64[D]')).strftime('%Y%m%d').astype(np.int64)
+                 .to_numpy()[day_codes] * 10000 + serial)
+    readmit = np.flatnonzero(rng.random(n) < readmission_rate)
+    readmit = readmit[readmit > 0]
+    pr_number[readmit] = pr_number[(rng.random(len(readmit)) * readmit).astype(np.int64)]
+
+    # Length of stay (lognormal, median ~3.5 days) and discharge instants
+    los_minutes = np.maximum(np.round(rng.lognormal(np.log(3.5 * 1440), 0.7, n)), 30).astype(np.int64)
+    dis_total = adm_day * 1440 + adm_minute + los_minutes
+    admission_time = _date_strings(adm_day, adm_minute, epoch).astype(object)
+    discharge_time = _date_strings(dis_total // 1440, dis_total % 1440, epoch).astype(object)
+    discharge_time[rng.random(n) < missing_discharge_rate] = np.nan
+
+    icd_code = np.full(n, np.nan, dtype=object)
+    with_icd = rng.random(n) < icd_rate
+    icd_code[with_icd] = np.array(DEFAULT_ICD_CODES, dtype=object)[rng.integers(0, len(DEFAULT_ICD_CODES), with_icd.sum())]
+    export_los = np.where(rng.random(n) < export_los_rate, los_minutes / 1440, np.nan)
+
+    return pd.DataFrame({
+        'sn': np.arange(1, n + 1),
+        'unnamed:_1': department,
+        'ip_number': ip_number.astype(object),
+        'pr_number': pr_number,
+        'admission_time': admission_time,
+        'discharge_time': discharge_time,
+        'patient_name': patient_name,
+        'a/s': a_s,
+        'department': department,
+        'ward/bed': ward_bed,
+        'diagnosis': diagnosis,
+        'icd_code': icd_code,
+        'unnamed:_12': np.full(n, np.nan),
+        'unnamed:_13': export_los,
+    }, columns=IPD_COLUMNS)